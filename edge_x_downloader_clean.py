@@ -13,6 +13,9 @@ from modules.core.orchestrator import EdgeXDownloader
 from modules.core.exceptions import XDownloaderException
 from modules.utils.logging import Logger
 from modules.utils.url_utils import URLUtils
+from modules.utils.cache_manager import CacheManager
+from modules.utils.time_index import format_date_report, parse_date_bound
+from modules.config.constants import PIPELINE_ENABLED
 
 def setup_user_config(args):
     """
@@ -54,6 +57,30 @@ def setup_user_config(args):
     profile_url = URLUtils.build_profile_url(username)
     return profile_url, download_dir
 
+def show_cached_date_report(args, ui: UserInterface):
+    """
+    Responde --since/--until/--monthly desde el cache local: las fechas salen
+    de los status IDs, así que no hace falta abrir el navegador.
+    """
+    if args.name:
+        user_data = UserConfigManager.get_user_by_name(args.name)
+        if not user_data:
+            raise XDownloaderException(f"Usuario '{args.name}' no encontrado.")
+        username = user_data['username']
+    elif args.username:
+        username = args.username.lstrip('@')
+    else:
+        raise XDownloaderException("Indica --name o --username para consultar el cache.")
+
+    try:
+        since = parse_date_bound(args.since) if args.since else None
+        until = parse_date_bound(args.until, end=True) if args.until else None
+    except ValueError as e:
+        raise XDownloaderException(str(e))
+
+    index = CacheManager().time_index(username)
+    ui.show_date_report(format_date_report(index, username, since, until, monthly=args.monthly))
+
 async def main():
     """
     Función principal que orquesta la aplicación.
@@ -69,6 +96,11 @@ async def main():
             UserConfigManager.list_configured_users()
             return
 
+        # Consultas por fecha sobre el cache local (sin navegador)
+        if args.monthly or args.since or args.until:
+            show_cached_date_report(args, ui)
+            return
+
         # 3. Configurar usuario y directorios
         profile_url, download_dir = setup_user_config(args)
 
@@ -84,13 +116,14 @@ async def main():
         # 6. Mostrar info y confirmar
         ui.show_welcome_message(profile_url, use_auto, use_main, url_limit)
         # Auto-confirmar si se proporcionaron argumentos específicos
-        auto_confirm = args.username or args.name or args.directory or args.limit != 100
+        auto_confirm = args.username or args.name or args.directory or args.limit != 100 or args.incremental or args.pipeline
         if not ui.confirm_execution(auto_confirm):
             return
 
         # 7. Ejecutar descarga
         downloader = EdgeXDownloader(download_dir)
-        stats = await downloader.download_with_edge(profile_url, use_auto, use_main, url_limit)
+        stats = await downloader.download_with_edge(profile_url, use_auto, use_main, url_limit, args.incremental,
+                                                    args.pipeline or PIPELINE_ENABLED)
         
         # 7. Mostrar resumen
         ui.show_completion_message(stats)
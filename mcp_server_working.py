@@ -22,6 +22,8 @@ try:
     from modules.utils.url_utils import URLUtils
     from modules.utils.logging import Logger
     from modules.core.exceptions import XDownloaderException
+    from modules.utils.cache_manager import CacheManager
+    from modules.utils.time_index import format_date_report, parse_date_bound
 
     MODULES_IMPORTED = True
 except ImportError as e:
@@ -51,7 +53,7 @@ except ImportError as e:
         def __init__(self, download_dir):
             self.download_dir = download_dir
 
-        async def download_with_edge(self, profile_url, use_auto, use_main, url_limit):
+        async def download_with_edge(self, profile_url, use_auto, use_main, url_limit, incremental=False):
             return {"message": "Funcionalidad de descarga no disponible"}
 
 
@@ -324,6 +326,7 @@ async def download_images_handler(arguments: Dict[str, Any]) -> str:
         username = arguments.get("username")
         limit = arguments.get("limit", 100)
         no_limit = arguments.get("no_limit", False)
+        incremental = arguments.get("incremental", False)
         directory = arguments.get("directory")
         mode = arguments.get("mode", "auto")
 
@@ -373,7 +376,7 @@ async def download_images_handler(arguments: Dict[str, Any]) -> str:
         try:
             downloader = EdgeXDownloader(download_dir)
             stats = await downloader.download_with_edge(
-                profile_url, use_auto, use_main, url_limit
+                profile_url, use_auto, use_main, url_limit, incremental
             )
 
             if isinstance(stats, dict) and "message" in stats:
@@ -458,6 +461,42 @@ async def system_status_handler(arguments: Dict[str, Any]) -> str:
         return f"❌ Error obteniendo estado del sistema: {str(e)}"
 
 
+async def media_by_date_handler(arguments: Dict[str, Any]) -> str:
+    """Consultar posts cacheados por rango de fechas o por mes (sin navegador)."""
+    try:
+        if not MODULES_IMPORTED:
+            return "❌ Módulos del downloader no disponibles"
+
+        name = arguments.get("name")
+        username = arguments.get("username")
+        if name:
+            user_data = UserConfigManager.get_user_by_name(name)
+            if not user_data:
+                return f"❌ Usuario '{name}' no encontrado. Usa 'manage_users' con acción 'list' para ver usuarios disponibles."
+            username = user_data["username"]
+        elif username:
+            username = username.lstrip("@")
+        else:
+            return "❌ Debes especificar 'name' (usuario configurado) o 'username' (username directo)"
+
+        try:
+            since = parse_date_bound(arguments["since"]) if arguments.get("since") else None
+            until = parse_date_bound(arguments["until"], end=True) if arguments.get("until") else None
+        except ValueError as e:
+            return f"❌ {str(e)}"
+
+        index = CacheManager().time_index(username)
+        return format_date_report(
+            index, username, since, until,
+            media_type=arguments.get("media_type"),
+            monthly=arguments.get("monthly", True),
+        )
+
+    except Exception as e:
+        logger.error(f"Error en media_by_date: {e}")
+        return f"❌ Error consultando el caché: {str(e)}"
+
+
 async def test_tool_handler(arguments: Dict[str, Any]) -> str:
     """Herramienta de prueba para verificar la conectividad."""
     message = arguments.get("message", "Prueba sin mensaje")
@@ -676,6 +715,11 @@ server.add_tool(
                 "description": "Procesar todos los posts sin límite",
                 "default": False,
             },
+            "incremental": {
+                "type": "boolean",
+                "description": "Sincronización incremental: detener el scroll al llegar a los posts ya archivados",
+                "default": False,
+            },
             "directory": {
                 "type": "string",
                 "description": "Directorio personalizado de descarga (opcional)",
@@ -699,6 +743,44 @@ server.add_tool(
     system_status_handler,
 )
 
+# Consultas por fecha sobre el caché local
+server.add_tool(
+    "media_by_date",
+    "Cuenta los posts con medios ya cacheados de un usuario por rango de fechas y por mes, sin abrir el navegador",
+    {
+        "type": "object",
+        "properties": {
+            "name": {
+                "type": "string",
+                "description": "Nombre amigable del usuario configurado",
+            },
+            "username": {
+                "type": "string",
+                "description": "Username directo de X (con o sin @)",
+            },
+            "since": {
+                "type": "string",
+                "description": "Fecha inicial YYYY, YYYY-MM o YYYY-MM-DD (UTC, opcional)",
+            },
+            "until": {
+                "type": "string",
+                "description": "Fecha final incluida YYYY, YYYY-MM o YYYY-MM-DD (UTC, opcional)",
+            },
+            "media_type": {
+                "type": "string",
+                "enum": ["image", "video"],
+                "description": "Filtrar por tipo de medio (opcional)",
+            },
+            "monthly": {
+                "type": "boolean",
+                "description": "Incluir desglose por mes",
+                "default": True,
+            },
+        },
+    },
+    media_by_date_handler,
+)
+
 # Herramienta administrativa
 server.add_tool(
     "admin_tool",
@@ -722,6 +804,8 @@ async def video_downloader_handler(arguments: Dict[str, Any]) -> str:
         name = arguments.get("name")
         limit = arguments.get("limit")
         mode = arguments.get("mode", "download_all")
+        since = arguments.get("since")
+        until = arguments.get("until")
 
         if not name:
             return "❌ Debes especificar el nombre del usuario (name)"
@@ -738,6 +822,10 @@ async def video_downloader_handler(arguments: Dict[str, Any]) -> str:
 
         if limit:
             cmd.extend(["--limit", str(limit)])
+        if since:
+            cmd.extend(["--since", since])
+        if until:
+            cmd.extend(["--until", until])
 
         logger.info(f"Ejecutando descarga de videos: {' '.join(cmd)}")
 
@@ -792,6 +880,14 @@ server.add_tool(
                 "description": "Límite de videos a procesar (opcional)",
                 "minimum": 1,
             },
+            "since": {
+                "type": "string",
+                "description": "Solo videos publicados desde YYYY[-MM[-DD]] (UTC, opcional)",
+            },
+            "until": {
+                "type": "string",
+                "description": "Solo videos publicados hasta YYYY[-MM[-DD]] incluida (UTC, opcional)",
+            },
         },
         "required": ["name"],
     },
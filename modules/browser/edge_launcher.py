@@ -9,9 +9,10 @@ class EdgeLauncher:
     Gestiona el ciclo de vida del navegador Edge, incluyendo su lanzamiento
     con un perfil específico y su cierre.
     """
-    def __init__(self, use_automation_profile: bool = True, use_main_profile: bool = False):
+    def __init__(self, use_automation_profile: bool = True, use_main_profile: bool = False, request_policy=None):
         self.use_automation_profile = use_automation_profile
         self.use_main_profile = use_main_profile
+        self.request_policy = request_policy  # RequestPolicy aplicada a todas las páginas del contexto
         self.playwright = None
         self.browser = None
 
@@ -27,6 +28,8 @@ class EdgeLauncher:
             headless=False,
             **context_options
         )
+        if self.request_policy:
+            await self.request_policy.install(self.browser)
         return self.browser
 
     def _get_browser_context_options(self) -> dict:
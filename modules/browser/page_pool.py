@@ -0,0 +1,148 @@
+"""
+Módulo con un pool de páginas reutilizables dentro del mismo BrowserContext.
+
+Permite resolver varios status en paralelo (cookies y sesión compartidas) con
+un tope de concurrencia y un presupuesto de peticiones por host, para que el
+paralelismo no aumente el ritmo de navegaciones hacia x.com.
+"""
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..config.constants import STATUS_PAGE_POOL_SIZE, STATUS_REQUESTS_PER_MINUTE
+from ..utils.logging import Logger
+
+
+class HostBudget:
+    """
+    Reparte las peticiones a cada host en el tiempo: como mucho
+    requests_per_minute, con un intervalo mínimo entre dos peticiones.
+    `jitter` añade hasta esa fracción del intervalo como variación orgánica.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float], jitter: float = 0.0):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self.jitter = jitter
+        self.requests: Dict[str, int] = {}
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, url: str):
+        """Espera el turno del host de `url` y lo reserva."""
+        host = urlparse(url).hostname or url
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.interval * (1 + random.uniform(0, self.jitter))
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        self.requests[host] = self.requests.get(host, 0) + 1
+
+
+class PagePool:
+    """
+    Pool de hasta `size` páginas del contexto, creadas bajo demanda y
+    reutilizadas entre status. Las páginas se cierran al salir del pool.
+
+    Uso:
+        async with PagePool(page.context, size=3) as pool:
+            async for item, result in pool.imap(items, worker):
+                ...  # resultados en el orden de `items`
+    """
+
+    def __init__(self, context, size: int = STATUS_PAGE_POOL_SIZE, max_concurrency: Optional[int] = None,
+                 requests_per_minute: Optional[float] = STATUS_REQUESTS_PER_MINUTE, jitter: float = 0.3,
+                 page_setup: Optional[Callable[[Any], Awaitable[None]]] = None):
+        self.context = context
+        self.size = max(1, size)
+        self.max_concurrency = max(1, min(self.size, max_concurrency or self.size))
+        self.budget = HostBudget(requests_per_minute, jitter)
+        self.page_setup = page_setup  # Configuración de cada página nueva (p. ej. rutas)
+        self._pages: List[Any] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._creating = 0
+
+    async def __aenter__(self) -> "PagePool":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def _acquire_page(self):
+        while True:
+            if self._idle.empty() and len(self._pages) + self._creating < self.size:
+                self._creating += 1
+                try:
+                    page = await self.context.new_page()
+                    if self.page_setup:
+                        await self.page_setup(page)
+                finally:
+                    self._creating -= 1
+                self._pages.append(page)
+                return page
+            page = await self._idle.get()
+            if page is None:
+                continue  # Se liberó hueco para crear otra página
+            if not page.is_closed():
+                return page
+            self._pages.remove(page)
+
+    def _release_page(self, page):
+        if page.is_closed():
+            # Página cerrada (p. ej. crash): se descarta y se despierta a quien espere
+            if page in self._pages:
+                self._pages.remove(page)
+            self._idle.put_nowait(None)
+            return
+        self._idle.put_nowait(page)
+
+    async def goto(self, page, url: str, **kwargs):
+        """page.goto respetando el presupuesto de peticiones del host."""
+        await self.budget.acquire(url)
+        return await page.goto(url, **kwargs)
+
+    async def run(self, worker: Callable[[Any, Any], Awaitable[Any]], item: Any) -> Any:
+        """Ejecuta worker(page, item) con una página del pool."""
+        page = await self._acquire_page()
+        try:
+            return await worker(page, item)
+        finally:
+            self._release_page(page)
+
+    async def imap(self, items: List[Any], worker: Callable[[Any, Any], Awaitable[Any]]
+                   ) -> AsyncIterator[Tuple[Any, Any]]:
+        """
+        Ejecuta worker(page, item) para cada item con max_concurrency tareas a la
+        vez y entrega (item, resultado) en el orden de entrada en cuanto cada
+        prefijo está listo. Si el worker lanza una excepción, el resultado es la excepción.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(item):
+            async with semaphore:
+                return await self.run(worker, item)
+
+        tasks = [asyncio.ensure_future(bounded(item)) for item in items]
+        try:
+            for item, task in zip(items, tasks):
+                try:
+                    result = await task
+                except Exception as e:
+                    result = e
+                yield item, result
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def close(self):
+        """Cierra las páginas creadas por el pool."""
+        for page in self._pages:
+            try:
+                if not page.is_closed():
+                    await page.close()
+            except Exception as e:
+                Logger.warning(f"   ⚠️  Error cerrando página del pool: {e}")
+        self._pages.clear()
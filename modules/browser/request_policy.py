@@ -0,0 +1,93 @@
+"""
+Módulo con la política de peticiones del navegador durante la extracción.
+
+El extractor solo lee atributos del DOM (img.src, enlaces de status) y las
+respuestas GraphQL del timeline, pero el navegador descarga además segmentos
+de video, fuentes, telemetría y las imágenes a tamaño completo. La política se
+instala con route() sobre el contexto (también cubre las páginas del PagePool)
+y aborta esas peticiones; las etiquetas <img> conservan su src aunque se
+bloquee el cuerpo de la imagen.
+
+Nota: con rutas activas Chromium desactiva la caché HTTP del contexto; el
+benchmark test_files/bench_request_policy.py mide el balance en bytes.
+"""
+from typing import Dict, Optional
+
+from ..config.constants import REQUEST_POLICY
+from ..utils.logging import Logger
+
+# Fragmentos de URL de telemetría y anuncios que la extracción nunca necesita
+TRACKING_PATTERNS = (
+    "/jot/", "client_event", "/i/api/1.1/keyregistry", "/scribe",
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net",
+    "ads-twitter.com", "ads-api.twitter.com", "analytics.twitter.com",
+)
+VIDEO_HOSTS = ("video.twimg.com",)
+VIDEO_EXTENSIONS = (".m4s", ".ts", ".mp4", ".m3u8", ".webm")
+
+
+class RequestPolicy:
+    """
+    Decide qué peticiones se abortan por categoría: 'video' (segmentos y
+    manifiestos de video), 'font', 'tracking' e 'image' (cuerpos de imagen,
+    desactivado por defecto). Cuenta lo bloqueado para el resumen.
+    """
+
+    def __init__(self, block_video: bool = True, block_fonts: bool = True, block_tracking: bool = True,
+                 block_images: bool = False):
+        self.enabled = {
+            "video": block_video,
+            "font": block_fonts,
+            "tracking": block_tracking,
+            "image": block_images,
+        }
+        self.blocked: Dict[str, int] = {category: 0 for category in self.enabled}
+
+    @classmethod
+    def from_config(cls, overrides: Optional[Dict[str, bool]] = None) -> "RequestPolicy":
+        """Crea la política a partir de REQUEST_POLICY (y de los valores indicados)."""
+        config = {**REQUEST_POLICY, **(overrides or {})}
+        return cls(block_video=config["video"], block_fonts=config["font"],
+                   block_tracking=config["tracking"], block_images=config["image"])
+
+    @property
+    def active(self) -> bool:
+        return any(self.enabled.values())
+
+    def classify(self, url: str, resource_type: str) -> Optional[str]:
+        """Categoría bloqueable de la petición, o None si debe continuar."""
+        path = url.split("?", 1)[0].lower()
+        if resource_type == "media" or (any(host in path for host in VIDEO_HOSTS) and path.endswith(VIDEO_EXTENSIONS)):
+            return "video"
+        if resource_type == "font":
+            return "font"
+        if any(pattern in url for pattern in TRACKING_PATTERNS):
+            return "tracking"
+        if resource_type == "image":
+            return "image"
+        return None
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        category = self.classify(url, resource_type)
+        return category is not None and self.enabled[category]
+
+    async def install(self, target):
+        """Instala la política en una página o un BrowserContext."""
+        if not self.active:
+            return
+        await target.route("**/*", self._handle_route)
+        categories = ", ".join(name for name, enabled in self.enabled.items() if enabled)
+        Logger.info(f"🚦 Política de peticiones activa: se bloquean {categories}")
+
+    async def _handle_route(self, route):
+        request = route.request
+        category = self.classify(request.url, request.resource_type)
+        if category is not None and self.enabled[category]:
+            self.blocked[category] += 1
+            await route.abort("blockedbyclient")
+        else:
+            await route.continue_()
+
+    def summary(self) -> str:
+        """Resumen de las peticiones bloqueadas por categoría."""
+        return ", ".join(f"{name}: {count}" for name, count in self.blocked.items() if self.enabled[name])
@@ -38,6 +38,15 @@ class ArgumentParser:
                                 help='Límite de URLs totales a procesar (por defecto: 100, usar 0 para sin límite)')
         self.parser.add_argument('--no-limit', action='store_true', 
                                 help='Procesar todas las URLs disponibles sin límite')
+        self.parser.add_argument('--incremental', '-i', action='store_true',
+                                help='Detener el scroll al llegar a los status ya archivados (marca de agua)')
+        self.parser.add_argument('--pipeline', action='store_true',
+                                help='Resolver y descargar imágenes mientras se hace scroll (etapas con colas)')
+
+        # Consultas por fecha sobre el cache local (sin navegador)
+        self.parser.add_argument('--since', help='Fecha inicial YYYY[-MM[-DD]] para consultar el cache local')
+        self.parser.add_argument('--until', help='Fecha final (incluida) YYYY[-MM[-DD]] para consultar el cache local')
+        self.parser.add_argument('--monthly', action='store_true', help='Mostrar posts cacheados por mes (sin navegador)')
 
     def _get_epilog(self) -> str:
         """Devuelve el texto de ayuda extendido para la CLI."""
@@ -47,6 +56,8 @@ Ejemplos de uso:
   python3 edge_x_downloader.py --name usuario1 --auto
   python3 edge_x_downloader.py --username milewskaja_nat --main-profile
   python3 edge_x_downloader.py --username milewskaja_nat --limit 50
+  python3 edge_x_downloader.py --name usuario1 --incremental
+  python3 edge_x_downloader.py --name usuario1 --monthly --since 2025-01
   python3 edge_x_downloader.py --list-users
   python3 edge_x_downloader.py --select
 
@@ -59,4 +70,11 @@ Modos de navegador:
 Opciones de descarga:
   --limit NUM       Limitar a NUM URLs totales (por defecto: 100, usar 0 para sin límite)
   --no-limit        Procesar todas las URLs disponibles sin límite
+  --incremental     Sincronización diaria: terminar al llegar a lo ya archivado
+  --pipeline        Solapar scroll, resolución y descarga (muestra el tiempo por etapa)
+
+Consultas del cache local (instantáneas, sin abrir el navegador):
+  --since FECHA     Desde FECHA (YYYY, YYYY-MM o YYYY-MM-DD, UTC)
+  --until FECHA     Hasta FECHA incluida
+  --monthly         Desglose de posts por mes
         """
\ No newline at end of file
@@ -67,12 +67,21 @@ class UserInterface:
 
     def show_completion_message(self, stats: dict):
         """Muestra el mensaje final cuando el proceso se completa."""
+        if "message" in stats:
+            Logger.warning(f"⚠️ {stats['message']}")
+            return
         Logger.info("\n" + "🏁 ¡Proceso completado!" + "🏁")
         Logger.success(f"Imágenes descargadas: {stats.get('downloaded', 0)}")
         Logger.info(f"Imágenes saltadas: {stats.get('skipped', 0)}")
         Logger.error(f"Errores: {stats.get('errors', 0)}")
         Logger.info("📊 Revisa el JSON generado para ver la clasificación completa de medios.")
 
+    def show_date_report(self, report: str):
+        """Muestra el informe por fechas del cache local."""
+        print("=" * 60)
+        print(report)
+        print("=" * 60)
+
     def show_error_diagnosis(self, error: Exception):
         """Muestra un diagnóstico basado en el tipo de error."""
         Logger.error(f"Ha ocurrido un error: {error}")
@@ -17,6 +17,14 @@ DEFAULT_HEADERS = {
 
 # Límites y timeouts por defecto
 MAX_SCROLLS_DEFAULT = 8  # Se ajusta dinámicamente según URLs necesarias
+INCREMENTAL_STOP_RUN = 5  # Status seguidos ya archivados (<= marca de agua) que terminan el scroll incremental
+# Ritmo del scroll: el siguiente paso se da cuando han llegado artículos nuevos
+# o ha pasado el intervalo mínimo, lo que ocurra más tarde
+SCROLL_MIN_INTERVAL = 1.5  # Segundos mínimos entre scrolls (limita el ritmo de peticiones)
+SCROLL_CONTENT_TIMEOUT = 10  # Segundos máximos esperando contenido nuevo tras un scroll
+SCROLL_END_STABLE_MS = 2000  # Sin loader y sin crecer la página durante este tiempo = fin del timeline
+SCROLL_SETTLE_MS = 600  # Calma tras un paso que solo recorrió contenido ya visto
+SCROLL_STEP_RATIO = 0.7  # Fracción de la altura de la ventana por scroll
 DOWNLOAD_TIMEOUT = 30
 LOGIN_TIMEOUT = 300  # 5 minutos
 
@@ -33,4 +41,53 @@ VIDEO_PATTERNS = [
     r'format=mp4'
 ]
 
-IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
\ No newline at end of file
+IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+
+# Cache de posts procesados
+CACHE_BACKEND = "json"  # 'json' (un archivo por usuario) o 'sqlite' (cache/cache.db en modo WAL)
+CACHE_SQLITE_FILENAME = "cache.db"
+CACHE_JOURNAL_COMPACT_THRESHOLD = 1000  # Entradas del journal JSONL antes de compactar en el snapshot
+CACHE_SNAPSHOT_FORMAT = "json"  # 'json' (legible) o 'binary' (snapshot compacto .snap, ver cache_snapshot)
+# TTL por tipo de entrada del cache en días (None = no expira nunca).
+# Los mapeos status -> media son inmutables; los resultados negativos sí caducan.
+CACHE_ENTRY_TTL_DAYS = {
+    "image": None,
+    "video": None,
+    "negative": 3,  # Solo entradas negativas antiguas, sin calendario de reintentos
+}
+# Reintentos de los status que no dieron imágenes (borrados, con restricción de
+# edad, sin media...): el intento n espera base · 2^(n-1) horas, con tope.
+# Los errores de navegación suelen ser transitorios y empiezan con menos espera.
+CACHE_NEGATIVE_RETRY_BASE_HOURS = {
+    "no_images": 12,
+    "unavailable": 24,
+    "navigation_error": 1,
+}
+CACHE_NEGATIVE_RETRY_MAX_DAYS = 30
+CACHE_REVALIDATION_BATCH = 20  # Máximo de entradas caducadas a revalidar por ejecución
+CACHE_CHECKPOINT_INTERVAL = 10  # Status resueltos en el Método 2 entre checkpoints durables
+STATUS_PAGE_POOL_SIZE = 3  # Páginas en paralelo para resolver status en el Método 2
+STATUS_REQUESTS_PER_MINUTE = 40  # Presupuesto de navegaciones por host entre todas las páginas del pool
+
+# Pipeline scroll -> resolución -> descarga con colas acotadas (ver modules/core/pipeline, --pipeline)
+PIPELINE_ENABLED = False
+PIPELINE_STATUS_QUEUE_SIZE = 4  # Lotes de status (uno por scroll) pendientes de resolver
+PIPELINE_DOWNLOAD_QUEUE_SIZE = 50  # Imágenes resueltas pendientes de descargar
+PIPELINE_RESOLVE_BATCH = 20  # Máximo de status que se resuelven juntos
+PIPELINE_DOWNLOAD_WORKERS = 3  # Descargas simultáneas
+
+# Status extraídos del timeline (ver modules/extraction/status_store): por encima
+# del umbral los registros más antiguos se vuelcan a un archivo temporal por bloques
+STATUS_STORE_SPILL_THRESHOLD = 5000
+STATUS_STORE_CHUNK_SIZE = 1000
+STATUS_CONVERSION_BATCH = 1000  # Status de imagen que se convierten y descargan juntos sin --pipeline
+
+# Peticiones que el navegador aborta durante la extracción (ver request_policy).
+# 'image' bloquea los cuerpos de imagen: el DOM conserva los src, pero la vista
+# del navegador queda sin imágenes.
+REQUEST_POLICY = {
+    "video": True,
+    "font": True,
+    "tracking": True,
+    "image": False,
+}
@@ -2,18 +2,23 @@
 Módulo del orquestador principal que coordina todo el flujo de trabajo.
 """
 import requests
+from itertools import islice
 from pathlib import Path
 from ..utils.logging import Logger
 from ..utils.file_utils import FileUtils
+from ..utils.file_lock import RunLease
 from ..browser.edge_launcher import EdgeLauncher
+from ..browser.request_policy import RequestPolicy
 from ..browser.navigation import NavigationManager
 from ..browser.login_handler import LoginHandler
 from ..extraction.url_extractor import URLExtractor
 from ..extraction.scroll_manager import ScrollManager
 from ..extraction.image_processor import ImageProcessor
+from ..extraction.timeline_response_collector import TimelineResponseCollector
 from ..download.image_downloader import ImageDownloader
 from ..download.download_manager import DownloadManager
-from ..config.constants import DEFAULT_HEADERS
+from .pipeline import MediaPipeline
+from ..config.constants import DEFAULT_HEADERS, PIPELINE_ENABLED
 
 class EdgeXDownloader:
     """
@@ -56,7 +61,8 @@ class EdgeXDownloader:
         Logger.info("Para videos usa: x_video_url_extractor.py")
         print()
 
-    async def download_with_edge(self, profile_url: str, use_automation_profile: bool, use_main_profile: bool, url_limit: int = 100):
+    async def download_with_edge(self, profile_url: str, use_automation_profile: bool, use_main_profile: bool,
+                                 url_limit: int = 100, incremental: bool = False, pipeline: bool = PIPELINE_ENABLED):
         """
         Ejecuta el flujo de trabajo completo de descarga.
         
@@ -65,12 +71,32 @@ class EdgeXDownloader:
             use_automation_profile: Si usar perfil de automatización
             use_main_profile: Si usar perfil principal
             url_limit: Límite de URLs nuevas a procesar (100 por defecto, None para sin límite)
+            incremental: Detener el scroll al llegar a la marca de agua del usuario
+            pipeline: Resolver y descargar mientras se hace scroll (ver modules/core/pipeline)
         """
         self.print_info()
         
-        launcher = EdgeLauncher(use_automation_profile, use_main_profile)
+        # Extraer username de la URL para el cache
+        username = self._extract_username_from_url(profile_url)
+        
+        from ..utils.cache_manager import CacheManager
+        cache_manager = CacheManager()
+        
+        # Una sola ejecución por usuario: una segunda se rechaza antes de abrir el navegador
+        lease = RunLease(cache_manager.cache_dir, username)
+        if not lease.acquire():
+            message = f"Ya hay una ejecución en curso para @{username}: {lease.describe_holder()}"
+            Logger.warning(f"🔒 {message}")
+            return {"message": message}
+        
         stats = {}
+        launcher = None
+        url_extractor = None
+        attached_page = None  # Página en la que escucha response_collector
         try:
+            # Dentro del try: si fallan, el lease se libera igualmente (el servidor MCP sigue vivo)
+            request_policy = RequestPolicy.from_config()
+            launcher = EdgeLauncher(use_automation_profile, use_main_profile, request_policy=request_policy)
             browser = await launcher.launch_browser()
             page = browser.pages[0] if browser.pages else await browser.new_page()
 
@@ -80,71 +106,44 @@ class EdgeXDownloader:
             url_extractor = URLExtractor(page)
             scroll_manager = ScrollManager(page, url_extractor)
             image_processor = ImageProcessor(page)
+            response_collector = TimelineResponseCollector()
+            image_processor.set_response_collector(response_collector)
             image_downloader = ImageDownloader(self.session, self.download_dir)
             download_manager = DownloadManager(image_downloader, self.download_dir)
 
+            # Las respuestas del timeline se escuchan desde la primera carga del perfil
+            response_collector.attach(page)
+            attached_page = page
+
             # Flujo de trabajo (igual que la versión original)
             await nav_manager.navigate_to_url(profile_url)
             await login_handler.check_and_handle_login(profile_url)
             
-            # Extraer username de la URL para el cache
-            username = self._extract_username_from_url(profile_url)
             Logger.info(f"🔍 Procesando usuario: @{username}")
             
             # Configurar cache para el scroll manager y URL extractor
-            from ..utils.cache_manager import CacheManager
-            cache_manager = CacheManager()
             scroll_manager.set_cache_info(cache_manager, username)
             url_extractor.set_cache_info(cache_manager, username)
+            image_processor.set_cache_info(cache_manager, username)
             
-            # Mostrar información sobre el límite
-            if url_limit is not None:
-                Logger.info(f"⚡ Límite de URLs nuevas configurado: {url_limit}")
-            else:
-                Logger.info("⚡ Sin límite - procesando todas las URLs disponibles")
-            
-            # Configurar un límite alto de scrolls para permitir explorar todo el contenido
-            # El scroll se detendrá cuando:
-            # 1. Se encuentre el número de URLs nuevas solicitado, O
-            # 2. No haya más contenido para cargar (determinado por ScrollManager)
-            max_scrolls = 100  # Límite alto para permitir explorar todo el contenido disponible
-            
-            # Hacer scroll hasta encontrar las URLs nuevas necesarias
-            await scroll_manager.scroll_and_extract(max_scrolls, url_limit)
-            
-            # Mostrar resumen de extracción como en la versión original
-            videos = [item for item in url_extractor.all_status_urls if item.get('media_type') == 'video']
-            images_status = [item for item in url_extractor.all_status_urls if item.get('media_type') == 'image']
+            # Sesión en memoria: el cache se lee una vez y se vuelca en cada checkpoint
+            async with cache_manager.session(username):
+                try:
+                    stats = await self._run_extraction_and_download(
+                        cache_manager, username, url_extractor, scroll_manager,
+                        image_processor, download_manager, url_limit, incremental, pipeline
+                    )
+                finally:
+                    # Si la ejecución falla, la revalidación en segundo plano no sigue escribiendo tras cerrar la sesión
+                    await image_processor.cancel_revalidation()
+            if request_policy.active:
+                Logger.info(f"🚦 Peticiones bloqueadas ({request_policy.summary()})")
             
-            Logger.success(f"📊 Resumen de extracción:")
-            Logger.info(f"   📹 Status URLs extraídas: {len(url_extractor.all_status_urls)}")
-            Logger.info(f"   📷 URLs de status de imágenes: {len(images_status)}")
-            Logger.info(f"   🎬 URLs de videos detectadas: {len(videos)}")
-            
-            # Mostrar información detallada de videos si los hay
-            if videos:
-                Logger.info(f"🎬 Videos detectados:")
-                for i, video in enumerate(videos[:3], 1):  # Mostrar primeros 3
-                    Logger.info(f"   📹 Video {i}: {video.get('url', '')}")
-                if len(videos) > 3:
-                    Logger.info(f"   ... y {len(videos) - 3} videos más")
-            
-            # Pasar el username y el límite al procesador de imágenes para el cache
-            image_urls, status_mapping = await image_processor.convert_status_to_image_urls(url_extractor.all_status_urls, username, url_limit)
-            
-            Logger.info(f"   📷 URLs de imágenes directas: {len(image_urls)}")
-            
-            # El download manager ahora descarga todas las URLs de imágenes que fueron procesadas
-            # (ya que el límite se aplicó en la fase de conversión)
-            stats = await download_manager.download_images_batch(image_urls, status_mapping=status_mapping)
-            
-            # Marcar en cache SOLO lo que realmente se procesó exitosamente
-            cache_manager.mark_downloaded_images(username, stats, str(self.download_dir))
-            cache_manager.mark_all_status_as_processed(username, url_extractor.all_status_urls)
+            video_count = url_extractor.all_status_urls.count('video')
 
             # Mostrar información de videos detectados como en la versión original
-            if videos:
-                Logger.warning(f"📹 Se detectaron {len(videos)} videos (no descargados automáticamente)")
+            if video_count:
+                Logger.warning(f"📹 Se detectaron {video_count} videos (no descargados automáticamente)")
                 Logger.info("💡 Para descargar videos usa: x_video_url_extractor.py")
                 Logger.info("🔗 URLs de videos guardadas en el JSON generado")
 
@@ -152,7 +151,104 @@ class EdgeXDownloader:
             await FileUtils.save_media_json(url_extractor.all_status_urls, self.download_dir, profile_url)
 
         finally:
-            if launcher:
-                await launcher.close_browser()
+            # También si la extracción falla: sin listener y sin archivos temporales del StatusStore
+            if attached_page is not None:
+                response_collector.detach(attached_page)
+            if url_extractor is not None:
+                url_extractor.all_status_urls.close()
+            try:
+                if launcher:
+                    await launcher.close_browser()
+            finally:
+                lease.release()
         
-        return stats
\ No newline at end of file
+        return stats
+
+    async def _run_extraction_and_download(self, cache_manager, username: str, url_extractor: URLExtractor,
+                                           scroll_manager: ScrollManager, image_processor: ImageProcessor,
+                                           download_manager: DownloadManager, url_limit: int = None,
+                                           incremental: bool = False, pipeline: bool = False) -> dict:
+        """
+        Ejecuta scroll, conversión, descarga y marcado en cache dentro de la
+        sesión de cache abierta por download_with_edge. Con `pipeline` las tres
+        primeras fases se solapan (MediaPipeline); si no, se ejecutan en orden.
+        """
+        # Mostrar información sobre el límite
+        if url_limit is not None:
+            Logger.info(f"⚡ Límite de URLs nuevas configurado: {url_limit}")
+        else:
+            Logger.info("⚡ Sin límite - procesando todas las URLs disponibles")
+
+        # Configurar un límite alto de scrolls para permitir explorar todo el contenido
+        # El scroll se detendrá cuando:
+        # 1. Se encuentre el número de URLs nuevas solicitado, O
+        # 2. No haya más contenido para cargar (determinado por ScrollManager)
+        max_scrolls = 100  # Límite alto para permitir explorar todo el contenido disponible
+
+        if pipeline:
+            media_pipeline = MediaPipeline(cache_manager, username, scroll_manager, image_processor, download_manager)
+            image_urls, status_mapping, stats = await media_pipeline.run(max_scrolls, url_limit, incremental)
+            cache_manager.checkpoint(username)
+            self._log_extraction_summary(url_extractor)
+            await self._annotate_videos(image_processor, url_extractor)
+            Logger.info(f"   📷 URLs de imágenes directas: {len(image_urls)}")
+        else:
+            # Hacer scroll hasta encontrar las URLs nuevas necesarias
+            await scroll_manager.scroll_and_extract(max_scrolls, url_limit, incremental)
+            cache_manager.checkpoint(username)
+            self._log_extraction_summary(url_extractor)
+            await self._annotate_videos(image_processor, url_extractor)
+
+            # Conversión y descarga por lotes leídos del StatusStore: la memoria no crece con el timeline
+            # (el límite de URLs nuevas se reparte entre lotes en la fase de conversión)
+            stats = download_manager.stats
+            total_images = 0
+            async for image_urls, status_mapping in image_processor.iter_image_batches(
+                    url_extractor.all_status_urls, username, url_limit):
+                cache_manager.checkpoint(username)
+                if image_urls:
+                    total_images += len(image_urls)
+                    stats = await download_manager.download_images_batch(image_urls, status_mapping=status_mapping)
+
+            Logger.info(f"   📷 URLs de imágenes directas: {total_images}")
+
+        # La revalidación de entradas caducadas corrió en paralelo a la descarga
+        await image_processor.wait_revalidation()
+
+        # Marcar en cache SOLO lo que realmente se procesó exitosamente
+        cache_manager.mark_downloaded_images(username, stats, str(self.download_dir))
+        cache_manager.mark_all_status_as_processed(username, url_extractor.all_status_urls)
+        cache_manager.checkpoint(username)
+
+        # La marca de agua solo avanza si el scroll cubrió el timeline sin huecos
+        if scroll_manager.can_advance_high_water_mark:
+            cache_manager.advance_high_water_mark(username, list(url_extractor.all_status_urls.status_ids()))
+        
+        return stats
+
+    def _log_extraction_summary(self, url_extractor: URLExtractor):
+        """Muestra el resumen de extracción como en la versión original."""
+        status_store = url_extractor.all_status_urls
+        video_count = status_store.count('video')
+
+        Logger.success(f"📊 Resumen de extracción:")
+        Logger.info(f"   📹 Status URLs extraídas: {len(status_store)}")
+        Logger.info(f"   📷 URLs de status de imágenes: {status_store.count('image')}")
+        Logger.info(f"   🎬 URLs de videos detectadas: {video_count}")
+
+        # Mostrar información detallada de videos si los hay
+        if video_count:
+            Logger.info(f"🎬 Videos detectados:")
+            for i, video in enumerate(islice(status_store.of_type('video'), 3), 1):  # Mostrar primeros 3
+                Logger.info(f"   📹 Video {i}: {video.get('url', '')}")
+            if video_count > 3:
+                Logger.info(f"   ... y {video_count - 3} videos más")
+
+    async def _annotate_videos(self, image_processor: ImageProcessor, url_extractor: URLExtractor):
+        """Variantes de video capturadas de la red (se guardan en el JSON de resultados)."""
+        response_collector = image_processor.response_collector
+        if response_collector:
+            await response_collector.wait_idle()
+            annotated = response_collector.annotate_videos(url_extractor.all_status_urls)
+            if annotated:
+                Logger.info(f"   🌐 {annotated} videos con variantes MP4 capturadas de las respuestas del timeline")
@@ -0,0 +1,206 @@
+"""
+Módulo con el pipeline por etapas scroll -> resolución -> descarga.
+
+En el flujo por fases de EdgeXDownloader la red y el disco esperan a que
+termine todo el scroll y el navegador espera a que terminen las descargas.
+Aquí cada lote de status que extrae el ScrollManager pasa a resolverse en
+cuanto aparece y cada imagen resuelta pasa a un pool de workers de descarga.
+Las colas entre etapas son acotadas: si la resolución o la descarga van por
+detrás, el scroll espera (back-pressure) en lugar de acumular trabajo.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+from ..config.constants import (PIPELINE_DOWNLOAD_QUEUE_SIZE, PIPELINE_DOWNLOAD_WORKERS, PIPELINE_RESOLVE_BATCH,
+                                PIPELINE_STATUS_QUEUE_SIZE)
+from ..utils.logging import Logger
+from ..utils.media_index import MediaURLSet
+
+_DONE = None  # Marca de fin en las colas
+
+
+class StageCounters:
+    """
+    Contadores de una etapa: elementos procesados, segundos trabajando,
+    segundos esperando entrada y segundos bloqueada por la cola de salida.
+    En la descarga los tiempos son la suma de todos los workers.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+
+    def describe(self) -> str:
+        return (f"{self.name}: {self.items} elementos, {self.busy:.1f} s activa, "
+                f"{self.starved:.1f} s sin entrada, {self.blocked:.1f} s bloqueada por la cola de salida")
+
+
+class MediaPipeline:
+    """
+    Ejecuta scroll, resolución de status a imágenes y descarga como etapas
+    concurrentes unidas por colas asyncio acotadas.
+
+    Uso:
+        pipeline = MediaPipeline(cache_manager, username, scroll_manager, image_processor, download_manager)
+        image_urls, status_mapping, stats = await pipeline.run(max_scrolls, url_limit, incremental)
+    """
+
+    def __init__(self, cache_manager, username: str, scroll_manager, image_processor, download_manager,
+                 status_queue_size: int = PIPELINE_STATUS_QUEUE_SIZE,
+                 download_queue_size: int = PIPELINE_DOWNLOAD_QUEUE_SIZE,
+                 resolve_batch: int = PIPELINE_RESOLVE_BATCH, download_workers: int = PIPELINE_DOWNLOAD_WORKERS):
+        self.cache_manager = cache_manager
+        self.username = username
+        self.scroll_manager = scroll_manager
+        self.image_processor = image_processor
+        self.download_manager = download_manager
+        self.status_queue_size = max(1, status_queue_size)
+        self.download_queue_size = max(1, download_queue_size)
+        self.resolve_batch = max(1, resolve_batch)
+        self.download_workers = max(1, download_workers)
+        self.counters = {
+            "scroll": StageCounters("scroll"),
+            "resolve": StageCounters("resolución"),
+            "download": StageCounters("descarga"),
+        }
+        self.image_urls = MediaURLSet()
+        self.status_mapping: Dict[str, str] = {}
+
+    async def run(self, max_scrolls: int, url_limit: Optional[int] = None,
+                  incremental: bool = False) -> Tuple[List[str], Dict[str, str], dict]:
+        """
+        Ejecuta las tres etapas hasta que el scroll termina y las colas se vacían.
+        Si una etapa falla, se cancelan las demás y se propaga el error.
+
+        Returns:
+            tuple: (image_urls en orden de resolución, {url: status_id}, estadísticas de descarga)
+        """
+        Logger.info(f"🧵 Pipeline activo: scroll -> resolución -> {self.download_workers} workers de descarga")
+        started = time.monotonic()
+        status_queue = asyncio.Queue(maxsize=self.status_queue_size)
+        download_queue = asyncio.Queue(maxsize=self.download_queue_size)
+        tasks = [
+            asyncio.ensure_future(self._scroll_stage(status_queue, max_scrolls, url_limit, incremental)),
+            asyncio.ensure_future(self._resolve_stage(status_queue, download_queue, url_limit)),
+        ] + [asyncio.ensure_future(self._download_worker(download_queue)) for _ in range(self.download_workers)]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.download_manager.report(len(self.image_urls))
+        self._log_counters(time.monotonic() - started)
+        return self.image_urls.urls(), self.status_mapping, self.download_manager.stats
+
+    async def _scroll_stage(self, status_queue: asyncio.Queue, max_scrolls: int, url_limit: Optional[int],
+                            incremental: bool):
+        """Etapa 1: cada lote de status nuevos del scroll va a la cola de resolución."""
+        counters = self.counters["scroll"]
+
+        async def emit(batch):
+            counters.items += len(batch)
+            wait_started = time.monotonic()
+            await status_queue.put(list(batch))
+            counters.blocked += time.monotonic() - wait_started
+
+        started = time.monotonic()
+        await self.scroll_manager.scroll_and_extract(max_scrolls, url_limit, incremental, on_new_statuses=emit)
+        counters.busy = time.monotonic() - started - counters.blocked
+        await status_queue.put(_DONE)
+
+    async def _resolve_stage(self, status_queue: asyncio.Queue, download_queue: asyncio.Queue,
+                             url_limit: Optional[int]):
+        """
+        Etapa 2: resuelve los status de imagen con ImageProcessor (cache y
+        métodos 0-3) y encola cada imagen nueva para descarga. Los lotes que
+        esperan en la cola se agrupan hasta resolve_batch status. El límite de
+        URLs nuevas se reparte entre lotes: lo que consume uno no lo tiene el siguiente.
+        Las imágenes sin status (fallback del DOM) se descargan al final, por si
+        un lote posterior las resuelve con su status y nombre único.
+        """
+        counters = self.counters["resolve"]
+        remaining = url_limit
+        unmapped = MediaURLSet()
+        finished = False
+        while not finished:
+            wait_started = time.monotonic()
+            batch = await status_queue.get()
+            counters.starved += time.monotonic() - wait_started
+            if batch is _DONE:
+                break
+            while len(batch) < self.resolve_batch and not status_queue.empty():
+                more = status_queue.get_nowait()
+                if more is _DONE:
+                    finished = True
+                    break
+                batch.extend(more)
+
+            image_items = [item for item in batch if item.get('media_type') == 'image']
+            if not image_items:
+                continue
+            uncached = self._count_uncached(image_items)
+
+            started = time.monotonic()
+            image_urls, status_mapping = await self.image_processor.convert_status_to_image_urls(
+                image_items, self.username, remaining
+            )
+            counters.busy += time.monotonic() - started
+            counters.items += len(image_items)
+            if remaining is not None:
+                remaining = max(0, remaining - uncached)
+
+            self.status_mapping.update(status_mapping)
+            for url in image_urls:
+                if url not in status_mapping:
+                    unmapped.add(url)
+                elif self.image_urls.add(url, status_mapping[url]):
+                    await self._enqueue(download_queue, url)
+
+        for url in unmapped:
+            if self.image_urls.add(url):
+                await self._enqueue(download_queue, url)
+        for _ in range(self.download_workers):
+            await download_queue.put(_DONE)
+
+    async def _enqueue(self, download_queue: asyncio.Queue, url: str):
+        wait_started = time.monotonic()
+        await download_queue.put(url)
+        self.counters["resolve"].blocked += time.monotonic() - wait_started
+
+    async def _download_worker(self, download_queue: asyncio.Queue):
+        """Etapa 3: descarga imágenes de la cola hasta recibir la marca de fin."""
+        counters = self.counters["download"]
+        while True:
+            wait_started = time.monotonic()
+            url = await download_queue.get()
+            counters.starved += time.monotonic() - wait_started
+            if url is _DONE:
+                return
+            started = time.monotonic()
+            result = await self.download_manager.download_image(url, self.status_mapping.get(url))
+            if result == 'downloaded':
+                await self.download_manager.organic_delay()
+            counters.busy += time.monotonic() - started
+            counters.items += 1
+
+    def _count_uncached(self, items: list) -> int:
+        """Status del lote que no están en cache (los que consumen límite de URLs nuevas)."""
+        if not self.cache_manager or not self.username:
+            return len(items)
+        return sum(
+            1 for item in items
+            if not self.cache_manager.is_status_cached(
+                self.username, item.get('status_id') or self.cache_manager._extract_status_id(item.get('url', ''))
+            )
+        )
+
+    def _log_counters(self, elapsed: float):
+        Logger.success(f"⏱️  Pipeline completado en {elapsed:.1f} s:")
+        for counters in self.counters.values():
+            Logger.info(f"   {counters.describe()}")
@@ -7,6 +7,7 @@ from pathlib import Path
 from ..utils.logging import Logger
 from .image_downloader import ImageDownloader
 from .filename_utils import FilenameUtils
+from .download_manifest import DownloadManifest, get_download_manifest, split_filename
 from ..config.constants import DOWNLOAD_TIMEOUT
 
 class DownloadManager:
@@ -14,9 +15,11 @@ class DownloadManager:
     Orquesta la descarga de un lote de imágenes, manejando límites,
     progreso, y reportes.
     """
-    def __init__(self, image_downloader: ImageDownloader, download_dir: Path):
+    def __init__(self, image_downloader: ImageDownloader, download_dir: Path, manifest: DownloadManifest = None):
         self.image_downloader = image_downloader
         self.download_dir = download_dir
+        # Archivos ya presentes en el directorio (un solo scandir, ver download_manifest)
+        self.manifest = manifest or get_download_manifest(download_dir)
         self.stats = {'downloaded': 0, 'skipped': 0, 'errors': 0}
 
     async def download_images_batch(self, urls: list[str], max_images: int = None, status_mapping: dict = None):
@@ -40,40 +43,75 @@ class DownloadManager:
         for i, url in enumerate(download_urls, 1):
             # Obtener status_id si está disponible en el mapeo
             status_id = status_mapping.get(url) if status_mapping else None
-            
-            filename = FilenameUtils.clean_filename(url, status_id)
-            file_path = self.download_dir / filename
-            
-            # Debug: mostrar cuando se preserva el nombre original 
-            if 'pbs.twimg.com' in url and not filename.startswith('image_'):
-                original_name = filename.split('-')[-1].replace('.jpg', '') if status_id else filename.replace('.jpg', '')
-                if status_id:
-                    Logger.info(f"Nombre único: {status_id}-{original_name}")
-                else:
-                    Logger.info(f"Preservando nombre original: {original_name}")
-            
-            Logger.progress(i, len(download_urls), f"Descargando {filename}")
-
-            if file_path.exists():
-                Logger.info(f"⏭️  '{filename}' ya existe, saltando.")
-                self.stats['skipped'] += 1
-                continue
-
-            try:
-                await asyncio.to_thread(self.image_downloader.download_image, url, filename)
-                self.stats['downloaded'] += 1
+            result = await self.download_image(url, status_id, i, len(download_urls))
+            if result == 'downloaded':
                 await self._add_organic_delay(i, len(download_urls))
-            except Exception as e:
-                Logger.error(f"Error procesando {filename}: {e}")
-                self.stats['errors'] += 1
         
         self._generate_download_report(len(urls), max_images)
         return self.stats
 
+    async def download_image(self, url: str, status_id: str = None, index: int = None, total: int = None) -> str:
+        """
+        Descarga una imagen (o la salta si ya está en el directorio) y actualiza
+        las estadísticas. La usan el lote secuencial y los workers del pipeline.
+        
+        Returns:
+            'downloaded', 'skipped' o 'error'
+        """
+        filename = FilenameUtils.clean_filename(url, status_id)
+        
+        # Debug: mostrar cuando se preserva el nombre original 
+        if 'pbs.twimg.com' in url and not filename.startswith('image_'):
+            original_name = filename.split('-')[-1].replace('.jpg', '') if status_id else filename.replace('.jpg', '')
+            if status_id:
+                Logger.info(f"Nombre único: {status_id}-{original_name}")
+            else:
+                Logger.info(f"Preservando nombre original: {original_name}")
+        
+        if index is not None and total is not None:
+            Logger.progress(index, total, f"Descargando {filename}")
+        else:
+            Logger.info(f"Descargando {filename}")
+
+        existing = self._find_existing(filename)
+        if existing:
+            Logger.info(f"⏭️  '{existing}' ya existe, saltando.")
+            self.stats['skipped'] += 1
+            return 'skipped'
+
+        try:
+            size = await asyncio.to_thread(self.image_downloader.download_image, url, filename)
+            self.manifest.add(filename, size)
+            self.stats['downloaded'] += 1
+            return 'downloaded'
+        except Exception as e:
+            Logger.error(f"Error procesando {filename}: {e}")
+            self.stats['errors'] += 1
+            return 'error'
+
+    def report(self, total_found: int):
+        """Muestra el resumen de descarga (para descargas hechas imagen a imagen)."""
+        self._generate_download_report(total_found)
+
+    def _find_existing(self, filename: str) -> str:
+        """
+        Nombre del archivo ya descargado para esta imagen ('' si no existe): el
+        mismo nombre o la misma media key guardada con otro prefijo de status.
+        """
+        if self.manifest.has_file(filename):
+            return filename
+        status_id, media_key = split_filename(filename)
+        entry = self.manifest.find(media_key, status_id)
+        return entry.filename if entry else ''
+
     async def _add_organic_delay(self, current_index: int, total_items: int):
         """Añade un pequeño delay entre descargas para no saturar el servidor."""
         if current_index < total_items:
-            await asyncio.sleep(random.uniform(0.3, 0.8))
+            await self.organic_delay()
+
+    async def organic_delay(self):
+        """Pausa breve entre dos descargas (también entre las de cada worker del pipeline)."""
+        await asyncio.sleep(random.uniform(0.3, 0.8))
 
     def _generate_download_report(self, total_found: int, limit: int = None):
         """Muestra un resumen detallado al finalizar las descargas como en la versión v0.1.5."""
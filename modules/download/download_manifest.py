@@ -0,0 +1,156 @@
+"""
+Módulo con el manifiesto de archivos de un directorio de descarga.
+
+El directorio se recorre una sola vez con os.scandir (una llamada al sistema
+por bloque de entradas en lugar de un stat por archivo) y después el
+manifiesto se actualiza con cada descarga. Así comprobar si una imagen ya
+está descargada es una consulta en memoria, incluso en discos externos lentos.
+
+Los archivos se indexan por nombre y por media key: los nombres que genera
+FilenameUtils.clean_filename son {status_id}-{media_key}.jpg (o {media_key}.jpg
+sin status), de modo que una imagen se encuentra aunque se haya guardado con
+otro prefijo de status.
+"""
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional
+
+from ..config.constants import IMAGE_EXTENSIONS
+
+_STATUS_PREFIX = re.compile(r"^(\d+)-(.+)$")
+
+
+class ManifestEntry(NamedTuple):
+    filename: str
+    size: int
+    mtime: float
+
+
+def split_filename(filename: str) -> tuple[Optional[str], str]:
+    """Separa un nombre de descarga en (status_id, media_key). status_id es None sin prefijo."""
+    stem = os.path.splitext(filename)[0]
+    match = _STATUS_PREFIX.match(stem)
+    if match:
+        return match.group(1), match.group(2)
+    return None, stem
+
+
+class DownloadManifest:
+    """
+    Índice en memoria media key -> archivos descargados de un directorio.
+    Los archivos vacíos (descargas interrumpidas) no cuentan como descargados.
+    """
+
+    def __init__(self, download_dir: Path):
+        self.download_dir = Path(download_dir)
+        self._files: Dict[str, ManifestEntry] = {}
+        self._by_key: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self._scanned = False
+
+    def _ensure_scanned(self):
+        if not self._scanned:
+            self.refresh()
+
+    def refresh(self):
+        """Reconstruye el manifiesto con una única pasada de os.scandir."""
+        files: Dict[str, ManifestEntry] = {}
+        try:
+            with os.scandir(self.download_dir) as entries:
+                for entry in entries:
+                    if os.path.splitext(entry.name)[1].lower() not in IMAGE_EXTENSIONS:
+                        continue
+                    try:
+                        if not entry.is_file():
+                            continue
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    files[entry.name] = ManifestEntry(entry.name, stat.st_size, stat.st_mtime)
+        except FileNotFoundError:
+            pass
+
+        by_key: Dict[str, List[str]] = {}
+        for filename in files:
+            by_key.setdefault(split_filename(filename)[1], []).append(filename)
+        with self._lock:
+            self._files, self._by_key = files, by_key
+            self._scanned = True
+
+    def __len__(self) -> int:
+        self._ensure_scanned()
+        return len(self._files)
+
+    def get(self, filename: str) -> Optional[ManifestEntry]:
+        """Entrada del archivo si existe en el directorio."""
+        self._ensure_scanned()
+        return self._files.get(filename)
+
+    def has_file(self, filename: str) -> bool:
+        """Indica si el archivo ya está descargado (existe y no está vacío)."""
+        entry = self.get(filename)
+        return entry is not None and entry.size > 0
+
+    def find(self, media_key: str, status_id: Optional[str] = None) -> Optional[ManifestEntry]:
+        """
+        Busca la imagen de una media key: primero {status_id}-{media_key}.*,
+        luego {media_key}.* y por último cualquier archivo con esa media key.
+        """
+        self._ensure_scanned()
+        candidates = [self._files[name] for name in self._by_key.get(media_key, ())]
+        candidates = [entry for entry in candidates if entry.size > 0]
+        if not candidates:
+            return None
+
+        def rank(entry: ManifestEntry) -> int:
+            prefix = split_filename(entry.filename)[0]
+            if status_id and prefix == str(status_id):
+                return 0
+            return 1 if prefix is None else 2
+
+        return min(candidates, key=rank)
+
+    def add(self, filename: str, size: Optional[int] = None):
+        """Registra un archivo recién descargado (un solo stat si no se conoce el tamaño)."""
+        self._ensure_scanned()
+        if size is None:
+            try:
+                size = (self.download_dir / filename).stat().st_size
+            except OSError:
+                return
+        entry = ManifestEntry(filename, size, time.time())
+        with self._lock:
+            if filename not in self._files:
+                self._by_key.setdefault(split_filename(filename)[1], []).append(filename)
+            self._files[filename] = entry
+
+    def remove(self, filename: str):
+        """Quita un archivo del manifiesto (p. ej. tras borrarlo)."""
+        self._ensure_scanned()
+        with self._lock:
+            if self._files.pop(filename, None) is None:
+                return
+            media_key = split_filename(filename)[1]
+            names = self._by_key.get(media_key, [])
+            if filename in names:
+                names.remove(filename)
+            if not names:
+                self._by_key.pop(media_key, None)
+
+
+_registry: Dict[str, DownloadManifest] = {}
+_registry_lock = threading.Lock()
+
+
+def get_download_manifest(download_dir: Path) -> DownloadManifest:
+    """Manifiesto compartido del proceso para un directorio de descarga."""
+    key = os.path.abspath(os.path.expanduser(str(download_dir)))
+    with _registry_lock:
+        manifest = _registry.get(key)
+        if manifest is None:
+            manifest = DownloadManifest(Path(key))
+            _registry[key] = manifest
+    return manifest
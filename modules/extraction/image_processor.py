@@ -3,10 +3,15 @@ Módulo para procesar URLs de status y convertirlas en URLs de imágenes directa
 """
 import asyncio
 import random
+from itertools import islice
 from playwright.async_api import Page
 from ..utils.logging import Logger
 from ..utils.url_utils import URLUtils
 from ..utils.cache_manager import CacheManager
+from ..utils.media_index import MediaURLSet, media_key_for
+from ..browser.page_pool import PagePool
+from ..config.constants import (CACHE_CHECKPOINT_INTERVAL, CACHE_REVALIDATION_BATCH, STATUS_CONVERSION_BATCH,
+                                STATUS_PAGE_POOL_SIZE, STATUS_REQUESTS_PER_MINUTE)
 
 class ImageProcessor:
     """
@@ -18,12 +23,71 @@ class ImageProcessor:
         self.processed_image_urls: set[str] = set()
         self.username = None
         self.cache_manager = None
+        self.checkpoint_interval = CACHE_CHECKPOINT_INTERVAL
+        # Método 2: páginas en paralelo y presupuesto de navegaciones por host
+        self.page_pool_size = STATUS_PAGE_POOL_SIZE
+        self.requests_per_minute = STATUS_REQUESTS_PER_MINUTE
+        self._checkpointed_status_ids: set[str] = set()
+        self._revalidating_status_ids: set[str] = set()
+        # Stale-while-revalidate: tarea aparte y máximo de entradas caducadas por ejecución
+        self._revalidation_task = None
+        self._revalidation_budget = CACHE_REVALIDATION_BATCH
+        self.response_collector = None
+
+    def set_cache_info(self, cache_manager, username: str):
+        """Configura el cache manager compartido y el username del procesamiento."""
+        self.cache_manager = cache_manager
+        self.username = username
+
+    def set_response_collector(self, response_collector):
+        """Configura el TimelineResponseCollector con los mapeos capturados de la red."""
+        self.response_collector = response_collector
+
+    async def iter_image_batches(self, status_store, username: str = None, url_limit: int = None,
+                                 batch_size: int = STATUS_CONVERSION_BATCH):
+        """
+        Convierte los status de imagen de un StatusStore por lotes de batch_size
+        y devuelve cada lote (image_urls, url_to_status_mapping) en cuanto está
+        listo, para descargarlo antes de leer el siguiente. Así la memoria no
+        crece con el timeline: solo se conservan las media keys ya devueltas
+        (para no repetir una imagen de otro lote). El límite de URLs nuevas se
+        reparte entre lotes como en MediaPipeline.
+        """
+        remaining = url_limit
+        seen_keys = set()
+        records = status_store.of_type('image')
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            uncached = self._count_uncached(batch, username)
+            image_urls, status_mapping = await self.convert_status_to_image_urls(batch, username, remaining)
+            if remaining is not None:
+                remaining = max(0, remaining - uncached)
+            new_urls = []
+            for url in image_urls:
+                key = media_key_for(url)
+                if key not in seen_keys:
+                    seen_keys.add(key)
+                    new_urls.append(url)
+            yield new_urls, {url: status_mapping[url] for url in new_urls if url in status_mapping}
+
+    def _count_uncached(self, items: list, username: str = None) -> int:
+        """Status que no están en cache (los que consumen límite de URLs nuevas)."""
+        username = username or self.username
+        if not self.cache_manager or not username:
+            return len(items)
+        return sum(1 for item in items if not self.cache_manager.is_status_cached(
+            username, self._extract_status_id(item.get('url', ''))
+        ))
 
     async def convert_status_to_image_urls(self, status_urls: list[dict], username: str = None, url_limit: int = None) -> tuple[list[str], dict]:
         """
         Orquesta la conversión de URLs de status a URLs de imágenes directas
         utilizando múltiples métodos para maximizar los resultados.
         Usa cache para evitar reprocesamiento innecesario.
+        Devuelve todo el resultado de status_urls en memoria: para un StatusStore
+        completo se usa iter_image_batches.
         
         Args:
             status_urls: Lista de URLs de status a procesar
@@ -36,7 +100,8 @@ class ImageProcessor:
         # Actualizar username si se proporciona
         if username:
             self.username = username
-            self.cache_manager = CacheManager()
+            if self.cache_manager is None:
+                self.cache_manager = CacheManager()
         
         Logger.info("🔄 Iniciando conversión de URLs de status a imágenes directas...")
         
@@ -51,7 +116,7 @@ class ImageProcessor:
         Logger.info(f"📊 Se procesarán {len(image_status_urls)} URLs de status de tipo imagen.")
         Logger.info(f"📊 Status totales: {total_status}, Videos: {video_count}, Imágenes esperadas: {expected_images}")
 
-        image_urls = []
+        image_urls = MediaURLSet()  # Orden de descarga, pertenencia por media key
         new_mappings = {}  # Para actualizar el cache: status_id -> [image_urls]
         
         # Usar cache si está disponible
@@ -70,26 +135,43 @@ class ImageProcessor:
             Logger.info(f"⚡ Límite aplicado: procesando {len(image_status_urls)} de {original_uncached_count} URLs nuevas")
         
         # Extraer username para filtrar correctamente
-        target_username = None
-        if image_status_urls:
-            first_url = image_status_urls[0].get('url', '')
-            url_parts = first_url.split('/')
-            if len(url_parts) > 3:
-                target_username = url_parts[3]  # x.com/username/status/id
+        target_username = self._username_of(image_status_urls)
         
         Logger.info(f"🎯 Procesando imágenes del usuario: @{target_username}")
         
         # Procesar solo las URLs no cacheadas (respetando el límite)
+        network_converted = 0
         if image_status_urls:
             Logger.info(f"🔄 Procesando {len(image_status_urls)} URLs nuevas...")
             
-            # MÉTODO 1: Extracción desde el DOM (rápido y eficiente)
-            dom_converted, dom_mappings = await self._extract_from_dom(image_urls, expected_images, image_status_urls, target_username)
+            # MÉTODO 0: Mapeos exactos de las respuestas del timeline capturadas durante el scroll
+            network_converted, network_mappings, network_videos = await self._extract_from_responses(
+                image_status_urls, image_urls, target_username
+            )
+            new_mappings.update(network_mappings)
+            await self._checkpoint_mappings(dict(network_mappings))
+            resolved = set(network_mappings) | network_videos
+            
+            # MÉTODO 1: Imágenes que el timeline capturó de cada artículo y extracción desde el DOM
+            dom_status_urls = [url for url in image_status_urls if self._extract_status_id(url.get('url', '')) not in resolved]
+            harvest_converted, harvest_mappings = self._extract_from_timeline_records(dom_status_urls, image_urls)
+            new_mappings.update(harvest_mappings)
+            await self._checkpoint_mappings(dict(harvest_mappings))
+            dom_status_urls = [url for url in dom_status_urls if self._extract_status_id(url.get('url', '')) not in harvest_mappings]
+            dom_converted, dom_mappings = await self._extract_from_dom(image_urls, expected_images, dom_status_urls, target_username)
             new_mappings.update(dom_mappings)
+            await self._checkpoint_mappings(dict(dom_mappings))
+            dom_converted += harvest_converted
             
             # MÉTODO 2: Construcción directa navegando a cada status (más preciso)
-            # Solo procesar las URLs que no se pudieron mapear en el método 1
-            remaining_unmapped = [url for url in image_status_urls if self._extract_status_id(url.get('url', '')) not in new_mappings]
+            # Solo procesar los status sin mapear o cuyo carrusel quedó incompleto en los
+            # métodos anteriores
+            remaining_unmapped = [
+                url for url in dom_status_urls
+                if not self._is_media_complete(url, new_mappings.get(self._extract_status_id(url.get('url', ''))))
+            ]
+            if dom_status_urls:
+                Logger.info(f"   🎯 {len(remaining_unmapped)} de {len(dom_status_urls)} status sin carrusel completo pasan al Método 2")
             
             if remaining_unmapped:
                 constructed_count, method2_mappings = await self._construct_direct_urls_improved(
@@ -99,19 +181,26 @@ class ImageProcessor:
             else:
                 constructed_count = 0
             
-            # MÉTODO 3: Fallback con extracción alternativa si es necesario
-            if len(image_urls) < expected_images:
-                await self._fallback_image_extraction(image_status_urls, image_urls, expected_images)
+            # MÉTODO 3: Fallback en el DOM solo para los status pedidos (dentro del límite) que siguen sin imágenes
+            pending_status_urls = [
+                url for url in image_status_urls
+                if self._extract_status_id(url.get('url', '')) not in new_mappings
+                and self._extract_status_id(url.get('url', '')) not in resolved
+            ]
+            if pending_status_urls:
+                fallback_converted, fallback_mappings = await self._fallback_image_extraction(
+                    pending_status_urls, image_urls, target_username
+                )
+                new_mappings.update(fallback_mappings)
+            else:
+                fallback_converted = 0
             
-            # Actualizar cache con nuevos mapeos válidos 
+            # Actualizar cache con nuevos mapeos válidos (los ya guardados en checkpoints se omiten)
             if self.cache_manager and self.username and new_mappings:
-                # Convertir mapeos múltiples a formato de cache (solo primera imagen por status)
-                valid_mappings = {}
-                for status_id, images in new_mappings.items():
-                    if isinstance(images, list) and images:
-                        valid_mappings[status_id] = images[0]  # Solo la primera imagen
-                    elif isinstance(images, str) and images:
-                        valid_mappings[status_id] = images
+                valid_mappings = self._to_cache_mappings({
+                    status_id: images for status_id, images in new_mappings.items()
+                    if status_id not in self._checkpointed_status_ids
+                })
                 
                 if valid_mappings:
                     self.cache_manager.update_cache_with_new_mappings(self.username, valid_mappings)
@@ -119,15 +208,19 @@ class ImageProcessor:
         else:
             dom_converted = 0
             constructed_count = 0
+            fallback_converted = 0
 
         total_converted = len(image_urls)
         total_mappings = sum(len(v) if isinstance(v, list) else 1 for v in new_mappings.values())
         conversion_rate = (total_converted / expected_images * 100) if expected_images else 0
         
         Logger.success(f"🎯 RESUMEN FINAL:")
-        Logger.info(f"   💾 Cache: {len(image_urls) - dom_converted - constructed_count} imágenes")
-        Logger.info(f"   🔍 Método 1 (DOM): {dom_converted} imágenes")
+        Logger.info(f"   💾 Cache: {len(image_urls) - network_converted - dom_converted - constructed_count - fallback_converted} imágenes")
+        Logger.info(f"   🌐 Método 0 (respuestas de red): {network_converted} imágenes")
+        Logger.info(f"   🔍 Método 1 (timeline y DOM): {dom_converted} imágenes")
         Logger.info(f"   🔧 Método 2 (Construcción directa): {constructed_count} imágenes")
+        if fallback_converted:
+            Logger.info(f"   🔄 Método 3 (Fallback DOM): {fallback_converted} imágenes")
         Logger.info(f"   📊 Total convertidas: {total_converted}/{expected_images} ({conversion_rate:.1f}%)")
         Logger.info(f"   🗂️  Mapeos para cache: {total_mappings} imágenes mapeadas")
         
@@ -145,13 +238,12 @@ class ImageProcessor:
             complete_mapping.update(cache_mapping)
         
         # Agregar mapeos nuevos - Manejar múltiples imágenes por status
+        # (con la URL guardada en image_urls, aunque el mapeo traiga otra variante de la imagen)
         for status_id, images in new_mappings.items():
-            if isinstance(images, list):
-                for image_url in images:
-                    if image_url and image_url in image_urls:
-                        complete_mapping[image_url] = status_id
-            elif isinstance(images, str) and images in image_urls:
-                complete_mapping[images] = status_id
+            for image_url in ([images] if isinstance(images, str) else images or []):
+                stored_url = image_urls.canonical(image_url) if image_url else None
+                if stored_url:
+                    complete_mapping[stored_url] = status_id
         
         # NO crear mapeos adicionales por correlación - esto causaba el problema
         # Solo usar mapeos explícitos y confiables
@@ -160,15 +252,167 @@ class ImageProcessor:
             Logger.warning(f"   ⚠️  {unmapped_count} imágenes quedarán sin status_id específico")
             Logger.info(f"   💡 Esto es normal para imágenes en carruseles múltiples")
         
-        return image_urls, complete_mapping
+        # Las entradas caducadas ya se sirvieron desde cache: se revalidan aparte
+        self._start_revalidation()
+        
+        return image_urls.urls(), complete_mapping
+
+    def _start_revalidation(self):
+        """
+        Stale-while-revalidate: lanza en una tarea aparte la revalidación de las
+        entradas caducadas que get_cached_image_urls sirvió desde cache. No
+        consume el límite de URLs nuevas ni retrasa la conversión; usa una sola
+        página del pool para no duplicar el ritmo de navegación del Método 2.
+        """
+        if not (self.cache_manager and self.username) or self._revalidation_budget <= 0:
+            return
+        if self._revalidation_task is not None and not self._revalidation_task.done():
+            return
+        candidates = self.cache_manager.pop_revalidation_candidates(self.username, self._revalidation_budget)
+        if not candidates:
+            return
+        self._revalidation_budget -= len(candidates)
+        self._revalidating_status_ids.update(self._extract_status_id(item.get('url', '')) for item in candidates)
+        Logger.info(f"🔁 {len(candidates)} entradas caducadas se revalidarán en segundo plano")
+        self._revalidation_task = asyncio.create_task(self._revalidate_entries(candidates))
+
+    async def _revalidate_entries(self, status_urls: list[dict]):
+        """
+        Métodos 0 y 2 sobre las entradas caducadas. Los resultados solo renuevan
+        el cache (refresh_entries vía _checkpoint_mappings): las imágenes ya se
+        sirvieron en esta ejecución y no se vuelven a descargar.
+        """
+        image_urls = MediaURLSet()
+        try:
+            _, network_mappings, network_videos = await self._extract_from_responses(
+                status_urls, image_urls, self._username_of(status_urls)
+            )
+            await self._checkpoint_mappings(dict(network_mappings))
+            resolved = set(network_mappings) | network_videos
+            pending = [item for item in status_urls if self._extract_status_id(item.get('url', '')) not in resolved]
+            if pending:
+                await self._construct_direct_urls_improved(
+                    pending, image_urls, len(pending), self._username_of(pending), pool_size=1
+                )
+        except Exception as e:
+            Logger.warning(f"⚠️  Revalidación en segundo plano interrumpida: {e}")
+
+    async def wait_revalidation(self):
+        """Espera a que termine la revalidación en segundo plano (antes de marcar y cerrar el cache)."""
+        task, self._revalidation_task = self._revalidation_task, None
+        if task is not None:
+            await task
 
-    async def _extract_from_dom(self, image_urls: list[str], expected_images: int, status_urls: list[dict], target_username: str = None) -> tuple[int, dict]:
+    async def cancel_revalidation(self):
+        """Cancela la revalidación pendiente (la ejecución terminó con error)."""
+        task, self._revalidation_task = self._revalidation_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _username_of(self, status_urls: list[dict]) -> str:
+        """Usuario del primer status (x.com/username/status/id), o None."""
+        if not status_urls:
+            return None
+        url_parts = status_urls[0].get('url', '').split('/')
+        return url_parts[3] if len(url_parts) > 3 else None
+
+    async def _extract_from_responses(self, status_urls: list[dict], image_urls: MediaURLSet,
+                                      target_username: str = None) -> tuple[int, dict, set]:
+        """
+        MÉTODO 0: Usa los mapeos exactos status -> [imágenes] que el
+        TimelineResponseCollector capturó de las respuestas GraphQL del timeline.
+        Con target_username solo se aceptan imágenes de ese autor (no las de
+        retweets o citas de otras cuentas).
+        Los status que solo traen video se devuelven aparte para no navegarlos.
+        Returns: (network_converted_count, status_id_to_image_mappings, video_status_ids)
+        """
+        if not self.response_collector:
+            return 0, {}, set()
+        await self.response_collector.wait_idle()
+        
+        network_converted = 0
+        network_mappings = {}
+        video_status_ids = set()
+        for item in status_urls:
+            status_id = self._extract_status_id(item.get('url', ''))
+            images = self.response_collector.images_for(status_id, target_username)
+            if images:
+                for image_url in images:
+                    if image_urls.add(image_url, status_id):
+                        network_converted += 1
+                network_mappings[status_id] = images
+            elif self.response_collector.video_variants.get(status_id):
+                # Detectado como imagen en el DOM pero la respuesta solo trae video
+                item['video_variants'] = self.response_collector.video_variants[status_id]
+                video_status_ids.add(status_id)
+        
+        if network_mappings or video_status_ids:
+            Logger.info(f"   🌐 MÉTODO 0: {len(network_mappings)} status mapeados desde las respuestas del timeline "
+                        f"({network_converted} imágenes, {len(video_status_ids)} solo video)")
+        return network_converted, network_mappings, video_status_ids
+
+    def _extract_from_timeline_records(self, status_urls: list[dict], image_urls: MediaURLSet) -> tuple[int, dict]:
+        """
+        Usa los src que el observer del timeline leyó de los enlaces /photo/N de
+        cada status (ver timeline_scripts). Solo se mapean los status cuyo
+        carrusel se capturó completo; el resto sigue a los métodos siguientes.
+        Returns: (converted_count, status_id_to_image_mappings)
+        """
+        converted = 0
+        mappings = {}
+        for item in status_urls:
+            status_id = self._extract_status_id(item.get('url', ''))
+            images = []
+            for src in item.get('image_srcs') or []:
+                clean_img_url = URLUtils.clean_image_url_robust(src)
+                if clean_img_url and clean_img_url not in images:
+                    images.append(clean_img_url)
+            if not status_id or not self._is_media_complete(item, images):
+                continue
+            for image_url in images:
+                if image_urls.add(image_url, status_id):
+                    converted += 1
+            mappings[status_id] = images if len(images) > 1 else images[0]
+        
+        if mappings:
+            Logger.info(f"   🧩 {len(mappings)} status con carrusel completo capturado en el timeline ({converted} imágenes)")
+        return converted, mappings
+
+    def _is_media_complete(self, item: dict, images) -> bool:
+        """
+        Indica si `images` cubre todas las fotos del status según el recuento
+        del timeline. Sin recuento (registros antiguos) basta con tener un mapeo.
+        En la cuadrícula de Multimedia (sin artículo) el recuento son los enlaces
+        /photo/N visibles: una celda de una sola foto, o con tantas imágenes como
+        enlaces, se da por completa; solo un desajuste pasa al Método 2.
+        """
+        if isinstance(images, str):
+            images = [images]
+        if not images:
+            return False
+        if 'media_kinds' not in item:
+            return True
+        photos = item['media_kinds'].count('photo')
+        if not item.get('media_exact'):
+            return (item.get('carousel_size') or 0) <= 1 or len(images) >= photos
+        return photos > 0 and len(images) >= photos
+
+    async def _extract_from_dom(self, image_urls: MediaURLSet, expected_images: int, status_urls: list[dict], target_username: str = None,
+                                mapped_only: bool = False) -> tuple[int, dict]:
         """
         MÉTODO 1: Extrae las URLs de las imágenes directamente desde los elementos <img>
-        cargados en la página y trata de correlacionarlas con status URLs.
+        cargados en la página. Cada imagen se atribuye al status de su propio
+        enlace /status/ID/photo/N o, si no lo tiene, al enlace de fecha de su
+        artículo, en la misma llamada a evaluate; no se correlaciona por índice.
+        Con mapped_only se descartan las imágenes sin status (ver Método 3).
         Returns: (dom_converted_count, status_id_to_image_mappings)
         """
-        Logger.info("🔍 MÉTODO 1: Extrayendo imágenes desde el DOM...")
+        if not mapped_only:
+            Logger.info("🔍 MÉTODO 1: Extrayendo imágenes desde el DOM...")
         
         # Extraer username del primer status URL para filtrar correctamente si no se proporciona
         if not target_username and status_urls:
@@ -181,6 +425,12 @@ class ImageProcessor:
         
         all_page_images = await self.page.evaluate("""
             (targetUsername) => {
+                const pattern = /\\/([^\\/?#]+)\\/status\\/(\\d+)(?:\\/photo\\/(\\d+))?/;
+                const target = (targetUsername || '').toLowerCase();
+                const parse = (link) => {
+                    const match = link && (link.getAttribute('href') || '').match(pattern);
+                    return match ? {author: match[1].toLowerCase(), id: match[2], index: Number(match[3] || 0)} : null;
+                };
                 const images = [];
                 const imgElements = document.querySelectorAll('img[src*="pbs.twimg.com"]');
                 imgElements.forEach(img => {
@@ -188,11 +438,18 @@ class ImageProcessor:
                         !img.src.includes('profile_images') && 
                         !img.src.includes('profile_banners')) {
                         
-                        // Obtener el contenedor del tweet para verificar el usuario
                         const tweetContainer = img.closest('article') || img.closest('[data-testid="tweet"]');
-                        let belongsToTargetUser = false;
+                        // Status de la imagen: su enlace /photo/N o el enlace de fecha del artículo
+                        let status = parse(img.closest('a[href*="/status/"]'));
+                        if (!status && tweetContainer) {
+                            const time = tweetContainer.querySelector('a[href*="/status/"] time');
+                            status = parse(time && time.closest('a'));
+                        }
                         
-                        if (tweetContainer && targetUsername) {
+                        let belongsToTargetUser = false;
+                        if (status) {
+                            belongsToTargetUser = status.author === target;
+                        } else if (tweetContainer && targetUsername) {
                             // Buscar enlaces de usuario en el tweet
                             const userLinks = tweetContainer.querySelectorAll('a[href*="/' + targetUsername + '"]');
                             belongsToTargetUser = Array.from(userLinks).some(link => {
@@ -206,6 +463,8 @@ class ImageProcessor:
                             alt: img.alt || '',
                             width: img.naturalWidth || img.width || 0,
                             height: img.naturalHeight || img.height || 0,
+                            statusId: status ? status.id : null,
+                            photoIndex: status ? status.index : 0,
                             belongsToTargetUser: belongsToTargetUser,
                             hasContainer: !!tweetContainer
                         });
@@ -226,195 +485,287 @@ class ImageProcessor:
             # Filtrar por tamaño (evitar avatares pequeños) y verificar que sea del usuario correcto
             if img_data['width'] > 100 and img_data['height'] > 100:
                 tweet_images.append(img_data)
-            elif img_data['hasContainer']:  # O si está en un contenedor de tweet
+            elif img_data['hasContainer'] or img_data.get('statusId'):  # O si está en un contenedor de tweet
                 tweet_images.append(img_data)
         
         Logger.info(f"   🎯 Filtradas {len(tweet_images)} imágenes que parecen ser de tweets")
         
+        # Solo se mapean los status pedidos; el resto ya está en cache o fuera del límite
+        requested_ids = {self._extract_status_id(item.get('url', '')) for item in status_urls}
+        # Orden del carrusel según el índice /photo/N de cada enlace, manteniendo el orden de los status
+        first_seen = {}
+        for position, img_data in enumerate(tweet_images):
+            img_data['order'] = first_seen.setdefault(img_data.get('statusId') or position, position)
+        tweet_images.sort(key=lambda img: (img['order'], img.get('photoIndex') or 0))
+        
         # Añadir imágenes limpias y crear mapeos
         dom_converted = 0
         dom_mappings = {}
+        skipped_count = 0
         
         for i, img_data in enumerate(tweet_images):
             clean_img_url = URLUtils.clean_image_url_robust(img_data['src'])
-            if clean_img_url and clean_img_url not in image_urls:
-                # Filtrar thumbnails de video que no son imágenes reales
-                if 'amplify_video_thumb' not in clean_img_url and 'video_thumb' not in clean_img_url:
-                    image_urls.append(clean_img_url)
-                    dom_converted += 1
-                    
-                    # Tratar de correlacionar con status URL usando el índice o el parent_href
-                    if i < len(status_urls):
-                        status_id = self._extract_status_id(status_urls[i].get('url', ''))
-                        if status_id:
-                            dom_mappings[status_id] = clean_img_url
-                            Logger.info(f"   ✅ [{i+1}] Imagen DOM mapeada: {status_id} -> {clean_img_url}")
-                        else:
-                            Logger.info(f"   ✅ [{i+1}] Imagen DOM añadida: {clean_img_url}")
-                    else:
-                        Logger.info(f"   ✅ [{i+1}] Imagen DOM añadida: {clean_img_url}")
-                else:
-                    Logger.warning(f"   🎬 Thumbnail de video excluido: {clean_img_url}")
-                
-                # No limitar artificialmente - permitir múltiples imágenes por tweet
-                # if len(image_urls) >= expected_images:
-                #     Logger.warning(f"   🛑 Límite de {expected_images} imágenes alcanzado")
-                #     break
+            if not clean_img_url:
+                continue
+            # Filtrar thumbnails de video que no son imágenes reales
+            if 'amplify_video_thumb' in clean_img_url or 'video_thumb' in clean_img_url:
+                Logger.warning(f"   🎬 Thumbnail de video excluido: {clean_img_url}")
+                continue
+            
+            status_id = img_data.get('statusId')
+            if (status_id and status_id not in requested_ids) or (mapped_only and not status_id):
+                skipped_count += 1
+                continue
+            
+            if image_urls.add(clean_img_url, status_id):
+                dom_converted += 1
+            
+            if status_id:
+                status_images = dom_mappings.setdefault(status_id, [])
+                if clean_img_url not in status_images:
+                    status_images.append(clean_img_url)
+                    Logger.info(f"   ✅ [{i+1}] Imagen DOM mapeada: {status_id} -> {clean_img_url}")
+            else:
+                Logger.info(f"   ✅ [{i+1}] Imagen DOM añadida sin status: {clean_img_url}")
+        
+        # String para una sola imagen, lista para carruseles (mismo formato que el Método 2)
+        dom_mappings = {
+            status_id: images[0] if len(images) == 1 else images
+            for status_id, images in dom_mappings.items()
+        }
         
+        if skipped_count:
+            reasons = "status ya cacheados, fuera del límite o sin status" if mapped_only else "status ya cacheados o fuera del límite"
+            Logger.info(f"   ⏭️  {skipped_count} imágenes omitidas ({reasons})")
         Logger.info(f"   ✅ Método 1 completado: {dom_converted} imágenes añadidas, {len(dom_mappings)} mapeos creados")
         return dom_converted, dom_mappings
 
-    async def _construct_direct_urls_improved(self, image_status_urls: list[dict], image_urls: list[str], expected_images: int, target_username: str = None) -> tuple[int, dict]:
+    async def _construct_direct_urls_improved(self, image_status_urls: list[dict], image_urls: MediaURLSet, expected_images: int, target_username: str = None,
+                                              pool_size: int = None) -> tuple[int, dict]:
         """
         MÉTODO 2 MEJORADO: Navegar directamente a cada URL de status para extraer TODAS las imágenes
         Maneja correctamente carruseles con múltiples imágenes por tweet
+        pool_size limita las páginas en paralelo (por defecto page_pool_size).
         Returns: (constructed_count, status_to_image_mappings)
         """
         Logger.info(f"   🔧 MÉTODO 2 MEJORADO: Construyendo URLs directas navegando a {len(image_status_urls)} status...")
         
         constructed_count = 0
         status_mappings = {}  # status_id -> [list_of_image_urls] or single_image_url
+        pending_checkpoint = {}  # Mapeos resueltos aún no guardados de forma durable
+        failed_statuses = {}  # status_id -> motivo, para el caché negativo
         # Usar todas las URLs disponibles - el límite ya se aplicó anteriormente
         remaining_status_urls = image_status_urls  # Procesar todas las URLs que pasaron el filtro de límite
         
-        for i, item in enumerate(remaining_status_urls, 1):
-            try:
+        try:
+            constructed_count = await self._navigate_and_map_statuses(
+                remaining_status_urls, image_urls, target_username, status_mappings, pending_checkpoint,
+                failed_statuses, pool_size
+            )
+        finally:
+            # Guardar lo resuelto aunque la navegación se interrumpa (cierre del navegador, timeout...)
+            await self._checkpoint_mappings(pending_checkpoint)
+            if failed_statuses and self.cache_manager and self.username:
+                self.cache_manager.record_negative_results(self.username, failed_statuses)
+        
+        Logger.info(f"   ✅ Método 2 mejorado: {constructed_count} imágenes construidas directamente")
+        Logger.info(f"   📸 Se mapearon {len(status_mappings)} status con sus imágenes correspondientes")
+        return constructed_count, status_mappings
+
+    async def _navigate_and_map_statuses(self, remaining_status_urls: list[dict], image_urls: MediaURLSet, target_username: str,
+                                         status_mappings: dict, pending_checkpoint: dict,
+                                         failed_statuses: dict = None, pool_size: int = None) -> int:
+        """
+        Resuelve los status en paralelo con un pool de páginas (ver PagePool),
+        extrae sus imágenes y guarda un checkpoint durable del cache cada
+        checkpoint_interval status resueltos. Los resultados se incorporan en el
+        orden original, así que el orden de image_urls y de los carruseles es el
+        mismo que con una sola página. Los status sin imágenes se anotan en
+        failed_statuses (status_id -> motivo).
+        Returns: número de imágenes construidas
+        """
+        if failed_statuses is None:
+            failed_statuses = {}
+        constructed_count = 0
+        total = len(remaining_status_urls)
+        pending = [item for item in remaining_status_urls
+                   if item.get('url') and self._extract_status_id(item.get('url'))]
+        
+        async with PagePool(self.page.context, size=pool_size or self.page_pool_size,
+                            requests_per_minute=self.requests_per_minute) as pool:
+            Logger.info(f"   🧵 Resolviendo {len(pending)} status con hasta {pool.max_concurrency} páginas en paralelo")
+            
+            async def worker(page, item):
+                return await self._resolve_status(pool, page, item)
+            
+            i = 0
+            async for item, result in pool.imap(pending, worker):
+                i += 1
                 status_url = item.get('url')
-                if not status_url:
-                    continue
-                
                 status_id = self._extract_status_id(status_url)
-                if not status_id:
+                
+                if isinstance(result, Exception):
+                    Logger.error(f"   ❌ [{i}/{total}] Error procesando {status_url}: {result}")
+                    continue
+                if result.get("reason"):
+                    failed_statuses[status_id] = result["reason"]
+                    Logger.warning(f"   ⚠️  [{i}/{total}] Status sin imágenes ({result['reason']}), se reintentará más adelante")
+                    continue
+                if result.get("error"):
+                    Logger.error(f"   ❌ [{i}/{total}] Error navegando a {status_url}: {result['error']}")
                     continue
                 
-                Logger.info(f"   🔍 [{i}/{len(remaining_status_urls)}] Navegando a: {status_url}")
+                status_image_list = []
                 
-                try:
-                    await self.page.goto(status_url, wait_until="domcontentloaded", timeout=15000)
-                    # Espera orgánica después de la navegación para simular tiempo de lectura
-                    page_load_delay = random.uniform(1.5, 3.0)
-                    await asyncio.sleep(page_load_delay)
-                    
-                    # Buscar imágenes SOLO del tweet principal, no de los replies
-                    tweet_images = await self.page.evaluate("""
-                        (statusUrl) => {
-                            const images = [];
-                            
-                            // Extraer el username del status URL
-                            const urlParts = statusUrl.split('/');
-                            const expectedUsername = urlParts[3]; // x.com/username/status/id
-                            
-                            // Buscar específicamente el tweet principal (no replies)
-                            const tweetContainers = document.querySelectorAll('article, [data-testid="tweet"]');
-                            
-                            for (const container of tweetContainers) {
-                                // Verificar que este tweet pertenece al usuario correcto
-                                const userLinks = container.querySelectorAll('a[href*="/' + expectedUsername + '"]');
-                                const isMainUser = Array.from(userLinks).some(link => {
-                                    const href = link.getAttribute('href');
-                                    return href && href.includes('/' + expectedUsername) && !href.includes('/status/');
-                                });
-                                
-                                // Solo procesar si es del usuario correcto
-                                if (isMainUser) {
-                                    const imgElements = container.querySelectorAll('img[src*="pbs.twimg.com"]');
-                                    imgElements.forEach(img => {
-                                        if (img.src && 
-                                            !img.src.includes('profile_images') && 
-                                            !img.src.includes('profile_banners') &&
-                                            !img.src.includes('amplify_video_thumb') &&
-                                            !img.src.includes('video_thumb') &&
-                                            img.width > 100 && img.height > 100) {
-                                            images.push({
-                                                src: img.src,
-                                                username: expectedUsername,
-                                                isMainTweet: true
-                                            });
-                                        }
-                                    });
-                                }
-                            }
-                            
-                            // Eliminar duplicados y devolver solo las URLs
-                            const uniqueImages = [...new Set(images.map(img => img.src))];
-                            return uniqueImages;
-                        }
-                    """, status_url)
+                # Procesar TODAS las imágenes encontradas en el tweet (carruseles)
+                for img_index, img_src in enumerate(result["images"]):
+                    clean_img_url = URLUtils.clean_image_url_robust(img_src)
                     
-                    if tweet_images:
-                        status_image_list = []
-                        
-                        # Procesar TODAS las imágenes encontradas en el tweet (carruseles)
-                        for img_index, img_src in enumerate(tweet_images):
-                            clean_img_url = URLUtils.clean_image_url_robust(img_src)
-                            
-                            if clean_img_url:
-                                # Verificar duplicados comparando la base de la URL (sin parámetros)
-                                is_duplicate = self._is_duplicate_image(clean_img_url, image_urls)
-                                
-                                if not is_duplicate:
-                                    image_urls.append(clean_img_url)
-                                    status_image_list.append(clean_img_url)
-                                    constructed_count += 1
-                                    Logger.info(f"   ✅ [{i}/{len(remaining_status_urls)}] URL construida #{img_index+1}: {clean_img_url}")
-                                else:
-                                    Logger.info(f"   💾 [{i}/{len(remaining_status_urls)}] URL ya existe #{img_index+1}: {clean_img_url}")
-                                    # Aún añadir a la lista del status para mapeo correcto
-                                    if clean_img_url in image_urls:
-                                        status_image_list.append(clean_img_url)
-                        
-                        # Guardar mapeo completo para este status (todas las imágenes del usuario correcto)
-                        if status_image_list:
-                            if len(status_image_list) == 1:
-                                status_mappings[status_id] = status_image_list[0]  # String para una sola imagen
-                            else:
-                                status_mappings[status_id] = status_image_list  # Lista para múltiples imágenes
-                            
-                            Logger.info(f"   📸 [{i}/{len(remaining_status_urls)}] Status {status_id} mapeado a {len(status_image_list)} imagen(es) del usuario correcto")
+                    if clean_img_url:
+                        # Duplicados por media key (misma imagen con otro formato o tamaño)
+                        if image_urls.add(clean_img_url, status_id):
+                            status_image_list.append(clean_img_url)
+                            constructed_count += 1
+                            Logger.info(f"   ✅ [{i}/{total}] URL construida #{img_index+1}: {clean_img_url}")
                         else:
-                            Logger.warning(f"   ⚠️  [{i}/{len(remaining_status_urls)}] No se encontraron imágenes del usuario @{target_username} en este status")
-                        
-                except Exception as e:
-                    Logger.error(f"   ❌ [{i}/{len(remaining_status_urls)}] Error navegando a {status_url}: {e}")
-                    continue
-                    
-            except Exception as e:
-                Logger.error(f"   ❌ [{i}/{len(remaining_status_urls)}] Error procesando {item.get('url', 'unknown')}: {e}")
-                continue
+                            Logger.info(f"   💾 [{i}/{total}] URL ya existe #{img_index+1}: {clean_img_url}")
+                            # Aún añadir a la lista del status (con la URL guardada) para mapeo correcto
+                            status_image_list.append(image_urls.canonical(clean_img_url))
                 
-            # Pausa orgánica entre navegaciones para simular comportamiento humano
-            if i < len(remaining_status_urls):
-                delay = self._get_organic_delay()
-                Logger.info(f"   ⏱️  Pausa orgánica: {delay:.2f}s antes de la siguiente URL")
-                await asyncio.sleep(delay)
+                # Guardar mapeo completo para este status (todas las imágenes del usuario correcto)
+                if status_image_list:
+                    if len(status_image_list) == 1:
+                        status_mappings[status_id] = status_image_list[0]  # String para una sola imagen
+                    else:
+                        status_mappings[status_id] = status_image_list  # Lista para múltiples imágenes
+                    
+                    Logger.info(f"   📸 [{i}/{total}] Status {status_id} mapeado a {len(status_image_list)} imagen(es) del usuario correcto")
+                    
+                    pending_checkpoint[status_id] = status_mappings[status_id]
+                    if len(pending_checkpoint) >= self.checkpoint_interval:
+                        await self._checkpoint_mappings(pending_checkpoint)
+                else:
+                    Logger.warning(f"   ⚠️  [{i}/{total}] No se encontraron imágenes del usuario @{target_username} en este status")
         
-        Logger.info(f"   ✅ Método 2 mejorado: {constructed_count} imágenes construidas directamente")
-        Logger.info(f"   📸 Se mapearon {len(status_mappings)} status con sus imágenes correspondientes")
-        return constructed_count, status_mappings
+        return constructed_count
 
-    def _get_organic_delay(self, base_delay: float = 1.5) -> float:
+    async def _resolve_status(self, pool: PagePool, page: Page, item: dict) -> dict:
         """
-        Calcula un tiempo de espera orgánico y aleatorio para simular comportamiento humano.
-        
-        Args:
-            base_delay: Tiempo base en segundos (por defecto 1.5s)
+        Navega a un status con una página del pool y lee las imágenes del tweet principal.
+        Returns: {"images": [...]} o, si no hay imágenes, {"images": [], "reason": motivo};
+                 {"error": excepción} si la navegación falló con el navegador cerrado
+        """
+        status_url = item.get('url')
+        Logger.info(f"   🔍 Navegando a: {status_url}")
+        try:
+            await pool.goto(page, status_url, wait_until="domcontentloaded", timeout=15000)
+            # Espera orgánica después de la navegación para simular tiempo de lectura
+            page_load_delay = random.uniform(1.5, 3.0)
+            await asyncio.sleep(page_load_delay)
             
-        Returns:
-            Tiempo de espera en segundos con variación aleatoria
+            # Buscar imágenes SOLO del tweet principal, no de los replies
+            tweet_images = await page.evaluate("""
+                (statusUrl) => {
+                    const images = [];
+                    
+                    // Extraer el username del status URL
+                    const urlParts = statusUrl.split('/');
+                    const expectedUsername = urlParts[3]; // x.com/username/status/id
+                    
+                    // Buscar específicamente el tweet principal (no replies)
+                    const tweetContainers = document.querySelectorAll('article, [data-testid="tweet"]');
+                    
+                    for (const container of tweetContainers) {
+                        // Verificar que este tweet pertenece al usuario correcto
+                        const userLinks = container.querySelectorAll('a[href*="/' + expectedUsername + '"]');
+                        const isMainUser = Array.from(userLinks).some(link => {
+                            const href = link.getAttribute('href');
+                            return href && href.includes('/' + expectedUsername) && !href.includes('/status/');
+                        });
+                        
+                        // Solo procesar si es del usuario correcto
+                        if (isMainUser) {
+                            const imgElements = container.querySelectorAll('img[src*="pbs.twimg.com"]');
+                            imgElements.forEach(img => {
+                                if (img.src && 
+                                    !img.src.includes('profile_images') && 
+                                    !img.src.includes('profile_banners') &&
+                                    !img.src.includes('amplify_video_thumb') &&
+                                    !img.src.includes('video_thumb') &&
+                                    img.width > 100 && img.height > 100) {
+                                    images.push({
+                                        src: img.src,
+                                        username: expectedUsername,
+                                        isMainTweet: true
+                                    });
+                                }
+                            });
+                        }
+                    }
+                    
+                    // Eliminar duplicados y devolver solo las URLs
+                    const uniqueImages = [...new Set(images.map(img => img.src))];
+                    return uniqueImages;
+                }
+            """, status_url)
+        except Exception as e:
+            # Con el navegador cerrado el error no dice nada del status
+            if page.is_closed():
+                return {"error": e}
+            Logger.error(f"   ❌ Error navegando a {status_url}: {e}")
+            return {"images": [], "reason": "navigation_error"}
+        
+        if not tweet_images:
+            # Status borrado, con restricción de edad o sin media: se reintenta más adelante
+            return {"images": [], "reason": await self._classify_missing_images(page)}
+        return {"images": tweet_images}
+
+    async def _classify_missing_images(self, page: Page) -> str:
+        """Motivo de un status sin imágenes: 'unavailable' si X muestra la página de error."""
+        try:
+            if await page.query_selector('[data-testid="error-detail"]'):
+                return "unavailable"
+        except Exception:
+            pass
+        return "no_images"
+
+    async def _checkpoint_mappings(self, pending_checkpoint: dict):
         """
-        # Variación aleatoria del ±40% del tiempo base
-        variation = random.uniform(-0.4, 0.6)  # -40% a +60% para mayor naturalidad
-        delay = base_delay * (1 + variation)
-        
-        # Asegurar que esté dentro del rango deseado (1.0 - 2.5 segundos)
-        delay = max(1.0, min(2.5, delay))
-        
-        # Ocasionalmente agregar pausas más largas (5% de probabilidad)
-        if random.random() < 0.05:
-            delay += random.uniform(1.0, 3.0)  # Pausa larga ocasional
-            Logger.info(f"   ⏱️  Aplicando pausa larga: {delay:.2f}s")
-        
-        return delay
+        Guarda de forma durable los mapeos pendientes para que una ejecución
+        interrumpida se reanude exactamente donde se quedó.
+        """
+        if not pending_checkpoint or not (self.cache_manager and self.username):
+            return
+        
+        valid_mappings = self._to_cache_mappings(pending_checkpoint)
+        if valid_mappings:
+            revalidated = {
+                status_id: url for status_id, url in valid_mappings.items()
+                if status_id in self._revalidating_status_ids
+            }
+            new_only = {
+                status_id: url for status_id, url in valid_mappings.items()
+                if status_id not in revalidated
+            }
+            if new_only:
+                self.cache_manager.update_cache_with_new_mappings(self.username, new_only)
+            if revalidated:
+                self.cache_manager.refresh_entries(self.username, revalidated)
+            await asyncio.to_thread(self.cache_manager.flush, self.username)
+            self._checkpointed_status_ids.update(valid_mappings)
+            Logger.info(f"   💾 Checkpoint: {len(valid_mappings)} mapeos guardados en cache")
+        pending_checkpoint.clear()
+
+    def _to_cache_mappings(self, mappings: dict) -> dict:
+        """Convierte mapeos a formato de cache: lista ordenada con todas las imágenes del carrusel."""
+        valid_mappings = {}
+        for status_id, images in mappings.items():
+            if isinstance(images, str):
+                images = [images]
+            images = [url for url in images or [] if url]
+            if images:
+                valid_mappings[status_id] = images
+        return valid_mappings
 
     def _extract_status_id(self, status_url: str) -> str:
         """Extrae el ID del status desde la URL."""
@@ -432,90 +783,19 @@ class ImageProcessor:
         Logger.info(f"   💡 Solo se usan mapeos explícitos obtenidos de navegación directa")
         return 0
     
-    def _is_duplicate_image(self, new_url: str, existing_urls: list[str]) -> bool:
-        """
-        Verifica si una URL de imagen ya existe en la lista.
-        Compara la base de la imagen (sin parámetros) para detectar duplicados.
-        """
-        try:
-            # Extraer la parte base de la nueva URL (sin parámetros)
-            new_base = new_url.split('?')[0] if '?' in new_url else new_url
-            
-            for existing_url in existing_urls:
-                # Extraer la parte base de la URL existente
-                existing_base = existing_url.split('?')[0] if '?' in existing_url else existing_url
-                
-                # Comparar las bases
-                if new_base == existing_base:
-                    return True
-                    
-            return False
-        except Exception:
-            return False
-
-    async def _fallback_image_extraction(self, image_status_urls: list[dict], image_urls: list[str], expected_images: int):
+    async def _fallback_image_extraction(self, pending_status_urls: list[dict], image_urls: MediaURLSet,
+                                         target_username: str = None) -> tuple[int, dict]:
         """
-        MÉTODO 3: Fallback con extracción alternativa
+        MÉTODO 3: Fallback con extracción alternativa. El Método 2 navega con las
+        páginas del pool, así que la página principal sigue en el perfil: se vuelve
+        a leer su DOM, pero solo se añaden las imágenes cuyo enlace o artículo
+        apunta a uno de los status pendientes. Las imágenes sin status o de status
+        fuera del límite no se descargan.
+        Returns: (fallback_count, status_id_to_image_mappings)
         """
-        Logger.info("   🔄 MÉTODO 3: Fallback con extracción alternativa...")
-        
-        # Obtener todas las imágenes disponibles en la página con más contexto
-        all_page_images = await self.page.evaluate("""
-            () => {
-                const images = [];
-                const imgElements = document.querySelectorAll('img[src*="pbs.twimg.com"]');
-                imgElements.forEach(img => {
-                    if (img.src && img.src.includes('pbs.twimg.com') && 
-                        !img.src.includes('profile_images') && 
-                        !img.src.includes('profile_banners')) {
-                        
-                        // Obtener más contexto sobre la imagen
-                        const parentLink = img.closest('a');
-                        const tweetContainer = img.closest('article') || img.closest('[data-testid="tweet"]');
-                        
-                        images.push({
-                            src: img.src,
-                            alt: img.alt || '',
-                            parent_href: parentLink ? parentLink.href : null,
-                            has_tweet_container: !!tweetContainer,
-                            width: img.naturalWidth || img.width || 0,
-                            height: img.naturalHeight || img.height || 0
-                        });
-                    }
-                });
-                return images;
-            }
-        """)
-        
-        Logger.info(f"   📊 Encontradas {len(all_page_images)} imágenes totales en la página")
-        
-        # Filtrar imágenes que parecen ser de tweets (no avatares pequeños)
-        tweet_images = []
-        for img_data in all_page_images:
-            # Filtrar por tamaño (evitar avatares pequeños)
-            if img_data['width'] > 100 and img_data['height'] > 100:
-                tweet_images.append(img_data)
-            elif img_data['has_tweet_container']:  # O si está en un contenedor de tweet
-                tweet_images.append(img_data)
-        
-        Logger.info(f"   🎯 Filtradas {len(tweet_images)} imágenes que parecen ser de tweets")
-        
-        # Añadir imágenes que no estén ya en la lista
-        added_count = 0
-        for img_data in tweet_images:
-            clean_img_url = URLUtils.clean_image_url_robust(img_data['src'])
-            if clean_img_url and clean_img_url not in image_urls:
-                # Filtrar thumbnails de video que no son imágenes reales
-                if 'amplify_video_thumb' not in clean_img_url and 'video_thumb' not in clean_img_url:
-                    image_urls.append(clean_img_url)
-                    added_count += 1
-                    Logger.info(f"   ➕ Imagen alternativa añadida: {clean_img_url}")
-                else:
-                    Logger.warning(f"   🎬 Thumbnail de video excluido: {clean_img_url}")
-                
-                # No limitar artificialmente - permitir múltiples imágenes por tweet
-                # if len(image_urls) >= expected_images:
-                #     Logger.warning(f"   🛑 Límite de {expected_images} imágenes alcanzado")
-                #     break
-        
-        Logger.info(f"   ✅ Método alternativo añadió {added_count} imágenes adicionales")
\ No newline at end of file
+        Logger.info(f"   🔄 MÉTODO 3: Fallback en el DOM para {len(pending_status_urls)} status sin imágenes...")
+        added_count, mappings = await self._extract_from_dom(
+            image_urls, len(pending_status_urls), pending_status_urls, target_username, mapped_only=True
+        )
+        Logger.info(f"   ✅ Método alternativo añadió {added_count} imágenes de {len(mappings)} status")
+        return added_count, mappings
\ No newline at end of file
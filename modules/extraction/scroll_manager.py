@@ -3,10 +3,14 @@ Módulo para la gestión del scroll y la carga de contenido dinámico.
 """
 import asyncio
 import random
+import time
 from playwright.async_api import Page
 from ..utils.logging import Logger
 from .url_extractor import URLExtractor
-from ..config.constants import MAX_SCROLLS_DEFAULT
+from .timeline_scripts import CONTENT_SIGNAL_SCRIPT, SCROLL_STEP_SCRIPT
+from ..config.constants import (MAX_SCROLLS_DEFAULT, INCREMENTAL_STOP_RUN, SCROLL_MIN_INTERVAL,
+                                SCROLL_CONTENT_TIMEOUT, SCROLL_END_STABLE_MS, SCROLL_SETTLE_MS,
+                                SCROLL_STEP_RATIO)
 
 class ScrollManager:
     """
@@ -18,30 +22,59 @@ class ScrollManager:
         self.url_extractor = url_extractor
         self.cache_manager = None
         self.username = None
+        # Motivo de fin del último scroll (ver can_advance_high_water_mark)
+        self.reached_high_water_mark = False
+        self.reached_end = False
+        # Intervalo mínimo entre scrolls en segundos (ritmo de peticiones)
+        self.min_interval = SCROLL_MIN_INTERVAL
 
     def set_cache_info(self, cache_manager, username: str):
         """Configura el cache manager y username para verificar URLs nuevas."""
         self.cache_manager = cache_manager
         self.username = username
 
-    def _get_organic_scroll_delay(self) -> float:
+    def _get_min_scroll_interval(self) -> float:
         """
-        Calcula un tiempo de espera orgánico para scrolls que simula comportamiento humano.
+        Intervalo mínimo hasta el siguiente scroll, con una pequeña variación
+        orgánica para no dar los pasos a un ritmo exacto.
+        """
+        return self.min_interval * random.uniform(1.0, 1.3)
+
+    async def _scroll_step(self) -> str:
+        """
+        Hace un scroll y espera a que lleguen artículos nuevos o a una señal de
+        fin, respetando el intervalo mínimo (lo que ocurra más tarde).
         
         Returns:
-            Tiempo de espera en segundos entre 2.5 y 4.5 segundos con variaciones
+            'content' (artículos nuevos), 'idle' (sin nada que cargar en este paso),
+            'end' (final del timeline) o 'timeout'
         """
-        # Tiempo base más realista para scroll (2.5-4.5 segundos)
-        base_delay = random.uniform(2.5, 4.5)
-        
-        # Ocasionalmente hacer pausas más largas (10% de probabilidad)
-        if random.random() < 0.1:
-            base_delay += random.uniform(1.0, 2.5)  # Pausa larga ocasional
-            Logger.info(f"   ⏱️  Aplicando pausa de scroll larga: {base_delay:.2f}s")
+        started = time.monotonic()
+        previous_height = await self.page.evaluate(SCROLL_STEP_SCRIPT, SCROLL_STEP_RATIO)
+        try:
+            handle = await self.page.wait_for_function(
+                CONTENT_SIGNAL_SCRIPT,
+                arg={"previousHeight": previous_height, "stableMs": SCROLL_END_STABLE_MS,
+                     "settleMs": SCROLL_SETTLE_MS},
+                timeout=SCROLL_CONTENT_TIMEOUT * 1000,
+                polling=100,
+            )
+            signal = await handle.json_value()
+        except Exception:
+            signal = "timeout"  # Sin contenido nuevo ni señal de fin (p. ej. respuesta lenta)
         
-        return base_delay
+        remaining = self._get_min_scroll_interval() - (time.monotonic() - started)
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+        return signal
+
+    @property
+    def can_advance_high_water_mark(self) -> bool:
+        """Indica si el último scroll cubrió sin huecos el timeline hasta la marca de agua (o hasta el final)."""
+        return self.reached_high_water_mark or self.reached_end
 
-    async def scroll_and_extract(self, max_scrolls: int = MAX_SCROLLS_DEFAULT, target_new_urls: int = None):
+    async def scroll_and_extract(self, max_scrolls: int = MAX_SCROLLS_DEFAULT, target_new_urls: int = None,
+                                 incremental: bool = False, on_new_statuses=None):
         """
         Realiza scrolls en la página, extrayendo URLs después de cada uno,
         hasta encontrar el número objetivo de URLs NUEVAS (no cacheadas) o alcanzar el máximo de scrolls.
@@ -49,39 +82,61 @@ class ScrollManager:
         Args:
             max_scrolls: Número máximo de scrolls a realizar
             target_new_urls: Objetivo de URLs NUEVAS (no cacheadas) a encontrar
+            incremental: Terminar en cuanto aparezcan INCREMENTAL_STOP_RUN status seguidos
+                         ya archivados (por debajo de la marca de agua del usuario)
+            on_new_statuses: Corrutina opcional que recibe cada lote de status nuevos en
+                             cuanto se extrae (ver modules/core/pipeline); si tarda, el scroll espera
         """
         if target_new_urls is not None:
             Logger.info(f"Objetivo: encontrar {target_new_urls} URLs nuevas (no cacheadas)")
         else:
             Logger.info("Buscando todas las URLs disponibles")
         
+        self.reached_high_water_mark = False
+        self.reached_end = False
+        high_water_mark = None
+        archived_run = 0  # Status seguidos ya archivados vistos en orden de página
+        if incremental:
+            high_water_mark = self._get_high_water_mark()
+            if high_water_mark is not None:
+                Logger.info(f"🔖 Modo incremental: se detiene al llegar a la marca de agua {high_water_mark}")
+            else:
+                Logger.info("🔖 Modo incremental sin marca de agua: se detiene al encontrar status ya cacheados")
+        
+        # El observer captura cada artículo al insertarse: aunque el timeline
+        # recicle nodos entre scrolls, después de cada uno solo se leen los nuevos
+        await self.url_extractor.start_capture()
+        
         # Extraer URLs iniciales antes del primer scroll
         await self.url_extractor.extract_all_status_urls()
         
         initial_count = len(self.url_extractor.all_status_urls)
+        if on_new_statuses and initial_count:
+            await on_new_statuses(self.url_extractor.all_status_urls[:initial_count])
         scrolls_without_new_content = 0
         new_urls_found = 0  # Contador de URLs realmente nuevas (no cacheadas)
 
+        if incremental:
+            archived_run = self._update_archived_run(
+                self.url_extractor.all_status_urls, high_water_mark, archived_run
+            )
+            if archived_run >= INCREMENTAL_STOP_RUN:
+                self.reached_high_water_mark = True
+                Logger.success("🔖 Marca de agua visible sin hacer scroll: no hay status nuevos")
+                max_scrolls = 0
+
         for i in range(max_scrolls):
             count_before_scroll = len(self.url_extractor.all_status_urls)
             
-            # Scroll más gradual para cargar mejor las imágenes
-            await self.page.evaluate("window.scrollBy(0, window.innerHeight * 0.7)")
-            
-            # Espera orgánica entre scrolls para simular comportamiento humano
-            scroll_delay = self._get_organic_scroll_delay()
-            await asyncio.sleep(scroll_delay)
-            
-            # Esperar a que se carguen las imágenes
-            try:
-                await self.page.wait_for_selector('img[src*="pbs.twimg.com"]', timeout=5000)
-            except:
-                pass  # Continuar si no hay imágenes nuevas
+            # El ritmo lo marca la llegada de contenido, con un intervalo mínimo entre pasos
+            signal = await self._scroll_step()
             
             await self.url_extractor.extract_all_status_urls()
             
             count_after_scroll = len(self.url_extractor.all_status_urls)
             new_urls_this_scroll = count_after_scroll - count_before_scroll
+            if on_new_statuses and new_urls_this_scroll:
+                await on_new_statuses(self.url_extractor.all_status_urls[count_before_scroll:count_after_scroll])
             
             # Contar URLs realmente nuevas (no cacheadas) si tenemos cache disponible
             if target_new_urls is not None and self.cache_manager and self.username:
@@ -99,20 +154,31 @@ class ScrollManager:
             else:
                 Logger.info(f"Scroll {i+1}/{max_scrolls}: +{new_urls_this_scroll} URLs nuevas (total acumulado: {count_after_scroll})")
 
-            if new_urls_this_scroll == 0:
+            if incremental:
+                archived_run = self._update_archived_run(
+                    self.url_extractor.all_status_urls[count_before_scroll:count_after_scroll],
+                    high_water_mark, archived_run
+                )
+                if archived_run >= INCREMENTAL_STOP_RUN:
+                    self.reached_high_water_mark = True
+                    Logger.success(f"🔖 Alcanzados {archived_run} status ya archivados seguidos, terminando scroll incremental")
+                    break
+
+            if signal == "end" and new_urls_this_scroll == 0:
+                self.reached_end = True
+                Logger.success("Final del timeline: sin loader y la página ya no crece, terminando scroll")
+                break
+
+            # Los pasos que solo recorren contenido ya visto no cuentan como vacíos
+            if new_urls_this_scroll == 0 and signal != "idle":
                 scrolls_without_new_content += 1
-            else:
+            elif new_urls_this_scroll > 0:
                 scrolls_without_new_content = 0
 
             if self._should_stop_scrolling(scrolls_without_new_content):
+                self.reached_end = True
                 Logger.success("No se encontraron más URLs nuevas, terminando scroll")
                 break
-                
-            # Pausa adicional cada 3 scrolls para estabilización con comportamiento más orgánico
-            if (i + 1) % 3 == 0:
-                stabilization_delay = random.uniform(3.5, 6.0)  # 3.5-6 segundos
-                Logger.info(f"Pausa de estabilización después de {i+1} scrolls: {stabilization_delay:.2f}s...")
-                await asyncio.sleep(stabilization_delay)
         
         total_urls_extracted = len(self.url_extractor.all_status_urls) - initial_count
         if target_new_urls is not None and self.cache_manager and self.username:
@@ -120,23 +186,43 @@ class ScrollManager:
         else:
             Logger.info(f"Resumen scroll: {total_urls_extracted} URLs nuevas agregadas en total")
         
-        # Pausa final orgánica para que todas las imágenes se carguen completamente
-        final_delay = random.uniform(2.5, 4.0)
-        Logger.info(f"Pausa final para cargar todas las imágenes: {final_delay:.2f}s...")
-        await asyncio.sleep(final_delay)
-        
         final_count = len(self.url_extractor.all_status_urls)
         Logger.success(f"Proceso de scroll finalizado. Total de URLs extraídas: {final_count}")
 
+    def _get_high_water_mark(self):
+        """Marca de agua del usuario en el cache (None si no hay cache o marca)."""
+        if not self.cache_manager or not self.username:
+            return None
+        return self.cache_manager.get_high_water_mark(self.username)
+
+    def _update_archived_run(self, urls_batch: list, high_water_mark, run: int) -> int:
+        """
+        Actualiza la racha de status seguidos ya archivados con un lote en orden
+        de página. Un status es archivado si no supera la marca de agua o, sin
+        marca, si ya está en cache. Un tweet fijado antiguo solo suma uno: el
+        siguiente status nuevo reinicia la racha.
+        """
+        for url_item in urls_batch:
+            status_id = url_item.get('status_id') or self._extract_status_id(url_item.get('url', ''))
+            if not status_id.isdigit():
+                continue
+            if high_water_mark is not None:
+                archived = int(status_id) <= high_water_mark
+            else:
+                archived = bool(self.cache_manager and self.username and
+                                self.cache_manager.is_status_cached(self.username, status_id))
+            run = run + 1 if archived else 0
+        return run
+
     def _count_uncached_urls(self, urls_batch: list) -> int:
         """Cuenta cuántas URLs del lote NO están en cache."""
         if not self.cache_manager or not self.username:
             return len(urls_batch)  # Si no hay cache, todas son nuevas
         
+        # is_status_cached consulta primero el índice de status compartido del proceso
         uncached_count = 0
         for url_item in urls_batch:
-            url = url_item.get('url', '')
-            status_id = self._extract_status_id(url)
+            status_id = url_item.get('status_id') or self._extract_status_id(url_item.get('url', ''))
             if status_id and not self.cache_manager.is_status_cached(self.username, status_id):
                 uncached_count += 1
         
@@ -0,0 +1,325 @@
+"""
+Módulo con el almacén compacto de los status extraídos del timeline.
+
+URLExtractor guardaba cada status como un diccionario (URLs completas, fecha
+ISO, hasta 200 caracteres de texto, src de las fotos...) y además dos
+conjuntos de strings para descartar duplicados, todo en memoria hasta el
+final de la ejecución. En un backfill de decenas de miles de status eso crece
+sin techo.
+
+Aquí cada status es un StatusRecord con __slots__: ID int64, tipo de media
+como enum, autor y sufijo del enlace internados, y el texto en un archivo
+temporal aparte (solo se guarda su offset). StatusStore conserva el orden de
+página, responde a `status_id in store` con un StatusIndex y, cuando hay más
+de spill_threshold registros en memoria, vuelca los más antiguos a un archivo
+temporal en bloques de chunk_size. Los registros se siguen leyendo como los
+diccionarios anteriores (get, [], in, to_dict).
+"""
+import pickle
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ..config.constants import STATUS_STORE_CHUNK_SIZE, STATUS_STORE_SPILL_THRESHOLD
+from ..utils.status_index import StatusIndex
+
+MEDIA_TYPES = ("image", "video")  # Enum del tipo de media: el registro guarda el índice
+MEDIA_KIND_CODES = {"photo": "p", "video": "v", "gif": "g"}
+_MEDIA_KIND_NAMES = {code: name for name, code in MEDIA_KIND_CODES.items()}
+NO_TEXT = "Sin texto"
+X_BASE_URL = "https://x.com"
+
+_MISSING = object()
+
+
+class StatusRecord:
+    """
+    Status extraído del timeline. Se crea con StatusStore.add y se lee como el
+    diccionario que devolvía URLExtractor: url, status_id, username,
+    original_link, media_type, tweet_text, found_at, position, image_srcs,
+    carousel_size, media_kinds, media_count y media_exact. Las claves que se
+    añaden después (p. ej. video_variants) se guardan en el almacén por ID, así
+    que se conservan aunque el registro se vuelque a disco.
+    """
+
+    __slots__ = ("id", "media_type_code", "author", "link_suffix", "text_offset", "text_length",
+                 "found_at_ts", "position", "image_srcs", "carousel_size", "media_kind_codes",
+                 "media_exact", "_store")
+
+    _STATE = __slots__[:-1]  # Lo que se vuelca a disco (sin la referencia al almacén)
+
+    def __getstate__(self) -> tuple:
+        return tuple(getattr(self, name) for name in self._STATE)
+
+    def __setstate__(self, state: tuple):
+        for name, value in zip(self._STATE, state):
+            setattr(self, name, value)
+        self._store = None
+
+    @property
+    def url(self) -> str:
+        return f"{X_BASE_URL}/{self.author}/status/{self.id}"
+
+    @property
+    def original_link(self) -> str:
+        # El sufijo es lo que sigue a la URL del post ('/photo/1', '') o, si el enlace no empieza por ella, el enlace entero
+        return self.link_suffix if self.link_suffix.startswith("http") else self.url + self.link_suffix
+
+    @property
+    def media_type(self) -> str:
+        return MEDIA_TYPES[self.media_type_code]
+
+    @property
+    def tweet_text(self) -> str:
+        if self.text_length < 0 or self._store is None:
+            return NO_TEXT
+        return self._store.read_text(self.text_offset, self.text_length)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        getter = _FIELDS.get(key)
+        if getter is not None:
+            return getter(self)
+        extras = self._store.extras_of(self.id) if self._store is not None else None
+        return extras.get(key, default) if extras else default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELDS:
+            raise KeyError(f"'{key}' es un campo fijo del status")
+        if self._store is None:
+            raise KeyError(f"El status {self.id} no pertenece a ningún almacén")
+        self._store.set_extra(self.id, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in _FIELDS or self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> List[str]:
+        extras = self._store.extras_of(self.id) if self._store is not None else None
+        return list(_FIELDS) + list(extras or ())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Diccionario equivalente (el formato del JSON de resultados)."""
+        return {key: self.get(key) for key in self.keys()}
+
+    def __repr__(self) -> str:
+        return f"StatusRecord({self.id}, {self.media_type}, @{self.author})"
+
+
+_FIELDS = {
+    "url": lambda record: record.url,
+    "status_id": lambda record: str(record.id),
+    "username": lambda record: record.author,
+    "original_link": lambda record: record.original_link,
+    "media_type": lambda record: record.media_type,
+    "tweet_text": lambda record: record.tweet_text,
+    "found_at": lambda record: datetime.fromtimestamp(record.found_at_ts).isoformat(),
+    "position": lambda record: record.position,
+    "image_srcs": lambda record: list(record.image_srcs),
+    "carousel_size": lambda record: record.carousel_size,
+    "media_kinds": lambda record: [_MEDIA_KIND_NAMES[code] for code in record.media_kind_codes],
+    "media_count": lambda record: len(record.media_kind_codes),
+    "media_exact": lambda record: record.media_exact,
+}
+
+
+class StatusStore:
+    """
+    Lista ordenada de StatusRecord, sin duplicados por status ID, que vuelca
+    a un archivo temporal los registros más antiguos. Admite len, iteración,
+    índices y slices como la lista anterior; los slices de la cola reciente
+    (lo que piden ScrollManager y el pipeline) no tocan el disco.
+
+    Uso:
+        store = StatusStore()
+        record = store.add("1790000000000000000", "usuario", "image", "https://x.com/usuario/status/1790000000000000000/photo/1")
+        "1790000000000000000" in store  # -> True
+    """
+
+    def __init__(self, spill_threshold: int = STATUS_STORE_SPILL_THRESHOLD,
+                 chunk_size: int = STATUS_STORE_CHUNK_SIZE):
+        self.spill_threshold = max(1, spill_threshold)
+        self.chunk_size = max(1, min(chunk_size, self.spill_threshold))
+        self._ids = array("q")  # Status IDs en orden de página
+        self._index = StatusIndex()
+        self._tail: List[StatusRecord] = []  # Registros en memoria (los más recientes)
+        self._chunks: List[Tuple[int, int, int]] = []  # (offset, bytes, registros) de cada bloque en disco
+        self._spilled = 0
+        self._counts = [0] * len(MEDIA_TYPES)
+        self._extras: Dict[int, Dict[str, Any]] = {}
+        self._records_file = None
+        self._text_file = None
+        self._text_size = 0
+        self._loaded_chunk: Tuple[int, List[StatusRecord]] = (-1, [])
+
+    def add(self, status_id, author: str, media_type: str, link: str, tweet_text: Optional[str] = None,
+            image_srcs: Iterable[str] = (), carousel_size: int = 0, media_kinds: Iterable[str] = (),
+            media_exact: bool = False) -> Optional[StatusRecord]:
+        """Añade un status al final. Devuelve el registro, o None si el ID ya estaba."""
+        value = int(status_id)
+        if value in self._index:
+            return None
+
+        record = StatusRecord()
+        record.id = value
+        record.media_type_code = MEDIA_TYPES.index(media_type)
+        record.author = sys.intern(author)
+        post_url = f"{X_BASE_URL}/{author}/status/{value}"
+        record.link_suffix = sys.intern(link[len(post_url):] if link.startswith(post_url) else link)
+        if tweet_text and tweet_text != NO_TEXT:
+            record.text_offset, record.text_length = self._write_text(tweet_text)
+        else:
+            record.text_offset, record.text_length = -1, -1
+        record.found_at_ts = time.time()
+        record.position = len(self._ids) + 1
+        record.image_srcs = tuple(image_srcs)
+        record.carousel_size = carousel_size
+        record.media_kind_codes = sys.intern("".join(MEDIA_KIND_CODES.get(kind, "p") for kind in media_kinds))
+        record.media_exact = bool(media_exact)
+        record._store = self
+
+        self._ids.append(value)
+        self._index.add(value)
+        self._counts[record.media_type_code] += 1
+        self._tail.append(record)
+        if len(self._tail) > self.spill_threshold:
+            self._spill()
+        return record
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        return len(self._ids) > 0
+
+    def __contains__(self, status_id) -> bool:
+        return status_id in self._index
+
+    def __iter__(self) -> Iterator[StatusRecord]:
+        for chunk in range(len(self._chunks)):
+            yield from self._load_chunk(chunk)
+        yield from list(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self._ids))
+            if step == 1 and start >= self._spilled:
+                return self._tail[start - self._spilled:stop - self._spilled]
+            return [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self._ids)
+        if not 0 <= index < len(self._ids):
+            raise IndexError("StatusStore index out of range")
+        if index >= self._spilled:
+            return self._tail[index - self._spilled]
+        chunk, offset = divmod(index, self.chunk_size)
+        return self._load_chunk(chunk)[offset]
+
+    def merge_images(self, status_id, image_srcs: Iterable[str]) -> bool:
+        """
+        Añade src de fotos que llegaron después de capturar el status (ver
+        timeline_scripts). Se busca desde el final de la cola en memoria; los
+        registros ya volcados a disco no se actualizan.
+        Returns: True si el registro cambió.
+        """
+        value = int(status_id)
+        if value not in self._index:
+            return False
+        for record in reversed(self._tail):
+            if record.id != value:
+                continue
+            new_srcs = [src for src in dict.fromkeys(image_srcs) if src not in record.image_srcs]
+            if not new_srcs:
+                return False
+            record.image_srcs += tuple(new_srcs)
+            extra_photos = len(record.image_srcs) - record.carousel_size
+            if extra_photos > 0:
+                photos = record.media_kind_codes.count("p")
+                record.media_kind_codes = sys.intern(
+                    record.media_kind_codes[:photos] + "p" * extra_photos + record.media_kind_codes[photos:]
+                )
+                record.carousel_size = len(record.image_srcs)
+            return True
+        return False
+
+    def status_ids(self) -> Iterator[str]:
+        """Status IDs en orden de página, sin leer los registros volcados."""
+        return (str(value) for value in self._ids)
+
+    def count(self, media_type: str) -> int:
+        """Número de status de un tipo de media ('image' o 'video')."""
+        return self._counts[MEDIA_TYPES.index(media_type)]
+
+    def of_type(self, media_type: str) -> Iterator[StatusRecord]:
+        """Status de un tipo de media, en orden de página."""
+        code = MEDIA_TYPES.index(media_type)
+        return (record for record in self if record.media_type_code == code)
+
+    @property
+    def spilled(self) -> int:
+        """Registros volcados a disco."""
+        return self._spilled
+
+    def extras_of(self, status_id: int) -> Optional[Dict[str, Any]]:
+        return self._extras.get(status_id)
+
+    def set_extra(self, status_id: int, key: str, value: Any):
+        self._extras.setdefault(status_id, {})[key] = value
+
+    def read_text(self, offset: int, length: int) -> str:
+        if self._text_file is None:  # Almacén cerrado
+            return NO_TEXT
+        self._text_file.seek(offset)
+        return self._text_file.read(length).decode("utf-8")
+
+    def _write_text(self, text: str) -> Tuple[int, int]:
+        if self._text_file is None:
+            self._text_file = tempfile.TemporaryFile(prefix="x_status_text_")
+        data = text.encode("utf-8")
+        offset = self._text_size
+        self._text_file.seek(offset)
+        self._text_file.write(data)
+        self._text_size += len(data)
+        return offset, len(data)
+
+    def _spill(self):
+        """Vuelca a disco el bloque más antiguo de la cola en memoria."""
+        if self._records_file is None:
+            self._records_file = tempfile.TemporaryFile(prefix="x_status_records_")
+        chunk = self._tail[:self.chunk_size]
+        data = pickle.dumps([record.__getstate__() for record in chunk], protocol=pickle.HIGHEST_PROTOCOL)
+        self._records_file.seek(0, 2)
+        offset = self._records_file.tell()
+        self._records_file.write(data)
+        self._chunks.append((offset, len(data), len(chunk)))
+        self._spilled += len(chunk)
+        del self._tail[:self.chunk_size]
+
+    def _load_chunk(self, chunk: int) -> List[StatusRecord]:
+        """Lee un bloque volcado (se conserva el último leído para los accesos seguidos)."""
+        if self._loaded_chunk[0] == chunk:
+            return self._loaded_chunk[1]
+        offset, size, _ = self._chunks[chunk]
+        self._records_file.seek(offset)
+        records = []
+        for state in pickle.loads(self._records_file.read(size)):
+            record = StatusRecord.__new__(StatusRecord)
+            record.__setstate__(state)
+            record._store = self
+            records.append(record)
+        self._loaded_chunk = (chunk, records)
+        return records
+
+    def close(self):
+        """Cierra (y borra) los archivos temporales."""
+        for temp_file in (self._records_file, self._text_file):
+            if temp_file is not None:
+                temp_file.close()
+        self._records_file = self._text_file = None
@@ -0,0 +1,187 @@
+"""
+Módulo para capturar de forma pasiva las respuestas GraphQL del timeline.
+
+Al hacer scroll la propia página descarga el JSON del timeline (UserMedia,
+UserTweets...), que ya trae las imágenes, media keys y variantes de video de
+cada status. Escuchando page.on('response') se obtienen los mapeos exactos
+status -> [imágenes] y status -> [variantes de video] sin navegar a cada
+status, de modo que el Método 2 de ImageProcessor queda solo como respaldo.
+"""
+import asyncio
+import re
+from typing import Dict, List, Optional
+
+from ..utils.logging import Logger
+from ..utils.url_utils import URLUtils
+
+# Operaciones GraphQL cuyas respuestas contienen tweets con media
+TIMELINE_OPERATIONS = (
+    "UserMedia", "UserTweets", "UserTweetsAndReplies", "UserHighlightsTweets",
+    "TweetDetail", "TweetResultByRestId", "HomeTimeline", "HomeLatestTimeline",
+)
+_TIMELINE_URL = re.compile(r"/graphql/[^/]+/(%s)(?:\?|$)" % "|".join(TIMELINE_OPERATIONS))
+_MEDIA_FILENAME = re.compile(r"pbs\.twimg\.com/media/([A-Za-z0-9_-]+)\.(\w+)")
+
+
+def is_timeline_response(url: str) -> bool:
+    """Indica si la URL corresponde a una respuesta GraphQL de timeline con tweets."""
+    return bool(_TIMELINE_URL.search(url or ""))
+
+
+def photo_url(media_url_https: str) -> Optional[str]:
+    """Convierte media_url_https (.../media/KEY.jpg) al formato de imagen del proyecto."""
+    match = _MEDIA_FILENAME.search(media_url_https or "")
+    if not match:
+        return None
+    media_key, extension = match.groups()
+    return URLUtils.clean_image_url_robust(f"https://pbs.twimg.com/media/{media_key}?format={extension}")
+
+
+class TimelineResponseCollector:
+    """
+    Acumula los mapeos de media que llegan en las respuestas del timeline.
+
+    Uso:
+        collector = TimelineResponseCollector()
+        collector.attach(page)          # antes de navegar al perfil
+        ...scroll...
+        await collector.wait_idle()     # procesar las respuestas pendientes
+        collector.images_for(status_id)
+    """
+
+    def __init__(self):
+        self.image_mappings: Dict[str, List[str]] = {}  # status_id -> [imágenes en orden]
+        self.video_variants: Dict[str, List[Dict]] = {}  # status_id -> [{url, bitrate, content_type}]
+        self.authors: Dict[str, str] = {}  # status_id -> screen_name
+        self.media_authors: Dict[str, str] = {}  # status_id -> autor de la media (el del original en retweets)
+        self.responses_parsed = 0
+        self._pending: set = set()
+
+    # --- Integración con Playwright ---
+
+    def attach(self, page):
+        """Empieza a escuchar las respuestas de la página."""
+        page.on("response", self._on_response)
+
+    def detach(self, page):
+        """Deja de escuchar las respuestas de la página."""
+        page.remove_listener("response", self._on_response)
+
+    def _on_response(self, response):
+        if not is_timeline_response(response.url):
+            return
+        task = asyncio.ensure_future(self._read_response(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read_response(self, response):
+        try:
+            payload = await response.json()
+        except Exception as e:
+            # Respuestas canceladas al navegar o cuerpos no JSON: el DOM sigue de respaldo
+            Logger.warning(f"   ⚠️  Respuesta de timeline no legible: {e}")
+            return
+        self.ingest(payload)
+
+    async def wait_idle(self):
+        """Espera a que se procesen las respuestas ya recibidas."""
+        pending = [task for task in self._pending if not task.done()]
+        while pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            pending = [task for task in self._pending if not task.done()]
+
+    # --- Análisis del JSON ---
+
+    def ingest(self, payload) -> int:
+        """
+        Extrae los tweets con media de una respuesta GraphQL.
+        Returns: número de status con media encontrados en la respuesta
+        """
+        found = 0
+        stack = [payload]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, list):
+                stack.extend(reversed(node))
+                continue
+            if not isinstance(node, dict):
+                continue
+            legacy = node.get("legacy")
+            if isinstance(legacy, dict) and (node.get("rest_id") or legacy.get("id_str")) and "full_text" in legacy:
+                found += self._add_tweet(node, legacy)
+            # Los tweets anidados (retweets, citas, TweetWithVisibilityResults) también se recorren
+            stack.extend(reversed(list(node.values())))
+        self.responses_parsed += 1
+        return found
+
+    def _add_tweet(self, tweet: Dict, legacy: Dict) -> int:
+        status_id = str(legacy.get("id_str") or tweet.get("rest_id"))
+        media = (legacy.get("extended_entities") or legacy.get("entities") or {}).get("media") or []
+        images, variants = [], []
+        for item in media:
+            if item.get("type") == "photo":
+                url = photo_url(item.get("media_url_https", ""))
+                if url and url not in images:
+                    images.append(url)
+            elif item.get("type") in ("video", "animated_gif"):
+                for variant in (item.get("video_info") or {}).get("variants", []):
+                    variants.append({
+                        "url": variant.get("url"),
+                        "bitrate": variant.get("bitrate", 0),
+                        "content_type": variant.get("content_type", ""),
+                    })
+        if not images and not variants:
+            return 0
+
+        if images:
+            self.image_mappings[status_id] = images
+        if variants:
+            # Primero los MP4 de mayor bitrate; el manifiesto HLS al final
+            variants.sort(key=lambda v: (v["content_type"] != "video/mp4", -(v["bitrate"] or 0)))
+            self.video_variants[status_id] = variants
+        author = self._screen_name(tweet)
+        if author:
+            self.authors[status_id] = author
+        # Un retweet repite la media del original: pertenece al autor del original
+        original = ((legacy.get("retweeted_status_result") or {}).get("result")) or {}
+        original = original.get("tweet") or original  # TweetWithVisibilityResults
+        media_author = self._screen_name(original) if original else author
+        if media_author:
+            self.media_authors[status_id] = media_author
+        return 1
+
+    @staticmethod
+    def _screen_name(tweet: Dict) -> Optional[str]:
+        user = ((tweet.get("core") or {}).get("user_results") or {}).get("result") or {}
+        return (user.get("core") or {}).get("screen_name") or (user.get("legacy") or {}).get("screen_name")
+
+    # --- Consultas ---
+
+    def images_for(self, status_id: str, author: str = None) -> List[str]:
+        """
+        Imágenes del status en orden de carrusel (lista vacía si no llegó en
+        ninguna respuesta). Con `author` solo se devuelven si la media es de ese
+        usuario, igual que el filtro de los Métodos 1 y 2: los retweets y los
+        tweets citados de otras cuentas no se mapean al perfil.
+        """
+        status_id = str(status_id)
+        if author and (self.media_authors.get(status_id) or "").lower() != author.lower():
+            return []
+        return list(self.image_mappings.get(status_id, []))
+
+    def best_video_url(self, status_id: str) -> Optional[str]:
+        """URL MP4 de mayor calidad del status, si la hay."""
+        for variant in self.video_variants.get(str(status_id), []):
+            if variant["content_type"] == "video/mp4" and variant["url"]:
+                return variant["url"]
+        return None
+
+    def annotate_videos(self, status_items: List[Dict]) -> int:
+        """Añade 'video_variants' a los status de video con variantes capturadas. Returns: status anotados."""
+        annotated = 0
+        for item in status_items:
+            variants = self.video_variants.get(str(item.get('status_id', '')))
+            if item.get('media_type') == 'video' and variants:
+                item['video_variants'] = variants
+                annotated += 1
+        return annotated
@@ -0,0 +1,197 @@
+"""
+Módulo con los scripts que se ejecutan dentro de la página del timeline.
+
+La lectura del DOM se hace dentro de la página: un MutationObserver extrae
+un registro compacto por cada status insertado en el timeline y Python solo
+vacía esa cola con un page.evaluate por scroll, en lugar de varias llamadas
+CDP por enlace (get_attribute, consultas xpath de ancestros, text_content...).
+
+Cada registro tiene la forma:
+    {"href", "id", "author", "text", "kind", "images", "carousel",
+     "media_kinds", "media_count", "media_exact"}
+donde kind es 'video' o 'image', images son los src de pbs.twimg.com/media de
+los enlaces /photo/N del status, carousel el número de fotos enlazadas y
+media_kinds la lista de piezas de media ('photo', 'video' o 'gif').
+media_exact indica que el status se leyó dentro de su artículo completo; en la
+cuadrícula de Multimedia solo se ve la primera pieza y el recuento es un mínimo.
+
+X rellena el src de las fotos después de insertar el enlace. Si el src llega
+cuando el status ya se capturó, se añade al registro todavía en cola o, si
+Python ya lo vació, se encola una actualización {"id", "update": true, "images"}.
+"""
+
+# Longitud máxima del texto enviado a Python: _create_media_data_item lo recorta a 200 + "..."
+TEXT_LIMIT = 201
+
+# Función JS (root, seen) -> registros de los status de `root` que no están en `seen`.
+# Agrupa todos los enlaces de un mismo status: el enlace de media (/photo/N o /video/N)
+# tiene preferencia como href y las fotos se atribuyen al status al que enlazan,
+# de modo que un tweet citado no se mezcla con el tweet que lo cita.
+COLLECT_RECORDS_JS = """
+(root, seen) => {
+    const pattern = /^(?:https?:\\/\\/[^\\/]+)?\\/([^\\/?#]+)\\/status\\/(\\d+)(\\/[^?#]*)?/;
+    const byId = new Map();
+    // Reproductores del tweet (no de un tweet citado): 'gif' si el póster es de tweet_video_thumb
+    const playersOf = (container) => Array.from(container.querySelectorAll('video'))
+        .filter((video) => !video.parentElement.closest('[role="link"]'))
+        .map((video) => ((video.poster || '') + (video.src || '')).includes('tweet_video') ? 'gif' : 'video');
+    for (const link of root.querySelectorAll('a[href*="/status/"]')) {
+        const href = link.getAttribute('href');
+        const match = href && href.match(pattern);
+        if (!match || seen.has(match[2])) continue;
+        const [, author, id, rest] = match;
+        let record = byId.get(id);
+        if (!record) {
+            const container = link.closest('article, [data-testid="tweet"]');
+            const textElement = container && container.querySelector('[data-testid="tweetText"]');
+            const text = textElement ? (textElement.textContent || '').slice(0, %(text_limit)d) : '';
+            const players = container && !link.closest('[role="link"]') ? playersOf(container) : [];
+            record = {href, id, author, text, kind: 'image', images: [], photos: new Set(), videos: new Set(),
+                      players, exact: !!container};
+            byId.set(id, record);
+        }
+        const suffix = rest || '';
+        if (suffix.startsWith('/video/')) {
+            record.kind = 'video';
+            record.href = href;
+            record.videos.add(suffix.split('/')[2]);
+        } else if (suffix.startsWith('/photo/')) {
+            if (!record.photos.size && record.kind !== 'video') record.href = href;
+            record.photos.add(suffix.split('/')[2]);
+            for (const img of link.querySelectorAll('img[src*="pbs.twimg.com/media"]')) {
+                if (!record.images.includes(img.src)) record.images.push(img.src);
+            }
+        }
+    }
+    return Array.from(byId.values(), ({photos, videos, players, exact, ...record}) => {
+        const carousel = Math.max(photos.size, record.images.length);
+        const mediaKinds = Array(carousel).fill('photo').concat(players);
+        for (let i = players.length; i < videos.size; i++) mediaKinds.push('video');
+        // Un status con reproductores y sin fotos no tiene imágenes que navegar
+        const kind = !carousel && players.length ? 'video' : record.kind;
+        return {...record, kind, carousel, media_kinds: mediaKinds, media_count: mediaKinds.length,
+                media_exact: exact};
+    });
+}
+""" % {"text_limit": TEXT_LIMIT}
+
+# Script de inicio (page.add_init_script) que instala un MutationObserver en el
+# timeline. El timeline de X está virtualizado: los artículos se insertan y se
+# reciclan al hacer scroll, así que cada artículo se lee en cuanto aparece y su
+# registro queda en una cola de la página hasta que Python la vacía. El
+# documento completo solo se recorre una vez, para el contenido anterior a la
+# instalación. Es idempotente: evaluarlo de nuevo en la misma página no hace nada.
+# Es una función para page.evaluate; como script de inicio se usa OBSERVER_INIT_SCRIPT.
+OBSERVER_SCRIPT = """
+() => {
+    if (window.__xmaTimeline) return;
+    const collect = %(collect)s;
+    const timeline = window.__xmaTimeline = {seen: new Set(), queue: [], queued: new Map(), synced: false,
+                                             scanned: false};
+    timeline.capture = (root) => {
+        for (const record of collect(root, timeline.seen)) {
+            timeline.seen.add(record.id);
+            timeline.queue.push(record);
+            timeline.queued.set(record.id, record);
+        }
+    };
+    // Foto cuyo src llegó después de capturar su status (X lo rellena tras insertar el enlace)
+    const photoPattern = /\\/status\\/(\\d+)\\/photo\\//;
+    timeline.merge = (img) => {
+        const link = img.src && img.src.includes('pbs.twimg.com/media') && img.closest('a[href*="/status/"]');
+        const match = link && (link.getAttribute('href') || '').match(photoPattern);
+        if (!match || !timeline.seen.has(match[1])) return;
+        const record = timeline.queued.get(match[1]);
+        if (!record) {
+            timeline.queue.push({id: match[1], update: true, images: [img.src]});
+        } else if (!record.images.includes(img.src)) {
+            record.images.push(img.src);
+            if (record.images.length > record.carousel) {
+                record.media_kinds.splice(record.carousel, 0, 'photo');
+                record.carousel += 1;
+                record.media_count = record.media_kinds.length;
+            }
+        }
+    };
+    const imagesOf = (node) => node.matches('img') ? [node] : node.querySelectorAll('img[src*="pbs.twimg.com/media"]');
+    const rootOf = (node) => {
+        if (node.nodeType !== Node.ELEMENT_NODE) return null;
+        return node.closest('article') || (node.matches('a') ? node.parentElement : node);
+    };
+    timeline.observer = new MutationObserver((mutations) => {
+        for (const mutation of mutations) {
+            const nodes = mutation.type === 'attributes' ? [mutation.target] : mutation.addedNodes;
+            for (const node of nodes) {
+                if (mutation.attributeName === 'src') {
+                    timeline.merge(node);
+                    continue;
+                }
+                const root = rootOf(node);
+                if (!root) continue;
+                timeline.capture(root);
+                for (const img of imagesOf(node)) timeline.merge(img);
+            }
+        }
+    });
+    const start = () => timeline.observer.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true, attributeFilter: ['href', 'src'],
+    });
+    if (document.documentElement) start();
+    else document.addEventListener('readystatechange', start, {once: true});
+}
+""" % {"collect": COLLECT_RECORDS_JS.strip()}
+OBSERVER_INIT_SCRIPT = "(%s)();" % OBSERVER_SCRIPT.strip()
+
+# Vacía la cola del observer en un solo round trip. Devuelve null si el observer
+# no está instalado o si la página es nueva (tras una navegación) y aún no
+# conoce los IDs que ya tiene Python; en ese caso se reenvían con `known`.
+DRAIN_SCRIPT = """
+(known) => {
+    const timeline = window.__xmaTimeline;
+    if (!timeline || (known === null && !timeline.synced)) return null;
+    for (const id of known || []) timeline.seen.add(id);
+    timeline.synced = true;
+    if (!timeline.scanned) {
+        timeline.scanned = true;
+        timeline.capture(document);
+    }
+    timeline.queued.clear();
+    return timeline.queue.splice(0);
+}
+"""
+
+# Da un paso de scroll y devuelve la altura de la página antes del paso.
+# Reinicia el reloj de calma que usa CONTENT_SIGNAL_SCRIPT.
+SCROLL_STEP_SCRIPT = """
+(ratio) => {
+    const root = document.scrollingElement || document.documentElement;
+    const previousHeight = root.scrollHeight;
+    window.scrollBy(0, window.innerHeight * ratio);
+    window.__xmaLastHeight = previousHeight;
+    window.__xmaQuietSince = Date.now();
+    return previousHeight;
+}
+"""
+
+# Condición para page.wait_for_function tras un scroll:
+#   'content' en cuanto el observer tiene artículos nuevos en cola;
+#   'end' al final de la página, sin loader y sin crecer durante stableMs;
+#   'idle' si el paso solo recorrió contenido ya visto (calma durante settleMs).
+CONTENT_SIGNAL_SCRIPT = """
+({previousHeight, stableMs, settleMs}) => {
+    const timeline = window.__xmaTimeline;
+    if (timeline && timeline.queue.length) return 'content';
+    const root = document.scrollingElement || document.documentElement;
+    const height = root.scrollHeight;
+    const now = Date.now();
+    if (document.querySelector('[role="progressbar"]') || height !== window.__xmaLastHeight) {
+        window.__xmaLastHeight = height;
+        window.__xmaQuietSince = now;
+        return false;
+    }
+    const quiet = now - window.__xmaQuietSince;
+    const atBottom = window.scrollY + window.innerHeight >= height - 2;
+    if (atBottom && height === previousHeight) return quiet >= stableMs ? 'end' : false;
+    return quiet >= settleMs ? 'idle' : false;
+}
+"""
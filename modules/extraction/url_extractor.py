@@ -1,23 +1,20 @@
 """
 Módulo para la extracción de URLs de status desde la página.
 """
-import re
-from datetime import datetime
 from playwright.async_api import Page
-from ..utils.url_utils import URLUtils
 from ..utils.logging import Logger
+from .status_store import NO_TEXT, StatusRecord, StatusStore
+from .timeline_scripts import DRAIN_SCRIPT, OBSERVER_INIT_SCRIPT, OBSERVER_SCRIPT
 
 class URLExtractor:
     """
     Extrae y gestiona las URLs de status (tweets) encontradas en la página.
-    Mantiene el estado de las URLs procesadas para evitar duplicados.
+    Los status se guardan en un StatusStore (registros compactos en orden de
+    página, sin duplicados por ID, con volcado a disco en timelines largos).
     """
     def __init__(self, page: Page):
         self.page = page
-        # Inicializar conjuntos de control como en la versión original
-        self.all_status_urls: list[dict] = []
-        self.processed_status_ids: set[str] = set()
-        self.unique_urls: set[str] = set()
+        self.all_status_urls = StatusStore()
         # Cache info para verificar URLs nuevas
         self.cache_manager = None
         self.username = None
@@ -31,83 +28,89 @@ class URLExtractor:
         """
         Busca en la página todos los enlaces que parecen ser de status,
         los procesa y los añade a la lista si no han sido vistos antes.
+        Solo se leen los status que el observer del timeline capturó desde la
+        última llamada (ver timeline_scripts), así que cada scroll paga por lo nuevo.
         """
         Logger.info("Buscando enlaces de status en la página...")
         
-        try:
-            await self.page.wait_for_selector('a[href*="/status/"], article, [data-testid="tweet"]', timeout=10000)
-        except Exception:
-            Logger.warning("No se encontró contenido")
-            return
+        if not self.all_status_urls:
+            try:
+                await self.page.wait_for_selector('a[href*="/status/"], article, [data-testid="tweet"]', timeout=10000)
+            except Exception:
+                Logger.warning("No se encontró contenido")
+                return
 
-        status_links = await self.page.query_selector_all('a[href*="/status/"]')
+        records = await self._harvest_records()
         new_urls_count = 0
         
-        Logger.info(f"Encontrados {len(status_links)} enlaces de status en esta página")
+        Logger.info(f"Encontrados {len(records)} status no vistos en esta página")
 
-        for link in status_links:
-            href = await link.get_attribute('href')
-            if not href:
-                continue
-
-            full_url = f"https://x.com{href}" if not href.startswith('http') else href
-            status_id = URLUtils.extract_status_id_from_url(full_url)
-
-            if status_id and status_id not in self.processed_status_ids:
-                self.processed_status_ids.add(status_id)
-                
-                username_match = re.search(r'x\.com/([^/]+)/', full_url)
-                username = username_match.group(1) if username_match else "milewskaja_nat"
-                
-                post_url = f"https://x.com/{username}/status/{status_id}"
-
-                if post_url not in self.unique_urls:
-                    self.unique_urls.add(post_url)
-                    
-                    # Intentar obtener contexto del tweet
-                    tweet_text = await self._extract_tweet_text(link)
-                    
-                    media_data = self._create_media_data_item(full_url, status_id, username, tweet_text)
-                    self.all_status_urls.append(media_data)
-                    new_urls_count += 1
-                    
-                    # Logging detallado - verificar si está en cache
-                    media_type = media_data['media_type']
-                    is_cached = self._is_url_cached(status_id)
-                    cache_status = "📀 (ya en cache)" if is_cached else "🆕 (nueva)"
-                    Logger.info(f"URL {len(self.all_status_urls)}: {post_url} ({media_type}) {cache_status}")
+        for record in records:
+            if self._add_record(record):
+                new_urls_count += 1
         
         if new_urls_count > 0:
             Logger.success(f"Se agregaron {new_urls_count} nuevas URLs de status. Total: {len(self.all_status_urls)}")
 
-    def _create_media_data_item(self, href: str, status_id: str, username: str, tweet_text: str = "Sin texto") -> dict:
-        """Crea un diccionario estandarizado para una URL de media encontrada."""
-        media_type = "video" if '/video/1' in href else "image"
+    async def start_capture(self):
+        """
+        Instala el observer del timeline en la página actual y como script de
+        inicio, para que también capture desde el principio tras una recarga.
+        """
+        await self.page.add_init_script(OBSERVER_INIT_SCRIPT)
+        await self.page.evaluate(OBSERVER_SCRIPT)
+
+    async def _harvest_records(self) -> list[dict]:
+        """
+        Vacía en un solo round trip los registros capturados por el observer.
+        Si la página es nueva (o el observer no estaba instalado) se instala y
+        se le envían una vez los IDs que ya conoce Python.
+        """
+        records = await self.page.evaluate(DRAIN_SCRIPT, None)
+        if records is None:
+            await self.page.evaluate(OBSERVER_SCRIPT)
+            records = await self.page.evaluate(DRAIN_SCRIPT, list(self.all_status_urls.status_ids()))
+        return records or []
+
+    def _add_record(self, record: dict) -> bool:
+        """Añade el status de un registro de la página. Devuelve True si era nuevo."""
+        if record.get('update'):
+            # Fotos cuyo src llegó después de capturar el status
+            self.all_status_urls.merge_images(record.get('id'), record.get('images') or [])
+            return False
+        href = record.get('href')
+        status_id = record.get('id')
+        if not href or not status_id or status_id in self.all_status_urls:
+            return False
+
+        full_url = f"https://x.com{href}" if not href.startswith('http') else href
+        username = record.get('author') or "milewskaja_nat"
+        media_data = self._create_media_data_item(
+            full_url, status_id, username, record.get('text') or NO_TEXT, record.get('kind'), record
+        )
+        if media_data is None:
+            return False
         
-        return {
-            "url": f"https://x.com/{username}/status/{status_id}",
-            "status_id": status_id,
-            "username": username,
-            "original_link": href,
-            "media_type": media_type,
-            "tweet_text": tweet_text[:200] + "..." if len(tweet_text) > 200 else tweet_text,
-            "found_at": datetime.now().isoformat(),
-            "position": len(self.all_status_urls) + 1
-        }
+        # Logging detallado - verificar si está en cache
+        is_cached = self._is_url_cached(status_id)
+        cache_status = "📀 (ya en cache)" if is_cached else "🆕 (nueva)"
+        Logger.info(f"URL {len(self.all_status_urls)}: {media_data.url} ({media_data.media_type}) {cache_status}")
+        return True
 
-    async def _extract_tweet_text(self, link_element) -> str:
-        """Extrae el texto del tweet del contenedor padre."""
-        try:
-            # Buscar el contenedor del tweet
-            tweet_container = await link_element.query_selector('xpath=ancestor::article') or await link_element.query_selector('xpath=ancestor::*[@data-testid="tweet"]')
-            if tweet_container:
-                text_element = await tweet_container.query_selector('[data-testid="tweetText"]')
-                if text_element:
-                    text_content = await text_element.text_content()
-                    return text_content or "Sin texto"
-        except Exception:
-            pass
-        return "Sin texto"
+    def _create_media_data_item(self, href: str, status_id: str, username: str, tweet_text: str = NO_TEXT,
+                                media_type: str = None, record: dict = None) -> StatusRecord:
+        """Añade al almacén el registro estandarizado de un status (None si ya estaba)."""
+        media_type = media_type or ("video" if '/video/1' in href else "image")
+        record = record or {}
+        
+        return self.all_status_urls.add(
+            status_id, username, media_type, href,
+            tweet_text[:200] + "..." if len(tweet_text) > 200 else tweet_text,
+            image_srcs=record.get('images', []),
+            carousel_size=record.get('carousel', 0),
+            media_kinds=record.get('media_kinds', []),
+            media_exact=record.get('media_exact', False)
+        )
     
     def _is_url_cached(self, status_id: str) -> bool:
         """Verifica si una URL está en cache."""
@@ -8,13 +8,22 @@ from pathlib import Path
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 
+from .cache_store import CacheStore, JSONCacheStore, SQLiteCacheStore, empty_cache_data
+from .cache_session import CacheSession
+from .status_index import StatusIndex, drop_status_index, get_status_index, peek_status_index
+from .media_index import MediaKeyIndex, MediaURLSet, image_list, media_key_for, normalize_mappings, preferred_status
+from .time_index import TimeBucketIndex
+from .url_utils import URLUtils
+from ..config.constants import (CACHE_BACKEND, CACHE_SQLITE_FILENAME, CACHE_ENTRY_TTL_DAYS,
+                                CACHE_NEGATIVE_RETRY_BASE_HOURS, CACHE_NEGATIVE_RETRY_MAX_DAYS)
+
 class CacheManager:
     """
     Gestiona el cache de posts procesados para cada usuario,
     permitiendo evitar reprocesamiento innecesario.
     """
     
-    def __init__(self, cache_dir: str = None):
+    def __init__(self, cache_dir: str = None, backend: str = None):
         if cache_dir is None:
             # Crear directorio de cache en el directorio del proyecto
             self.cache_dir = Path(__file__).parent.parent.parent / "cache"
@@ -22,65 +31,244 @@ class CacheManager:
             self.cache_dir = Path(cache_dir)
         
         self.cache_dir.mkdir(exist_ok=True)
-        self.cache_expiry_days = 7  # Cache válido por 7 días
+        # TTL por tipo de entrada (image/video/negative); None = no expira
+        self.entry_ttl_days = dict(CACHE_ENTRY_TTL_DAYS)
+        # Status con entradas caducadas pendientes de revalidar, por usuario (ordenados)
+        self._revalidation_queue: Dict[str, Dict[str, Dict]] = {}
+        
+        # Backend de almacenamiento: 'json' (un archivo por usuario) o 'sqlite'
+        self.backend = backend or CACHE_BACKEND
+        self.store = self._create_store(self.backend)
+        
+        # Sesiones en memoria abiertas por usuario (ver session())
+        self._sessions: Dict[str, CacheSession] = {}
+        # Índices inversos media key -> status por usuario (ver media_index())
+        self._media_indexes: Dict[str, MediaKeyIndex] = {}
+        # Índices por fecha (Snowflake) por usuario, se reconstruyen tras cada escritura
+        self._time_indexes: Dict[str, TimeBucketIndex] = {}
+        # Última versión del backend vista por usuario (ver _check_store_version)
+        self._store_versions: Dict[str, object] = {}
         
         # 🔄 Migrar caches antiguos del directorio raíz
         self._migrate_old_caches()
     
+    def _create_store(self, backend: str) -> CacheStore:
+        """Crea el backend de almacenamiento configurado."""
+        if backend == "sqlite":
+            return SQLiteCacheStore(self.cache_dir / CACHE_SQLITE_FILENAME)
+        if backend == "json":
+            return JSONCacheStore(self.cache_dir)
+        raise ValueError(f"Backend de cache desconocido: {backend}")
+    
+    def session(self, username: str) -> CacheSession:
+        """
+        Crea una sesión en memoria para el usuario. Mientras esté abierta, todas
+        las consultas se sirven desde memoria y las escrituras se vuelcan en
+        segundo plano en cada checkpoint() y al cerrar la sesión.
+        """
+        return self._sessions.get(username) or CacheSession(self, username)
+    
+    def checkpoint(self, username: str):
+        """Vuelca en segundo plano los cambios pendientes de la sesión del usuario."""
+        session = self._sessions.get(username)
+        if session:
+            session.checkpoint()
+    
+    def flush(self, username: str) -> int:
+        """
+        Vuelca de forma síncrona y durable los cambios pendientes de la sesión.
+        Sin sesión abierta las escrituras ya son inmediatas.
+        """
+        session = self._sessions.get(username)
+        return session.flush() if session else 0
+    
     def get_cache_file_path(self, username: str) -> Path:
-        """Obtiene la ruta del archivo de cache para un usuario."""
+        """Obtiene la ruta del archivo de cache JSON para un usuario."""
         return self.cache_dir / f"{username}_processed_posts.json"
     
+    def _ensure_imported(self, username: str):
+        """Con backend SQLite, importa una única vez el cache JSON existente del usuario."""
+        if not isinstance(self.store, SQLiteCacheStore):
+            return
+        json_file = self.get_cache_file_path(username)
+        if self.store.was_imported(username) or not JSONCacheStore(self.cache_dir).exists(username):
+            return
+        try:
+            imported = self.store.import_json_cache(username, json_file)
+            print(f"🔄 Cache JSON de {username} importado a SQLite: {imported} posts")
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"⚠️  Error importando cache JSON de {username}: {e}")
+    
+    def status_index(self, username: str) -> StatusIndex:
+        """
+        Índice de pertenencia de status procesados del usuario, compartido en el
+        proceso. Se construye la primera vez desde el cache y se mantiene al día
+        con cada escritura; si otro proceso modifica el cache, se reconstruye.
+        """
+        self._check_store_version(username)
+        return get_status_index(
+            self._index_scope, username,
+            lambda: self.load_user_cache(username).get("processed_posts", {})
+        )
+    
+    def media_index(self, username: str) -> MediaKeyIndex:
+        """
+        Índice inverso media key -> status del usuario. Se construye una vez
+        desde status_to_image_mapping y se actualiza en cada escritura.
+        """
+        self._check_store_version(username)
+        index = self._media_indexes.get(username)
+        if index is None:
+            mappings = self.load_user_cache(username).get("status_to_image_mapping", {})
+            index = MediaKeyIndex(mappings)
+            self._media_indexes[username] = index
+        return index
+    
+    def time_index(self, username: str) -> TimeBucketIndex:
+        """
+        Índice por fecha de creación de los posts cacheados del usuario. Responde
+        rangos de fechas y conteos mensuales a partir de los status IDs, sin navegador.
+        """
+        self._check_store_version(username)
+        index = self._time_indexes.get(username)
+        if index is None:
+            index = TimeBucketIndex(self.load_user_cache(username).get("processed_posts", {}))
+            self._time_indexes[username] = index
+        return index
+    
+    def video_index(self, username: str, processed_posts: Dict = None) -> StatusIndex:
+        """
+        Índice compartido de los posts cuyo video ya se descargó (video_processed),
+        con la misma invalidación que status_index. `processed_posts` evita
+        volver a leer el cache si el llamador ya lo tiene cargado.
+        """
+        self._check_store_version(username)
+
+        def loader():
+            posts = processed_posts if processed_posts is not None else \
+                self.load_user_cache(username).get("processed_posts", {})
+            return (post_id for post_id, post in posts.items() if post.get("video_processed", False))
+
+        return get_status_index(self._video_index_scope, username, loader)
+    
+    def invalidate_indexes(self, username: str):
+        """Descarta los índices del usuario para que se reconstruyan desde el cache."""
+        drop_status_index(self._index_scope, username)
+        drop_status_index(self._video_index_scope, username)
+        self._media_indexes.pop(username, None)
+        self._time_indexes.pop(username, None)
+        self._store_versions[username] = self.store.version(username)
+    
+    def _check_store_version(self, username: str):
+        """
+        Fuera de una sesión, descarta los índices si el backend cambió desde la
+        última lectura o escritura de este proceso (p. ej. una ejecución del CLI
+        o video_selector.py mientras el servidor MCP sigue abierto).
+        """
+        if username in self._sessions:
+            return
+        if self.store.version(username) != self._store_versions.get(username):
+            self.invalidate_indexes(username)
+    
+    def note_store_written(self, username: str, version_before):
+        """
+        Registra como vista la versión del backend tras una escritura propia.
+        Si ya había cambios de otro proceso antes de escribir, no se registra
+        para que los índices se reconstruyan en la siguiente consulta.
+        """
+        if self._store_versions.get(username) == version_before:
+            self._store_versions[username] = self.store.version(username)
+    
+    @property
+    def _index_scope(self) -> str:
+        return f"processed:{self.cache_dir}"
+    
+    @property
+    def _video_index_scope(self) -> str:
+        return f"video_processed:{self.cache_dir}"
+    
     def load_user_cache(self, username: str) -> Dict:
         """Carga el cache de posts procesados para un usuario."""
-        cache_file = self.get_cache_file_path(username)
+        session = self._sessions.get(username)
+        if session:
+            return session.data
         
-        if not cache_file.exists():
-            return {
-                "last_updated": None,
-                "processed_posts": {},
-                "status_to_image_mapping": {}
-            }
+        self._ensure_imported(username)
+        
+        if not self.store.exists(username):
+            return empty_cache_data()
         
         try:
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            # Verificar si el cache ha expirado
-            if self._is_cache_expired(cache_data.get("last_updated")):
-                print(f"💡 Cache de {username} expirado, se regenerará")
-                return {
-                    "last_updated": None,
-                    "processed_posts": {},
-                    "status_to_image_mapping": {}
-                }
-            
-            return cache_data
+            # Las entradas caducan de forma individual (ver _is_entry_stale)
+            return self.store.load(username)
         except (json.JSONDecodeError, KeyError) as e:
             print(f"⚠️  Error leyendo cache de {username}: {e}")
-            return {
-                "last_updated": None,
-                "processed_posts": {},
-                "status_to_image_mapping": {}
-            }
+            return empty_cache_data()
     
     def save_user_cache(self, username: str, processed_posts: Dict, status_to_image_mapping: Dict):
         """Guarda el cache de posts procesados para un usuario."""
-        cache_file = self.get_cache_file_path(username)
-        
         cache_data = {
             "last_updated": datetime.now().isoformat(),
             "processed_posts": processed_posts,
-            "status_to_image_mapping": status_to_image_mapping
+            "status_to_image_mapping": normalize_mappings(status_to_image_mapping),
+            "meta": self._get_meta(username)
         }
         
         try:
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, indent=2, ensure_ascii=False)
+            self.store.save(username, cache_data)
+            session = self._sessions.get(username)
+            if session:
+                session.reset(cache_data)
+            self.invalidate_indexes(username)
             print(f"💾 Cache de {username} guardado: {len(processed_posts)} posts procesados")
         except Exception as e:
             print(f"⚠️  Error guardando cache de {username}: {e}")
     
+    def upsert_posts(self, username: str, posts: Dict):
+        """Guarda solo los posts indicados (se añaden al journal o a SQLite) y actualiza los índices."""
+        self._write_entries(username, posts=posts)
+    
+    def _write_entries(self, username: str, posts: Dict = None, mappings: Dict = None):
+        """Escribe en bloque solo las entradas modificadas en el backend."""
+        index = peek_status_index(self._index_scope, username)
+        if index is not None and posts:
+            index.update(posts)
+        video_index = peek_status_index(self._video_index_scope, username)
+        if video_index is not None and posts:
+            video_index.update(post_id for post_id, post in posts.items() if post.get("video_processed", False))
+        if mappings and username in self._media_indexes:
+            self._media_indexes[username].update(mappings)
+        if posts:
+            self._time_indexes.pop(username, None)
+        session = self._sessions.get(username)
+        if session:
+            session.upsert(posts=posts, mappings=mappings)
+            return
+        try:
+            version_before = self.store.version(username)
+            self.store.upsert(username, posts=posts, mappings=mappings)
+            self.note_store_written(username, version_before)
+        except Exception as e:
+            print(f"⚠️  Error guardando cache de {username}: {e}")
+    
+    def _delete_entries(self, username: str, status_ids: List[str]):
+        """Elimina en bloque las entradas indicadas (en memoria si hay sesión)."""
+        for index in (peek_status_index(self._index_scope, username),
+                      peek_status_index(self._video_index_scope, username)):
+            if index is not None:
+                for status_id in status_ids:
+                    index.discard(status_id)
+        if username in self._media_indexes:
+            self._media_indexes[username].discard_many(status_ids)
+        self._time_indexes.pop(username, None)
+        session = self._sessions.get(username)
+        if session:
+            session.delete(status_ids)
+        else:
+            version_before = self.store.version(username)
+            self.store.delete(username, status_ids)
+            self.note_store_written(username, version_before)
+    
     def get_cached_image_urls(self, username: str, status_urls: List[Dict]) -> tuple[List[str], List[Dict]]:
         """
         Obtiene URLs de imágenes desde cache y devuelve las URLs no cacheadas.
@@ -91,8 +279,11 @@ class CacheManager:
         cache_data = self.load_user_cache(username)
         cached_mapping = cache_data.get("status_to_image_mapping", {})
         
-        cached_image_urls = []
+        processed_posts = cache_data.get("processed_posts", {})
+        
+        cached_image_urls = MediaURLSet()
         uncached_status_urls = []
+        postponed = 0
         
         for status_item in status_urls:
             if status_item.get('media_type') != 'image':
@@ -102,19 +293,25 @@ class CacheManager:
             status_id = self._extract_status_id(status_url)
             
             if status_id in cached_mapping:
-                # Usar imagen cacheada
-                cached_image_url = cached_mapping[status_id]
-                if cached_image_url not in cached_image_urls:
-                    cached_image_urls.append(cached_image_url)
-                    print(f"   💾 Imagen cacheada: {status_id} -> {cached_image_url}")
+                # Usar imagen cacheada (si caducó se sirve igualmente y se revalida después)
+                self._queue_if_stale(username, status_id, status_item, cache_data)
+                # Todas las imágenes del carrusel, en orden
+                for cached_image_url in image_list(cached_mapping[status_id]):
+                    if cached_image_urls.add(cached_image_url, status_id):
+                        print(f"   💾 Imagen cacheada: {status_id} -> {cached_image_url}")
+            elif not self.is_retry_due(processed_posts.get(status_id)):
+                # Resultado negativo reciente: no se vuelve a navegar hasta su reintento
+                postponed += 1
             else:
                 # Necesita procesamiento
                 uncached_status_urls.append(status_item)
         
         print(f"💾 Cache hit: {len(cached_image_urls)} imágenes cacheadas")
         print(f"🔄 Cache miss: {len(uncached_status_urls)} status requieren procesamiento")
+        if postponed:
+            print(f"⏭️  {postponed} status sin imágenes pospuestos hasta su próximo reintento")
         
-        return cached_image_urls, uncached_status_urls
+        return cached_image_urls.urls(), uncached_status_urls
 
     def get_url_to_status_mapping(self, username: str, image_urls: List[str]) -> Dict[str, str]:
         """
@@ -127,100 +324,208 @@ class CacheManager:
         Returns:
             Diccionario {url: status_id}
         """
-        cache_data = self.load_user_cache(username)
-        cached_mapping = cache_data.get("status_to_image_mapping", {})
+        if isinstance(self.store, SQLiteCacheStore) and username not in self._sessions:
+            # Consulta indexada por media_key sin materializar el cache
+            self._ensure_imported(username)
+            by_key = self.store.find_status_ids_by_media_keys(
+                username, {media_key_for(url) for url in image_urls}
+            )
+            
+            def statuses_for(url: str) -> List[str]:
+                return by_key.get(media_key_for(url), [])
+        else:
+            statuses_for = self.media_index(username).statuses_for
         
         url_to_status = {}
-        for status_id, image_url in cached_mapping.items():
-            if image_url in image_urls:
-                url_to_status[image_url] = status_id
+        for image_url in image_urls:
+            statuses = statuses_for(image_url)
+            if statuses:
+                # Con mapeos duplicados prevalece el status más antiguo (menor ID), en ambos backends
+                url_to_status[image_url] = preferred_status(statuses)
                 
         return url_to_status
     
-    def update_cache_with_new_mappings(self, username: str, new_mappings: Dict[str, str]):
+    def update_cache_with_new_mappings(self, username: str, new_mappings: Dict[str, List[str]]):
         """
-        Actualiza el cache con nuevos mapeos de status_id -> image_url.
-        MEJORADO: Evita sobrescribir mapeos existentes incorrectamente.
+        Actualiza el cache con nuevos mapeos de status_id -> [image_url, ...].
+        MEJORADO: Evita sobrescribir mapeos existentes incorrectamente; un
+        carrusel que amplía el mapeo existente (misma primera imagen) sí se guarda.
+        Un mapeo igual al existente, o que es su comienzo, no se vuelve a escribir.
         """
         cache_data = self.load_user_cache(username)
         
         # Verificar mapeos existentes antes de actualizar
         existing_mappings = cache_data.get("status_to_image_mapping", {})
+        processed_posts = cache_data.get("processed_posts", {})
         conflicting_mappings = 0
+        changed_posts = {}
+        changed_mappings = {}
         
         # Actualizar mapeos solo si son válidos
-        for status_id, image_url in new_mappings.items():
+        for status_id, images in new_mappings.items():
+            images = [url for url in image_list(images) if url.strip()]
             if status_id in existing_mappings:
-                existing_url = existing_mappings[status_id]
-                if existing_url != image_url:
-                    print(f"⚠️  Conflicto de mapeo para {status_id}: {existing_url} vs {image_url}")
+                existing_images = image_list(existing_mappings[status_id])
+                if existing_images[:len(images)] == images:
+                    # Mismo carrusel o parte de él (p. ej. el Método 0 o el DOM capturaron menos fotos):
+                    # solo se reescribe, completo, si la entrada caducó
+                    post = processed_posts.get(status_id)
+                    if post is not None and not self._is_entry_stale(post):
+                        continue
+                    images = existing_images
+                elif images[:len(existing_images)] != existing_images:
+                    print(f"⚠️  Conflicto de mapeo para {status_id}: {existing_images} vs {images}")
                     conflicting_mappings += 1
                     # Mantener el mapeo existente para evitar corrupción
                     continue
             
             # Solo añadir si es un mapeo nuevo y válido
-            if image_url and image_url.strip():
-                cache_data["status_to_image_mapping"][status_id] = image_url
+            if images:
+                changed_mappings[status_id] = images
                 
-                # Actualizar posts procesados (para compatibilidad)
-                cache_data["processed_posts"][status_id] = {
+                # Actualizar posts procesados (para compatibilidad: image_url es la primera imagen)
+                changed_posts[status_id] = {
                     "processed_at": datetime.now().isoformat(),
-                    "image_url": image_url
+                    "image_url": images[0]
                 }
         
         if conflicting_mappings > 0:
             print(f"⚠️  Se encontraron {conflicting_mappings} conflictos de mapeo - manteniendo mapeos existentes")
         
-        # Guardar cache actualizado
-        self.save_user_cache(
-            username, 
-            cache_data["processed_posts"], 
-            cache_data["status_to_image_mapping"]
-        )
+        # Guardar solo los mapeos nuevos
+        if changed_mappings:
+            self._write_entries(username, posts=changed_posts, mappings=changed_mappings)
+            print(f"💾 Cache de {username} actualizado: {len(changed_mappings)} mapeos nuevos")
 
     def is_status_cached(self, username: str, status_id: str) -> bool:
         """Verifica si un status ID específico ya está en cache (procesado)."""
-        cache_data = self.load_user_cache(username)
-        return status_id in cache_data.get("processed_posts", {})
+        # Camino rápido: la mayoría de los status vistos al hacer scroll no están
+        if status_id not in self.status_index(username):
+            return False
+        session = self._sessions.get(username)
+        if session:
+            post = session.data["processed_posts"].get(status_id)
+        elif isinstance(self.store, SQLiteCacheStore):
+            # Consulta indexada sin materializar el cache completo
+            self._ensure_imported(username)
+            post = self.store.get_post(username, status_id)
+        else:
+            post = self.load_user_cache(username).get("processed_posts", {}).get(status_id)
+        
+        if post is None:
+            return False
+        # Los resultados negativos caducados se reintentan; el resto se sirve
+        # aunque esté caducado y se revalida de forma diferida
+        return not (self._entry_kind(post) == "negative" and self._is_entry_stale(post))
+    
+    def _get_meta(self, username: str) -> Dict:
+        """Metadatos del usuario guardados junto al cache (desde la sesión si está abierta)."""
+        session = self._sessions.get(username)
+        if session:
+            return dict(session.data.get("meta", {}))
+        self._ensure_imported(username)
+        return dict(self.store.get_meta(username)) if self.store.exists(username) else {}
+    
+    def get_high_water_mark(self, username: str) -> Optional[int]:
+        """
+        Status ID más reciente hasta el que el timeline del usuario está
+        procesado sin huecos (None si aún no se ha registrado).
+        """
+        value = self._get_meta(username).get("high_water_mark")
+        try:
+            return int(value) if value is not None else None
+        except (TypeError, ValueError):
+            return None
+    
+    def advance_high_water_mark(self, username: str, seen_status_ids: List[str]) -> Optional[int]:
+        """
+        Avanza la marca de agua con los status vistos en una ejecución.
+        
+        seen_status_ids debe cubrir sin huecos el timeline desde arriba hasta la
+        marca anterior (o hasta el final si no había marca). La marca sube hasta
+        el status más reciente por debajo del cual todo está procesado: un
+        status pendiente (p. ej. fuera del límite de URLs) la detiene para que
+        la siguiente ejecución incremental vuelva a pasar por él.
+        
+        Returns: la marca resultante (sin cambios si no se pudo avanzar).
+        """
+        # La marca solo puede apuntar a entradas ya durables
+        self.flush(username)
+        session = self._sessions.get(username)
+        current = self.get_high_water_mark(username)
+        if session and session.has_pending_changes:
+            return current
+        
+        floor = current or 0
+        candidates = sorted({
+            int(status_id) for status_id in seen_status_ids
+            if str(status_id).isdigit() and int(status_id) > floor
+        })
+        new_mark = current
+        for value in candidates:
+            if not self.is_status_cached(username, str(value)):
+                break
+            new_mark = value
+        
+        if new_mark is not None and new_mark != current:
+            values = {"high_water_mark": str(new_mark)}
+            version_before = self.store.version(username)
+            self.store.set_meta(username, values)
+            self.note_store_written(username, version_before)
+            if session:
+                session.data.setdefault("meta", {}).update(values)
+            print(f"🔖 Marca de agua de {username} avanzada a {new_mark}")
+        return new_mark
     
     def mark_downloaded_images(self, username: str, downloaded_stats: dict, download_dir: str):
         """
         Marca en cache solo las imágenes que fueron descargadas exitosamente.
         Esto asegura que solo se consideren 'procesadas' las que realmente tenemos.
+        Los archivos se buscan en el manifiesto del directorio (un solo scandir),
+        no con un stat por mapeo.
         """
-        from pathlib import Path
+        from ..download.download_manifest import get_download_manifest
         
+        manifest = get_download_manifest(download_dir)
         cache_data = self.load_user_cache(username)
         current_time = datetime.now().isoformat()
         
-        # Obtener lista de archivos exitosamente descargados
-        successful_downloads = downloaded_stats.get('successful_downloads', [])
-        
         marked_count = 0
-        for status_id, image_url in cache_data["status_to_image_mapping"].items():
-            if image_url:
-                # Extraer nombre original de la imagen
-                filename = self._extract_original_filename(image_url)
-                file_path = Path(download_dir) / f"{filename}.jpg"
-                
-                # Verificar si el archivo existe
-                if file_path.exists():
-                    # Marcar como procesado exitosamente
-                    cache_data["processed_posts"][status_id] = {
-                        "processed_at": current_time,
-                        "media_type": "image",
-                        "image_url": image_url,
-                        "downloaded": True,
-                        "filename": f"{filename}.jpg"
-                    }
-                    marked_count += 1
+        changed_posts = {}
+        for status_id, images in cache_data["status_to_image_mapping"].items():
+            images = image_list(images)
+            if not images:
+                continue
+            
+            # Archivo real de cada imagen del carrusel ({status_id}-{media_key}.jpg u otro prefijo)
+            entries = [
+                manifest.find(URLUtils.extract_media_key(image_url) or self._extract_original_filename(image_url),
+                              status_id)
+                for image_url in images
+            ]
+            if not all(entries):
+                continue
+            filenames = [entry.filename for entry in entries]
+            
+            post = cache_data["processed_posts"].get(status_id) or {}
+            marked_files = post.get("filenames") or ([post["filename"]] if post.get("filename") else [])
+            if post.get("downloaded") and marked_files == filenames:
+                continue  # Ya estaba marcado con los mismos archivos
+            
+            # Marcar como procesado exitosamente
+            changed_posts[status_id] = {
+                "processed_at": current_time,
+                "media_type": "image",
+                "image_url": images[0],
+                "downloaded": True,
+                "filename": filenames[0]
+            }
+            if len(filenames) > 1:
+                changed_posts[status_id]["filenames"] = filenames
+            marked_count += 1
         
         if marked_count > 0:
-            self.save_user_cache(
-                username, 
-                cache_data["processed_posts"], 
-                cache_data["status_to_image_mapping"]
-            )
+            self._write_entries(username, posts=changed_posts)
             print(f"📁 {marked_count} imágenes descargadas marcadas como procesadas en cache")
     
     def _extract_original_filename(self, image_url: str) -> str:
@@ -242,22 +547,26 @@ class CacheManager:
         1. Videos (ya identificados, no necesitan reprocesamiento)
         2. Imágenes con mapeo válido (que tienen URL de imagen extraída)
         
-        Los status sin imagen extraída NO se marcan como procesados para permitir
-        reintento en futuras ejecuciones.
+        Los status sin imagen extraída NO se marcan como procesados: el Método 2
+        los registra como resultados negativos (record_negative_results) que se
+        reintentan con espera exponencial en futuras ejecuciones.
         """
         cache_data = self.load_user_cache(username)
         current_time = datetime.now().isoformat()
         
         processed_count = 0
+        changed_posts = {}
         for status_item in all_status_urls:
             status_id = self._extract_status_id(status_item.get('url', ''))
-            if status_id and status_id not in cache_data["processed_posts"]:
+            existing_post = cache_data["processed_posts"].get(status_id)
+            is_new = existing_post is None or self._is_entry_stale(existing_post)
+            if status_id and is_new and status_id not in changed_posts:
                 
                 media_type = status_item.get('media_type', '')
                 
                 # Marcar videos como procesados (ya identificados correctamente)
                 if media_type == 'video':
-                    cache_data["processed_posts"][status_id] = {
+                    changed_posts[status_id] = {
                         "processed_at": current_time,
                         "media_type": "video",
                         "image_url": None
@@ -266,38 +575,136 @@ class CacheManager:
                     
                 # Marcar imágenes solo si tienen mapeo válido en cache
                 elif media_type == 'image' and status_id in cache_data["status_to_image_mapping"]:
-                    image_url = cache_data["status_to_image_mapping"][status_id]
-                    cache_data["processed_posts"][status_id] = {
+                    images = image_list(cache_data["status_to_image_mapping"][status_id])
+                    changed_posts[status_id] = {
                         "processed_at": current_time,
                         "media_type": "image",
-                        "image_url": image_url
+                        "image_url": images[0] if images else None
                     }
                     processed_count += 1
                 
-                # NO marcar imágenes sin mapeo válido - permitir reintento
+                # NO marcar imágenes sin mapeo válido - el caché negativo decide el reintento
         
         if processed_count > 0:
-            # Guardar cache actualizado
-            self.save_user_cache(
-                username, 
-                cache_data["processed_posts"], 
-                cache_data["status_to_image_mapping"]
-            )
+            # Guardar solo los status recién marcados
+            self._write_entries(username, posts=changed_posts)
             print(f"📝 {processed_count} status marcados como realmente procesados (videos + imágenes extraídas)")
         else:
             print("📝 No hay nuevos status para marcar como procesados")
     
-    def _is_cache_expired(self, last_updated_str: Optional[str]) -> bool:
-        """Verifica si el cache ha expirado."""
-        if not last_updated_str:
-            return True
+    def _entry_kind(self, post: Dict) -> str:
+        """Clasifica una entrada del cache: 'video', 'image' o 'negative' (sin resultado)."""
+        if post.get("kind"):
+            return post["kind"]
+        if post.get("media_type") == "video":
+            return "video"
+        if post.get("image_url"):
+            return "image"
+        return "negative"
+    
+    def _is_entry_stale(self, post: Dict, now: Optional[datetime] = None) -> bool:
+        """Verifica si una entrada superó el TTL configurado para su tipo."""
+        if post.get("next_retry") and self._entry_kind(post) == "negative":
+            # Los resultados negativos siguen su propio calendario de reintentos
+            try:
+                return (now or datetime.now()) >= datetime.fromisoformat(post["next_retry"])
+            except (TypeError, ValueError):
+                return True
+        
+        ttl_days = self.entry_ttl_days.get(self._entry_kind(post))
+        if ttl_days is None:
+            return False
         
         try:
-            last_updated = datetime.fromisoformat(last_updated_str)
-            expiry_date = last_updated + timedelta(days=self.cache_expiry_days)
-            return datetime.now() > expiry_date
+            processed_at = datetime.fromisoformat(post.get("processed_at") or "")
         except ValueError:
             return True
+        return (now or datetime.now()) > processed_at + timedelta(days=ttl_days)
+    
+    def _queue_if_stale(self, username: str, status_id: str, status_item: Dict, cache_data: Dict):
+        """Encola un status para revalidación si su entrada está caducada."""
+        post = cache_data["processed_posts"].get(status_id)
+        if post is not None and self._is_entry_stale(post):
+            self._revalidation_queue.setdefault(username, {})[status_id] = status_item
+    
+    def is_retry_due(self, post: Optional[Dict], now: Optional[datetime] = None) -> bool:
+        """
+        Indica si un status sin mapeo debe (re)procesarse. Solo se pospone si
+        lleva la marca de resultado negativo (record_negative_results) y su
+        reintento no ha vencido; el resto de entradas sin mapeo se procesan.
+        """
+        if post is None or post.get("kind") != "negative":
+            return True
+        return self._is_entry_stale(post, now)
+    
+    def _negative_retry_delay(self, reason: str, attempts: int) -> timedelta:
+        """Espera exponencial hasta el siguiente reintento de un resultado negativo."""
+        base_hours = CACHE_NEGATIVE_RETRY_BASE_HOURS.get(reason, CACHE_NEGATIVE_RETRY_BASE_HOURS["no_images"])
+        max_delay = timedelta(days=CACHE_NEGATIVE_RETRY_MAX_DAYS)
+        # El exponente se acota para no desbordar con contadores de intentos altos
+        return min(timedelta(hours=base_hours * 2 ** min(attempts - 1, 16)), max_delay)
+    
+    def record_negative_results(self, username: str, failures: Dict[str, str]):
+        """
+        Registra los status que no dieron imágenes con el motivo, el número de
+        intentos y la fecha del próximo reintento (espera exponencial).
+        Nunca sobrescribe una entrada con resultado (p. ej. una revalidación fallida).
+        
+        Args:
+            username: Nombre del usuario
+            failures: Diccionario {status_id: motivo} ('no_images', 'unavailable', 'navigation_error')
+        """
+        if not failures:
+            return
+        
+        processed_posts = self.load_user_cache(username).get("processed_posts", {})
+        now = datetime.now()
+        changed_posts = {}
+        
+        for status_id, reason in failures.items():
+            previous = processed_posts.get(status_id)
+            if previous is not None and self._entry_kind(previous) != "negative":
+                continue
+            attempts = (previous or {}).get("attempts", 0) + 1
+            changed_posts[status_id] = {
+                "processed_at": now.isoformat(),
+                "kind": "negative",
+                "reason": reason,
+                "attempts": attempts,
+                "next_retry": (now + self._negative_retry_delay(reason, attempts)).isoformat(),
+            }
+        
+        if changed_posts:
+            self._write_entries(username, posts=changed_posts)
+            print(f"🚫 {len(changed_posts)} status sin imágenes registrados con reintento diferido")
+    
+    def pop_revalidation_candidates(self, username: str, limit: int) -> List[Dict]:
+        """
+        Devuelve (y retira de la cola) hasta `limit` status con entradas caducadas
+        que se sirvieron desde cache, para revalidarlos sin bloquear la ejecución.
+        """
+        queue = self._revalidation_queue.get(username, {})
+        candidates = []
+        for status_id in list(queue):
+            if len(candidates) >= limit:
+                break
+            candidates.append(queue.pop(status_id))
+        return candidates
+    
+    def refresh_entries(self, username: str, mappings: Dict[str, List[str]]):
+        """
+        Guarda el resultado de una revalidación: reemplaza el mapeo aunque
+        difiera del existente y renueva la marca de tiempo de la entrada.
+        """
+        current_time = datetime.now().isoformat()
+        valid = {status_id: image_list(images) for status_id, images in mappings.items() if image_list(images)}
+        posts = {
+            status_id: {"processed_at": current_time, "media_type": "image", "image_url": images[0]}
+            for status_id, images in valid.items()
+        }
+        if valid:
+            self._write_entries(username, posts=posts, mappings=valid)
+            print(f"🔁 {len(valid)} entradas caducadas revalidadas en cache")
     
     def _extract_status_id(self, status_url: str) -> str:
         """Extrae el ID del status desde la URL."""
@@ -309,9 +716,12 @@ class CacheManager:
     
     def clear_user_cache(self, username: str):
         """Limpia el cache de un usuario específico."""
-        cache_file = self.get_cache_file_path(username)
-        if cache_file.exists():
-            cache_file.unlink()
+        session = self._sessions.get(username)
+        if session:
+            session.reset(empty_cache_data())
+        cleared = self.store.clear(username)
+        self.invalidate_indexes(username)
+        if cleared:
             print(f"🗑️  Cache de {username} eliminado")
     
     def get_cache_stats(self, username: str) -> Dict:
@@ -322,8 +732,12 @@ class CacheManager:
             "last_updated": cache_data.get("last_updated"),
             "total_posts": len(cache_data.get("processed_posts", {})),
             "total_mappings": len(cache_data.get("status_to_image_mapping", {})),
-            "cache_file": str(self.get_cache_file_path(username)),
-            "is_expired": self._is_cache_expired(cache_data.get("last_updated"))
+            "cache_file": self.store.location(username),
+            "backend": self.backend,
+            "high_water_mark": cache_data.get("meta", {}).get("high_water_mark"),
+            "stale_entries": sum(
+                1 for post in cache_data.get("processed_posts", {}).values() if self._is_entry_stale(post)
+            )
         }
     
     def _migrate_old_caches(self):
@@ -377,37 +791,28 @@ class CacheManager:
         Limpia mapeos conflictivos en el cache donde múltiples status_ids apuntan a la misma imagen.
         Returns: número de conflictos limpiados
         """
-        cache_data = self.load_user_cache(username)
-        mapping = cache_data.get("status_to_image_mapping", {})
-        processed_posts = cache_data.get("processed_posts", {})
-        
-        if not mapping:
-            return 0
-        
-        # Crear mapeo inverso para detectar conflictos
-        image_to_statuses = {}
-        for status_id, image_url in mapping.items():
-            if image_url not in image_to_statuses:
-                image_to_statuses[image_url] = []
-            image_to_statuses[image_url].append(status_id)
+        # El índice inverso ya conoce las media keys con más de un status
+        conflicts = self.media_index(username).conflicts()
         
-        # Encontrar imágenes con múltiples status_ids (conflictos)
+        # Se conserva el mismo status que usa get_url_to_status_mapping para nombrar las descargas
+        # (también si en otra imagen es el duplicado)
+        skipped = {preferred_status(status_list) for status_list in conflicts.values()}
         conflicts_cleaned = 0
-        for image_url, status_list in image_to_statuses.items():
-            if len(status_list) > 1:
-                print(f"🔍 Imagen {image_url} mapeada a {len(status_list)} status diferentes")
-                
-                # Mantener solo el primer mapeo (más antiguo)
-                primary_status = status_list[0]
-                for duplicate_status in status_list[1:]:
-                    print(f"   🗑️  Eliminando mapeo duplicado: {duplicate_status}")
-                    mapping.pop(duplicate_status, None)
-                    processed_posts.pop(duplicate_status, None)
-                    conflicts_cleaned += 1
+        duplicate_statuses = []
+        for media_key, status_list in conflicts.items():
+            print(f"🔍 Imagen {media_key} mapeada a {len(status_list)} status diferentes")
+            
+            for duplicate_status in status_list:
+                if duplicate_status in skipped:
+                    continue
+                print(f"   🗑️  Eliminando mapeo duplicado: {duplicate_status}")
+                skipped.add(duplicate_status)
+                duplicate_statuses.append(duplicate_status)
+                conflicts_cleaned += 1
         
         if conflicts_cleaned > 0:
             print(f"🧹 Se limpiaron {conflicts_cleaned} mapeos conflictivos")
-            # Guardar cache limpio
-            self.save_user_cache(username, processed_posts, mapping)
+            # Eliminar solo los mapeos duplicados
+            self._delete_entries(username, duplicate_statuses)
         
         return conflicts_cleaned
@@ -0,0 +1,178 @@
+"""
+Módulo con la sesión en memoria del cache de un usuario.
+Carga el cache una sola vez, responde las consultas desde memoria y
+escribe en segundo plano únicamente las entradas modificadas.
+"""
+import asyncio
+import threading
+from typing import Dict, Iterable, Optional
+
+
+class CacheSession:
+    """
+    Sesión write-behind sobre el cache de un usuario.
+
+    Mientras la sesión está abierta, CacheManager sirve lecturas y escrituras
+    desde memoria. Las entradas modificadas se marcan como sucias y se vuelcan
+    al backend en cada checkpoint (en segundo plano) y al cerrar la sesión.
+
+    Uso:
+        async with cache_manager.session(username):
+            ...
+    """
+
+    def __init__(self, cache_manager, username: str):
+        self.cache_manager = cache_manager
+        self.username = username
+        self.data: Optional[Dict] = None
+        self._dirty_posts: Dict = {}
+        self._dirty_mappings: Dict = {}
+        self._deleted: set[str] = set()
+        self._state_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._depth = 0  # Aperturas anidadas de la misma sesión
+
+    # --- Ciclo de vida -------------------------------------------------
+
+    def open(self) -> "CacheSession":
+        """Carga el cache en memoria y registra la sesión en el CacheManager."""
+        self._depth += 1
+        if self.data is None:
+            self.data = self.cache_manager.load_user_cache(self.username)
+            # Los índices del proceso pueden no incluir lo que escribieron otros procesos
+            self.cache_manager.invalidate_indexes(self.username)
+            self.cache_manager._sessions[self.username] = self
+            posts = len(self.data.get("processed_posts", {}))
+            print(f"🧠 Sesión de cache abierta para {self.username}: {posts} posts en memoria")
+        return self
+
+    def close(self):
+        """Vuelca los cambios pendientes y libera la sesión."""
+        self._depth -= 1
+        if self._depth > 0:
+            self.checkpoint()
+            return
+        try:
+            self.flush()
+        finally:
+            if self.cache_manager._sessions.get(self.username) is self:
+                del self.cache_manager._sessions[self.username]
+            self.data = None
+
+    async def aclose(self):
+        """Versión asíncrona de close(): espera al volcado en curso antes del final."""
+        if self._depth > 1:
+            self.close()
+            return
+        if self._flush_task and not self._flush_task.done():
+            await self._flush_task
+        await asyncio.to_thread(self.close)
+
+    def __enter__(self) -> "CacheSession":
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    async def __aenter__(self) -> "CacheSession":
+        return self.open()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    # --- Lecturas ------------------------------------------------------
+
+    def is_status_cached(self, status_id: str) -> bool:
+        """Verifica en memoria si un status ya está procesado."""
+        return status_id in self.data["processed_posts"]
+
+    @property
+    def has_pending_changes(self) -> bool:
+        """Indica si hay entradas modificadas sin volcar."""
+        return bool(self._dirty_posts or self._dirty_mappings or self._deleted)
+
+    # --- Escrituras ----------------------------------------------------
+
+    def upsert(self, posts: Optional[Dict] = None, mappings: Optional[Dict] = None):
+        """Aplica cambios en memoria y los marca como pendientes de volcado."""
+        with self._state_lock:
+            for status_id, post in (posts or {}).items():
+                self.data["processed_posts"][status_id] = post
+                self._dirty_posts[status_id] = post
+                self._deleted.discard(status_id)
+            for status_id, image_url in (mappings or {}).items():
+                self.data["status_to_image_mapping"][status_id] = image_url
+                self._dirty_mappings[status_id] = image_url
+                self._deleted.discard(status_id)
+
+    def delete(self, status_ids: Iterable[str]):
+        """Elimina entradas en memoria y registra el borrado pendiente."""
+        with self._state_lock:
+            for status_id in status_ids:
+                self.data["processed_posts"].pop(status_id, None)
+                self.data["status_to_image_mapping"].pop(status_id, None)
+                self._dirty_posts.pop(status_id, None)
+                self._dirty_mappings.pop(status_id, None)
+                self._deleted.add(status_id)
+
+    def reset(self, data: Dict):
+        """Reemplaza el contenido en memoria descartando cambios pendientes."""
+        with self._state_lock:
+            self.data = data
+            self._dirty_posts = {}
+            self._dirty_mappings = {}
+            self._deleted = set()
+
+    def flush(self) -> int:
+        """
+        Escribe en el backend las entradas sucias acumuladas.
+        Returns: número de entradas volcadas.
+        """
+        with self._flush_lock:
+            with self._state_lock:
+                posts, self._dirty_posts = self._dirty_posts, {}
+                mappings, self._dirty_mappings = self._dirty_mappings, {}
+                deleted, self._deleted = self._deleted, set()
+
+            if not (posts or mappings or deleted):
+                return 0
+
+            store = self.cache_manager.store
+            try:
+                version_before = store.version(self.username)
+                if deleted:
+                    store.delete(self.username, deleted)
+                store.upsert(self.username, posts=posts, mappings=mappings)
+                self.cache_manager.note_store_written(self.username, version_before)
+            except Exception as e:
+                # Devolver los cambios a la cola para el siguiente intento
+                with self._state_lock:
+                    for status_id, post in posts.items():
+                        self._dirty_posts.setdefault(status_id, post)
+                    for status_id, image_url in mappings.items():
+                        self._dirty_mappings.setdefault(status_id, image_url)
+                    self._deleted |= deleted
+                print(f"⚠️  Error volcando cache de {self.username}: {e}")
+                return 0
+
+            flushed = len(set(posts) | set(mappings) | deleted)
+            print(f"💾 Cache de {self.username} volcado: {flushed} entradas modificadas")
+            return flushed
+
+    def checkpoint(self):
+        """
+        Programa un volcado en segundo plano si hay un event loop activo;
+        en caso contrario vuelca de forma síncrona.
+        """
+        if not self.has_pending_changes:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_task and not self._flush_task.done():
+            # El volcado en curso tomará los cambios en el siguiente checkpoint
+            return
+        self._flush_task = loop.create_task(asyncio.to_thread(self.flush))
@@ -0,0 +1,399 @@
+"""
+Módulo con el formato binario compacto de snapshot del cache de un usuario.
+
+Los status IDs (Snowflakes) se guardan como un array int64 ordenado, las URLs
+de pbs.twimg.com se reducen a su media key (p. ej. GrUYcfLXgAAuRsX) internada
+en una tabla de cadenas y las marcas de tiempo se guardan como epoch int64.
+La lectura solo copia arrays contiguos, por lo que abrir un snapshot de 1M de
+entradas lleva milisegundos; las entradas se materializan bajo demanda.
+
+Estructura (little-endian):
+    cabecera   MAGIC, versión, n_status, n_keys, n_mapping_refs, last_updated
+    columnas   status_ids[int64], processed_at[int64], media_type[uint8],
+               flags[uint8], post_key[int32], mapping_offsets[uint32 * (n+1)],
+               mapping_keys[int32]
+    tablas     key_offsets[uint32 * (n_keys+1)], keys (utf-8 concatenadas),
+               extras (JSON: campos sin columna y metadatos del usuario)
+"""
+import json
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .media_index import image_list
+
+MAGIC = b"XMCS"
+VERSION = 1
+HEADER = struct.Struct("<4sHxxIIIq")
+
+CANONICAL_URL_PREFIX = "https://pbs.twimg.com/media/"
+CANONICAL_URL_SUFFIX = "?format=jpg&name=large"
+
+# Código 0 = el post no tiene campo media_type; None explícito tiene su propio código
+MEDIA_TYPE_ABSENT = 0
+MEDIA_TYPES = [None, None, "image", "video"]
+MEDIA_TYPE_CODES = {None: 1, "image": 2, "video": 3}
+
+FLAG_HAS_POST = 1
+FLAG_DOWNLOADED = 2
+FLAG_VIDEO_PROCESSED = 4
+FLAG_NULL_IMAGE_URL = 8  # El post tiene "image_url": None explícito
+
+# Campos de un post que se codifican en columnas; el resto va a extras
+FIXED_POST_FIELDS = {"processed_at", "media_type", "image_url", "downloaded", "video_processed"}
+
+NO_TIMESTAMP = -1
+NO_KEY = -1
+
+
+def _to_epoch(value: Optional[str]) -> int:
+    """Convierte una marca ISO a epoch en segundos (NO_TIMESTAMP si no es válida)."""
+    if not value:
+        return NO_TIMESTAMP
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return NO_TIMESTAMP
+
+
+@lru_cache(maxsize=4096)
+def _from_epoch(value: int) -> Optional[str]:
+    """Convierte epoch en segundos a marca ISO local (None si no hay marca)."""
+    if value == NO_TIMESTAMP:
+        return None
+    return datetime.fromtimestamp(value).isoformat()
+
+
+def media_key_from_url(url: str) -> str:
+    """
+    Reduce una URL canónica de imagen a su media key. Las URLs que no siguen
+    el formato canónico se conservan completas.
+    """
+    if url.startswith(CANONICAL_URL_PREFIX) and url.endswith(CANONICAL_URL_SUFFIX):
+        key = url[len(CANONICAL_URL_PREFIX):-len(CANONICAL_URL_SUFFIX)]
+        if key and "/" not in key and "?" not in key:
+            return key
+    return url
+
+
+def url_from_media_key(key: str) -> str:
+    """Reconstruye la URL canónica a partir de la media key."""
+    if "://" in key:
+        return key
+    return f"{CANONICAL_URL_PREFIX}{key}{CANONICAL_URL_SUFFIX}"
+
+
+def _as_int_id(status_id: str) -> Optional[int]:
+    """Convierte un status ID a int64 (None si no es numérico o no cabe)."""
+    if not status_id.isdigit():
+        return None
+    value = int(status_id)
+    return value if value < 2 ** 63 else None
+
+
+def _to_le_bytes(values: array) -> bytes:
+    """Serializa un array en little-endian independientemente de la plataforma."""
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le_bytes(typecode: str, data: memoryview) -> array:
+    """Reconstruye un array desde bytes little-endian."""
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
+
+
+class CacheSnapshot:
+    """
+    Vista de un snapshot binario cargado en memoria.
+    Las búsquedas por status ID usan búsqueda binaria sobre el array ordenado.
+    """
+
+    def __init__(self, status_ids: array, processed_at: array, media_types: array, flags: array,
+                 post_keys: array, mapping_offsets: array, mapping_keys: array,
+                 key_offsets: array, keys_blob: bytes, extras: Dict, last_updated: Optional[str]):
+        self.status_ids = status_ids
+        self.processed_at = processed_at
+        self.media_types = media_types
+        self.flags = flags
+        self.post_keys = post_keys
+        self.mapping_offsets = mapping_offsets
+        self.mapping_keys = mapping_keys
+        self.key_offsets = key_offsets
+        self.keys_blob = keys_blob
+        self.extras = extras
+        self.last_updated = last_updated
+
+    def __len__(self) -> int:
+        return len(self.status_ids)
+
+    @property
+    def key_count(self) -> int:
+        """Número de media keys distintas en la tabla."""
+        return len(self.key_offsets) - 1
+
+    def key(self, index: int) -> str:
+        """Decodifica bajo demanda la media key en la posición index."""
+        return self.keys_blob[self.key_offsets[index]:self.key_offsets[index + 1]].decode("utf-8")
+
+    def index_of(self, status_id) -> int:
+        """Posición del status en el array ordenado (-1 si no está)."""
+        try:
+            value = int(status_id)
+        except (TypeError, ValueError):
+            return -1
+        pos = bisect_left(self.status_ids, value)
+        if pos < len(self.status_ids) and self.status_ids[pos] == value:
+            return pos
+        return -1
+
+    def __contains__(self, status_id) -> bool:
+        return self.index_of(status_id) >= 0 or str(status_id) in self.extras.get("string_posts", {})
+
+    def has_post(self, status_id) -> bool:
+        """Indica si el status tiene entrada en processed_posts."""
+        pos = self.index_of(status_id)
+        if pos >= 0:
+            return bool(self.flags[pos] & FLAG_HAS_POST)
+        return str(status_id) in self.extras.get("string_posts", {})
+
+    def get_post(self, status_id) -> Optional[Dict]:
+        """Materializa la entrada processed_posts de un status."""
+        pos = self.index_of(status_id)
+        if pos < 0:
+            return self.extras.get("string_posts", {}).get(str(status_id))
+        return self._post_at(pos)
+
+    def get_mapping(self, status_id) -> Optional[List[str]]:
+        """Devuelve la lista ordenada de imágenes mapeadas a un status."""
+        pos = self.index_of(status_id)
+        if pos < 0:
+            return self.extras.get("string_mappings", {}).get(str(status_id))
+        return self._mapping_at(pos)
+
+    def _post_at(self, pos: int) -> Optional[Dict]:
+        flags = self.flags[pos]
+        if not flags & FLAG_HAS_POST:
+            return None
+        post = {}
+        processed_at = _from_epoch(self.processed_at[pos])
+        if processed_at is not None:
+            post["processed_at"] = processed_at
+        code = self.media_types[pos]
+        if code != MEDIA_TYPE_ABSENT:
+            post["media_type"] = MEDIA_TYPES[code]
+        key_index = self.post_keys[pos]
+        if key_index != NO_KEY:
+            post["image_url"] = url_from_media_key(self.key(key_index))
+        elif flags & FLAG_NULL_IMAGE_URL:
+            post["image_url"] = None
+        if flags & FLAG_DOWNLOADED:
+            post["downloaded"] = True
+        if flags & FLAG_VIDEO_PROCESSED:
+            post["video_processed"] = True
+        post.update(self.extras.get("fields", {}).get(str(self.status_ids[pos]), {}))
+        return post
+
+    def _mapping_at(self, pos: int) -> Optional[List[str]]:
+        start, end = self.mapping_offsets[pos], self.mapping_offsets[pos + 1]
+        if start == end:
+            return None
+        return [url_from_media_key(self.key(self.mapping_keys[i])) for i in range(start, end)]
+
+    def iter_status_ids(self) -> Iterator[str]:
+        """Recorre los status IDs en orden ascendente."""
+        for value in self.status_ids:
+            yield str(value)
+
+    def to_cache_data(self) -> Dict:
+        """
+        Materializa el snapshot completo en el formato clásico del cache.
+        Las URLs se reconstruyen una vez por media key y se comparten entre entradas.
+        """
+        offsets = self.key_offsets
+        blob = self.keys_blob
+        urls = [url_from_media_key(blob[offsets[i]:offsets[i + 1]].decode("utf-8"))
+                for i in range(self.key_count)]
+        fields = self.extras.get("fields", {})
+        mapping_offsets = self.mapping_offsets
+        mapping_keys = self.mapping_keys
+
+        posts = {}
+        mappings = {}
+        for pos, (value, timestamp, code, flags, key_index) in enumerate(
+                zip(self.status_ids, self.processed_at, self.media_types, self.flags, self.post_keys)):
+            status_id = str(value)
+            if flags & FLAG_HAS_POST:
+                post = {}
+                if timestamp != NO_TIMESTAMP:
+                    post["processed_at"] = _from_epoch(timestamp)
+                if code != MEDIA_TYPE_ABSENT:
+                    post["media_type"] = MEDIA_TYPES[code]
+                if key_index != NO_KEY:
+                    post["image_url"] = urls[key_index]
+                elif flags & FLAG_NULL_IMAGE_URL:
+                    post["image_url"] = None
+                if flags & FLAG_DOWNLOADED:
+                    post["downloaded"] = True
+                if flags & FLAG_VIDEO_PROCESSED:
+                    post["video_processed"] = True
+                if status_id in fields:
+                    post.update(fields[status_id])
+                posts[status_id] = post
+
+            start, end = mapping_offsets[pos], mapping_offsets[pos + 1]
+            if start != end:
+                mappings[status_id] = [urls[mapping_keys[i]] for i in range(start, end)]
+
+        posts.update(self.extras.get("string_posts", {}))
+        mappings.update(self.extras.get("string_mappings", {}))
+        return {
+            "last_updated": self.last_updated,
+            "processed_posts": posts,
+            "status_to_image_mapping": mappings,
+            "meta": dict(self.extras.get("meta", {}))
+        }
+
+
+def write_snapshot(path: Path, cache_data: Dict):
+    """Escribe cache_data (formato clásico) como snapshot binario en path."""
+    posts = cache_data.get("processed_posts", {})
+    mappings = cache_data.get("status_to_image_mapping", {})
+
+    extras = {"fields": {}, "string_posts": {}, "string_mappings": {},
+              "meta": dict(cache_data.get("meta") or {})}
+    numeric_ids = set()
+    for status_id in set(posts) | set(mappings):
+        value = _as_int_id(status_id)
+        if value is None:
+            # IDs no numéricos (no deberían existir) se conservan tal cual
+            if status_id in posts:
+                extras["string_posts"][status_id] = posts[status_id]
+            if status_id in mappings:
+                extras["string_mappings"][status_id] = mappings[status_id]
+        else:
+            numeric_ids.add(value)
+    sorted_ids = sorted(numeric_ids)
+
+    key_table: Dict[str, int] = {}
+
+    def intern(url: str) -> int:
+        key = media_key_from_url(url)
+        if key not in key_table:
+            key_table[key] = len(key_table)
+        return key_table[key]
+
+    status_ids = array("q", sorted_ids)
+    processed_at = array("q")
+    media_types = array("B")
+    flags = array("B")
+    post_keys = array("i")
+    mapping_offsets = array("I", [0])
+    mapping_keys = array("i")
+
+    for value in sorted_ids:
+        status_id = str(value)
+        post = posts.get(status_id)
+        flag = 0
+        if post is not None:
+            flag |= FLAG_HAS_POST
+            code = MEDIA_TYPE_ABSENT
+            if "media_type" in post:
+                media_type = post["media_type"]
+                if isinstance(media_type, str) or media_type is None:
+                    code = MEDIA_TYPE_CODES.get(media_type, MEDIA_TYPE_ABSENT)
+                if code == MEDIA_TYPE_ABSENT:
+                    extras["fields"].setdefault(status_id, {})["media_type"] = media_type
+            processed_at.append(_to_epoch(post.get("processed_at")))
+            media_types.append(code)
+            image_url = post.get("image_url")
+            if isinstance(image_url, str) and image_url:
+                post_keys.append(intern(image_url))
+            else:
+                post_keys.append(NO_KEY)
+                if "image_url" in post and image_url is None:
+                    flag |= FLAG_NULL_IMAGE_URL
+                elif "image_url" in post:
+                    extras["fields"].setdefault(status_id, {})["image_url"] = image_url
+            for field, bit in (("downloaded", FLAG_DOWNLOADED), ("video_processed", FLAG_VIDEO_PROCESSED)):
+                if post.get(field) is True:
+                    flag |= bit
+                elif field in post:
+                    extras["fields"].setdefault(status_id, {})[field] = post[field]
+            other_fields = {k: v for k, v in post.items() if k not in FIXED_POST_FIELDS}
+            if "processed_at" in post and _to_epoch(post["processed_at"]) == NO_TIMESTAMP:
+                other_fields["processed_at"] = post["processed_at"]
+            if other_fields:
+                extras["fields"].setdefault(status_id, {}).update(other_fields)
+        else:
+            processed_at.append(NO_TIMESTAMP)
+            media_types.append(MEDIA_TYPE_ABSENT)
+            post_keys.append(NO_KEY)
+        flags.append(flag)
+
+        for url in image_list(mappings.get(status_id)):
+            mapping_keys.append(intern(url))
+        mapping_offsets.append(len(mapping_keys))
+
+    # key_table conserva el orden de inserción, que coincide con los índices
+    key_offsets = array("I", [0])
+    encoded_keys = []
+    for key in key_table:
+        encoded = key.encode("utf-8")
+        encoded_keys.append(encoded)
+        key_offsets.append(key_offsets[-1] + len(encoded))
+    keys_blob = b"".join(encoded_keys)
+    extras = {name: values for name, values in extras.items() if values}
+    extras_blob = json.dumps(extras, ensure_ascii=False).encode("utf-8") if extras else b""
+
+    header = HEADER.pack(
+        MAGIC, VERSION, len(status_ids), len(key_table), len(mapping_keys),
+        _to_epoch(cache_data.get("last_updated"))
+    )
+    with open(path, "wb") as f:
+        f.write(header)
+        for column in (status_ids, processed_at, media_types, flags, post_keys, mapping_offsets,
+                       mapping_keys, key_offsets):
+            f.write(_to_le_bytes(column))
+        f.write(struct.pack("<II", len(keys_blob), len(extras_blob)))
+        f.write(keys_blob)
+        f.write(extras_blob)
+
+
+def read_snapshot(path: Path) -> CacheSnapshot:
+    """Lee un snapshot binario sin materializar las entradas."""
+    with open(path, "rb") as f:
+        data = memoryview(f.read())
+
+    magic, version, n_status, n_keys, n_refs, last_updated = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} no es un snapshot de cache válido")
+    if version != VERSION:
+        raise ValueError(f"Versión de snapshot no soportada: {version}")
+
+    offset = HEADER.size
+    columns = []
+    for typecode, count in (("q", n_status), ("q", n_status), ("B", n_status), ("B", n_status),
+                            ("i", n_status), ("I", n_status + 1), ("i", n_refs), ("I", n_keys + 1)):
+        size = array(typecode).itemsize * count
+        columns.append(_from_le_bytes(typecode, data[offset:offset + size]))
+        offset += size
+
+    keys_len, extras_len = struct.unpack_from("<II", data, offset)
+    offset += 8
+    keys_blob = bytes(data[offset:offset + keys_len])
+    offset += keys_len
+    extras_blob = bytes(data[offset:offset + extras_len])
+
+    extras = json.loads(extras_blob) if extras_blob else {}
+    return CacheSnapshot(*columns, keys_blob=keys_blob, extras=extras, last_updated=_from_epoch(last_updated))
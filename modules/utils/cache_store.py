@@ -0,0 +1,710 @@
+"""
+Módulo con los backends de almacenamiento del cache de posts procesados.
+Permite a CacheManager trabajar sobre archivos JSON por usuario o sobre SQLite.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+from datetime import datetime
+
+from ..config.constants import CACHE_JOURNAL_COMPACT_THRESHOLD, CACHE_SNAPSHOT_FORMAT
+from .cache_snapshot import read_snapshot, write_snapshot
+from .media_index import image_list, media_key_for, normalize_mappings
+from .file_lock import FileLock
+
+
+def empty_cache_data() -> Dict:
+    """Devuelve la estructura vacía del cache de un usuario."""
+    return {
+        "last_updated": None,
+        "processed_posts": {},
+        "status_to_image_mapping": {},
+        "meta": {}
+    }
+
+
+class CacheStore(ABC):
+    """
+    Interfaz base de almacenamiento del cache de un usuario.
+    Las implementaciones deben aplicar cada upsert/delete de forma atómica.
+    """
+
+    @abstractmethod
+    def exists(self, username: str) -> bool:
+        """Indica si existe cache almacenado para el usuario."""
+
+    @abstractmethod
+    def load(self, username: str) -> Dict:
+        """Carga el cache completo del usuario en el formato clásico (dict)."""
+
+    @abstractmethod
+    def save(self, username: str, cache_data: Dict):
+        """Reemplaza por completo el cache almacenado del usuario."""
+
+    @abstractmethod
+    def upsert(self, username: str, posts: Optional[Dict] = None, mappings: Optional[Dict] = None):
+        """Inserta o actualiza en bloque posts procesados y mapeos status -> imagen."""
+
+    @abstractmethod
+    def delete(self, username: str, status_ids: Iterable[str]):
+        """Elimina en bloque posts y mapeos de los status indicados."""
+
+    def get_meta(self, username: str) -> Dict:
+        """Metadatos del usuario (p. ej. high_water_mark) guardados junto al cache."""
+        return self.load(username).get("meta", {})
+
+    @abstractmethod
+    def set_meta(self, username: str, values: Dict):
+        """Actualiza (fusiona) los metadatos del usuario."""
+
+    def has_post(self, username: str, status_id: str) -> bool:
+        """Verifica si un status está registrado como procesado."""
+        return self.get_post(username, status_id) is not None
+
+    def get_post(self, username: str, status_id: str) -> Optional[Dict]:
+        """Obtiene la entrada de un status procesado (None si no existe)."""
+        return self.load(username).get("processed_posts", {}).get(status_id)
+
+    @abstractmethod
+    def clear(self, username: str) -> bool:
+        """Elimina todo el cache del usuario. Devuelve True si había algo que borrar."""
+
+    @abstractmethod
+    def location(self, username: str) -> str:
+        """Describe dónde se almacena el cache del usuario."""
+
+    def version(self, username: str):
+        """
+        Huella barata del estado almacenado: cambia cuando otro proceso escribe
+        el cache del usuario. None si el backend no sabe detectarlo.
+        """
+        return None
+
+
+class JSONCacheStore(CacheStore):
+    """
+    Backend clásico: un snapshot cache/{username}_processed_posts.json por usuario
+    más un journal append-only cache/{username}_processed_posts.journal.jsonl.
+
+    Cada escritura solo añade al journal las entradas modificadas; cuando el
+    journal supera journal_threshold entradas se compacta en el snapshot.
+    Las lecturas cargan el snapshot y reproducen el journal encima.
+
+    Varios procesos pueden compartir el cache: las lecturas toman un bloqueo
+    compartido y las escrituras uno exclusivo sobre {username}_processed_posts.lock.
+    Como cada escritura solo añade entradas por status al journal, los cambios
+    de procesos concurrentes sobre status distintos se combinan sin conflicto.
+
+    Con snapshot_format='binary' el snapshot se guarda en el formato compacto
+    de cache_snapshot ({username}_processed_posts.snap); un snapshot JSON
+    existente se sigue leyendo y se sustituye en la siguiente compactación.
+    """
+
+    def __init__(self, cache_dir: Path, journal_threshold: int = CACHE_JOURNAL_COMPACT_THRESHOLD,
+                 snapshot_format: str = CACHE_SNAPSHOT_FORMAT):
+        if snapshot_format not in ("json", "binary"):
+            raise ValueError(f"Formato de snapshot desconocido: {snapshot_format}")
+        self.cache_dir = Path(cache_dir)
+        self.journal_threshold = journal_threshold
+        self.snapshot_format = snapshot_format
+        self._journal_sizes: Dict[str, int] = {}
+        self._journal_bytes: Dict[str, int] = {}
+        self._locks: Dict[str, tuple[threading.RLock, FileLock]] = {}
+        self._locks_guard = threading.Lock()
+
+    def get_lock_path(self, username: str) -> Path:
+        """Ruta del archivo de bloqueo entre procesos de un usuario."""
+        return self.cache_dir / f"{username}_processed_posts.lock"
+
+    @contextmanager
+    def _locked(self, username: str, shared: bool = False):
+        """
+        Bloquea el cache del usuario frente a otros hilos y procesos.
+        Reentrante: una operación anidada reutiliza el bloqueo ya obtenido.
+        """
+        with self._locks_guard:
+            if username not in self._locks:
+                self._locks[username] = (threading.RLock(), FileLock(self.get_lock_path(username)))
+            thread_lock, file_lock = self._locks[username]
+        with thread_lock:
+            if file_lock.locked:
+                yield
+                return
+            file_lock.shared = shared
+            with file_lock:
+                yield
+
+    def get_cache_file_path(self, username: str) -> Path:
+        """Obtiene la ruta del snapshot de cache para un usuario."""
+        if self.snapshot_format == "binary":
+            return self.get_binary_snapshot_path(username)
+        return self.get_json_snapshot_path(username)
+
+    def get_json_snapshot_path(self, username: str) -> Path:
+        """Ruta del snapshot en formato JSON."""
+        return self.cache_dir / f"{username}_processed_posts.json"
+
+    def get_binary_snapshot_path(self, username: str) -> Path:
+        """Ruta del snapshot en formato binario compacto."""
+        return self.cache_dir / f"{username}_processed_posts.snap"
+
+    def get_journal_path(self, username: str) -> Path:
+        """Obtiene la ruta del journal de cambios de un usuario."""
+        return self.cache_dir / f"{username}_processed_posts.journal.jsonl"
+
+    def exists(self, username: str) -> bool:
+        return any(path.exists() for path in self._snapshot_candidates(username)) or \
+            self.get_journal_path(username).exists()
+
+    def version(self, username: str):
+        """Fecha de modificación y tamaño de los snapshots y del journal."""
+        fingerprint = []
+        for path in (*self._snapshot_candidates(username), self.get_journal_path(username)):
+            try:
+                stat = path.stat()
+                fingerprint.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                fingerprint.append(None)
+        return tuple(fingerprint)
+
+    def load(self, username: str) -> Dict:
+        with self._locked(username, shared=True):
+            cache_data = self._load_snapshot(username)
+            self._replay_journal(username, cache_data)
+        return cache_data
+
+    def save(self, username: str, cache_data: Dict):
+        cache_data["last_updated"] = datetime.now().isoformat()
+        with self._locked(username):
+            self._write_snapshot(username, cache_data)
+            self._reset_journal(username)
+
+    def upsert(self, username: str, posts: Optional[Dict] = None, mappings: Optional[Dict] = None):
+        if not posts and not mappings:
+            return
+        entries = [{"op": "post", "id": status_id, "data": post} for status_id, post in (posts or {}).items()]
+        entries += [{"op": "map", "id": status_id, "url": url} for status_id, url in (mappings or {}).items()]
+        self._append_journal(username, entries)
+
+    def delete(self, username: str, status_ids: Iterable[str]):
+        entries = [{"op": "del", "id": status_id} for status_id in status_ids]
+        if entries:
+            self._append_journal(username, entries)
+
+    def set_meta(self, username: str, values: Dict):
+        if values:
+            self._append_journal(username, [{"op": "meta", "data": values}])
+
+    def clear(self, username: str) -> bool:
+        existed = False
+        with self._locked(username):
+            for path in (*self._snapshot_candidates(username), self.get_journal_path(username)):
+                if path.exists():
+                    path.unlink()
+                    existed = True
+            self._journal_sizes.pop(username, None)
+        return existed
+
+    def location(self, username: str) -> str:
+        return str(self.get_cache_file_path(username))
+
+    def compact(self, username: str) -> int:
+        """
+        Integra el journal en el snapshot y lo vacía.
+        Returns: número de entradas del journal compactadas.
+        """
+        with self._locked(username):
+            journal_size = self._journal_size(username)
+            if journal_size == 0:
+                return 0
+            # Se relee bajo el bloqueo: incluye lo que hayan escrito otros procesos
+            cache_data = self._load_for_write(username)
+            self._write_snapshot(username, cache_data)
+            self._reset_journal(username)
+        print(f"🗜️  Journal de {username} compactado: {journal_size} entradas integradas en el snapshot")
+        return journal_size
+
+    def _snapshot_candidates(self, username: str) -> list[Path]:
+        """Rutas de snapshot posibles, empezando por la del formato configurado."""
+        paths = [self.get_json_snapshot_path(username), self.get_binary_snapshot_path(username)]
+        if self.snapshot_format == "binary":
+            paths.reverse()
+        return paths
+
+    def _load_snapshot(self, username: str) -> Dict:
+        """Carga el snapshot del usuario en cualquiera de los dos formatos (vacío si no existe)."""
+        cache_file = next((path for path in self._snapshot_candidates(username) if path.exists()), None)
+        if cache_file is None:
+            return empty_cache_data()
+
+        if cache_file.suffix == ".snap":
+            return read_snapshot(cache_file).to_cache_data()
+
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cache_data = json.load(f)
+
+        cache_data.setdefault("processed_posts", {})
+        cache_data.setdefault("meta", {})
+        normalize_mappings(cache_data.setdefault("status_to_image_mapping", {}))
+        return cache_data
+
+    def _replay_journal(self, username: str, cache_data: Dict):
+        """Aplica sobre cache_data las entradas del journal en orden."""
+        journal_path = self.get_journal_path(username)
+        if not journal_path.exists():
+            self._journal_sizes[username] = 0
+            self._journal_bytes[username] = 0
+            return
+
+        posts = cache_data["processed_posts"]
+        mappings = cache_data["status_to_image_mapping"]
+        applied = 0
+        with open(journal_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Línea incompleta (escritura interrumpida): se ignora
+                    continue
+                op = entry.get("op")
+                status_id = entry.get("id")
+                if op == "post":
+                    posts[status_id] = entry.get("data", {})
+                elif op == "map":
+                    images = image_list(entry.get("url"))
+                    if images:
+                        mappings[status_id] = images
+                    else:
+                        mappings.pop(status_id, None)
+                elif op == "del":
+                    posts.pop(status_id, None)
+                    mappings.pop(status_id, None)
+                elif op == "meta":
+                    cache_data.setdefault("meta", {}).update(entry.get("data", {}))
+                if entry.get("ts"):
+                    cache_data["last_updated"] = entry["ts"]
+                applied += 1
+            self._journal_bytes[username] = f.tell()
+        self._journal_sizes[username] = applied
+
+    def _append_journal(self, username: str, entries: list[Dict]):
+        """Añade un lote de entradas al journal y compacta si supera el umbral."""
+        timestamp = datetime.now().isoformat()
+        lines = "".join(
+            json.dumps({**entry, "ts": timestamp}, ensure_ascii=False) + "\n" for entry in entries
+        )
+        journal_path = self.get_journal_path(username)
+        with self._locked(username):
+            journal_size = self._journal_size(username)
+            if self._has_torn_tail(journal_path):
+                # Cerrar la línea incompleta para no corromper la primera entrada nueva
+                lines = "\n" + lines
+            with open(journal_path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+                # Durabilidad: el lote queda en disco antes de continuar
+                f.flush()
+                os.fsync(f.fileno())
+                self._journal_bytes[username] = f.tell()
+            self._journal_sizes[username] = journal_size + len(entries)
+
+            if self._journal_sizes[username] >= self.journal_threshold:
+                self.compact(username)
+
+    @staticmethod
+    def _has_torn_tail(journal_path: Path) -> bool:
+        """Indica si el journal termina en una línea sin salto (escritura interrumpida)."""
+        try:
+            with open(journal_path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            return False
+
+    def _journal_size(self, username: str) -> int:
+        """
+        Número de entradas en el journal. Se cuenta una vez y luego se mantiene;
+        se vuelve a contar si otro proceso cambió el tamaño del archivo.
+        """
+        journal_path = self.get_journal_path(username)
+        on_disk = journal_path.stat().st_size if journal_path.exists() else 0
+        if username not in self._journal_sizes or self._journal_bytes.get(username) != on_disk:
+            if on_disk:
+                with open(journal_path, 'rb') as f:
+                    self._journal_sizes[username] = sum(1 for _ in f)
+            else:
+                self._journal_sizes[username] = 0
+            self._journal_bytes[username] = on_disk
+        return self._journal_sizes[username]
+
+    def _write_snapshot(self, username: str, cache_data: Dict):
+        """Reescribe el snapshot completo del usuario de forma atómica (temporal + rename)."""
+        cache_file = self.get_cache_file_path(username)
+        tmp_file = cache_file.with_name(f".{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            if self.snapshot_format == "binary":
+                write_snapshot(tmp_file, cache_data)
+                with open(tmp_file, 'rb') as f:
+                    os.fsync(f.fileno())
+            else:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(cache_data, f, indent=2, ensure_ascii=False)
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.replace(tmp_file, cache_file)
+        finally:
+            if tmp_file.exists():
+                tmp_file.unlink()
+
+        # El snapshot en el otro formato queda obsoleto
+        for path in self._snapshot_candidates(username)[1:]:
+            if path.exists():
+                path.unlink()
+
+    def _reset_journal(self, username: str):
+        """Elimina el journal una vez integrado en el snapshot."""
+        journal_path = self.get_journal_path(username)
+        if journal_path.exists():
+            journal_path.unlink()
+        self._journal_sizes[username] = 0
+        self._journal_bytes[username] = 0
+
+    def _load_for_write(self, username: str) -> Dict:
+        """Carga el cache para modificarlo, partiendo de vacío si el snapshot está corrupto."""
+        try:
+            return self.load(username)
+        except (json.JSONDecodeError, KeyError, ValueError):
+            cache_data = empty_cache_data()
+            self._replay_journal(username, cache_data)
+            return cache_data
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    Backend SQLite (modo WAL) compartido por todos los usuarios en cache/cache.db.
+    Los posts y mapeos viven en tablas indexadas, por lo que consultar o
+    actualizar un status no requiere leer ni reescribir el cache completo.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            last_updated TEXT,
+            imported_from TEXT
+        );
+        CREATE TABLE IF NOT EXISTS processed_posts (
+            username TEXT NOT NULL,
+            status_id TEXT NOT NULL,
+            media_type TEXT,
+            processed_at TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (username, status_id)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS user_meta (
+            username TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (username, key)
+        ) WITHOUT ROWID;
+    """
+
+    # Una fila por imagen: posición dentro del carrusel y media key
+    MAPPING_TABLE = """
+        CREATE TABLE IF NOT EXISTS status_image_mapping (
+            username TEXT NOT NULL,
+            status_id TEXT NOT NULL,
+            position INTEGER NOT NULL DEFAULT 0,
+            image_url TEXT NOT NULL,
+            media_key TEXT,
+            PRIMARY KEY (username, status_id, position)
+        ) WITHOUT ROWID
+    """
+
+    # Se crean después de migrar status_image_mapping (ver _migrate_mapping_table)
+    INDEXES = """
+        CREATE INDEX IF NOT EXISTS idx_posts_media_type
+            ON processed_posts (username, media_type);
+        CREATE INDEX IF NOT EXISTS idx_mapping_image_url
+            ON status_image_mapping (username, image_url);
+        CREATE INDEX IF NOT EXISTS idx_mapping_media_key
+            ON status_image_mapping (username, media_key);
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Abre la conexión (una sola por instancia) y crea el esquema si falta."""
+        if self._conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            self._migrate_mapping_table(conn)
+            conn.execute(self.MAPPING_TABLE)
+            conn.executescript(self.INDEXES)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _migrate_mapping_table(conn: sqlite3.Connection):
+        """
+        Migra status_image_mapping de una fila por status (una sola URL) a una
+        fila por imagen con su posición en el carrusel y su media_key.
+        """
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(status_image_mapping)")}
+        if not columns or "position" in columns:
+            return
+        # La migración completa va en una sola transacción (el DDL de SQLite es transaccional)
+        with conn:
+            conn.execute("BEGIN")
+            rows = conn.execute("SELECT username, status_id, image_url FROM status_image_mapping").fetchall()
+            conn.execute("DROP TABLE status_image_mapping")
+            conn.execute(SQLiteCacheStore.MAPPING_TABLE)
+            conn.executemany(
+                "INSERT INTO status_image_mapping (username, status_id, position, image_url, media_key) "
+                "VALUES (?, ?, 0, ?, ?)",
+                [(username, status_id, url, media_key_for(url)) for username, status_id, url in rows]
+            )
+
+    def close(self):
+        """Cierra la conexión con la base de datos."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def exists(self, username: str) -> bool:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM users WHERE username = ? AND last_updated IS NOT NULL", (username,)
+            ).fetchone()
+        return row is not None
+
+    def load(self, username: str) -> Dict:
+        cache_data = empty_cache_data()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT last_updated FROM users WHERE username = ?", (username,)
+            ).fetchone()
+            if row is None or row[0] is None:
+                return cache_data
+            cache_data["last_updated"] = row[0]
+            for status_id, data in conn.execute(
+                "SELECT status_id, data FROM processed_posts WHERE username = ?", (username,)
+            ):
+                cache_data["processed_posts"][status_id] = json.loads(data)
+            mappings = cache_data["status_to_image_mapping"]
+            for status_id, image_url in conn.execute(
+                "SELECT status_id, image_url FROM status_image_mapping WHERE username = ? "
+                "ORDER BY CAST(status_id AS INTEGER), status_id, position", (username,)
+            ):
+                mappings.setdefault(status_id, []).append(image_url)
+            cache_data["meta"] = self._read_meta(conn, username)
+        return cache_data
+
+    def save(self, username: str, cache_data: Dict):
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM processed_posts WHERE username = ?", (username,))
+                conn.execute("DELETE FROM status_image_mapping WHERE username = ?", (username,))
+                conn.execute("DELETE FROM user_meta WHERE username = ?", (username,))
+                self._upsert_rows(
+                    conn, username,
+                    cache_data.get("processed_posts", {}),
+                    cache_data.get("status_to_image_mapping", {})
+                )
+                self._write_meta(conn, username, cache_data.get("meta") or {})
+
+    def upsert(self, username: str, posts: Optional[Dict] = None, mappings: Optional[Dict] = None):
+        if not posts and not mappings:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._upsert_rows(conn, username, posts or {}, mappings or {})
+
+    def delete(self, username: str, status_ids: Iterable[str]):
+        rows = [(username, status_id) for status_id in status_ids]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany(
+                    "DELETE FROM processed_posts WHERE username = ? AND status_id = ?", rows
+                )
+                conn.executemany(
+                    "DELETE FROM status_image_mapping WHERE username = ? AND status_id = ?", rows
+                )
+                self._touch_user(conn, username)
+
+    def get_meta(self, username: str) -> Dict:
+        with self._lock:
+            return self._read_meta(self._connect(), username)
+
+    def version(self, username: str):
+        """
+        PRAGMA data_version: solo cambia con los commits de otras conexiones
+        (otro proceso u otra instancia), no con los de esta.
+        """
+        with self._lock:
+            return self._connect().execute("PRAGMA data_version").fetchone()[0]
+
+    def set_meta(self, username: str, values: Dict):
+        if not values:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._write_meta(conn, username, values)
+
+    def has_post(self, username: str, status_id: str) -> bool:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM processed_posts WHERE username = ? AND status_id = ?",
+                (username, status_id)
+            ).fetchone()
+        return row is not None
+
+    def get_post(self, username: str, status_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT data FROM processed_posts WHERE username = ? AND status_id = ?",
+                (username, status_id)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def clear(self, username: str) -> bool:
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                existed = conn.execute(
+                    "SELECT 1 FROM users WHERE username = ? AND last_updated IS NOT NULL", (username,)
+                ).fetchone() is not None
+                conn.execute("DELETE FROM processed_posts WHERE username = ?", (username,))
+                conn.execute("DELETE FROM status_image_mapping WHERE username = ?", (username,))
+                conn.execute("DELETE FROM user_meta WHERE username = ?", (username,))
+                # Se conserva imported_from para no volver a importar el JSON antiguo
+                conn.execute(
+                    "UPDATE users SET last_updated = NULL WHERE username = ?", (username,)
+                )
+        return existed
+
+    def location(self, username: str) -> str:
+        return f"{self.db_path}#{username}"
+
+    def find_status_ids_by_media_keys(self, username: str, media_keys: Iterable[str]) -> Dict[str, list]:
+        """
+        Consulta indexada media key -> [status_id, ...] para las claves indicadas,
+        con los status ordenados por valor numérico (ver media_index.status_order).
+        Returns: {media_key: [status_id, ...]} solo con las claves encontradas.
+        """
+        keys = list(media_keys)
+        result: Dict[str, list] = {}
+        with self._lock:
+            conn = self._connect()
+            # Lotes por debajo del límite de parámetros de SQLite
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for media_key, status_id in conn.execute(
+                    f"SELECT DISTINCT media_key, status_id FROM status_image_mapping "
+                    f"WHERE username = ? AND media_key IN ({placeholders}) "
+                    f"ORDER BY CAST(status_id AS INTEGER), status_id",
+                    (username, *batch)
+                ):
+                    result.setdefault(media_key, []).append(status_id)
+        return result
+
+    def was_imported(self, username: str) -> bool:
+        """Indica si ya se importó un cache JSON para el usuario."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT imported_from FROM users WHERE username = ?", (username,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def import_json_cache(self, username: str, json_path: Path) -> int:
+        """
+        Importa una única vez un cache JSON existente (formato clásico).
+        Returns: número de posts importados (0 si ya se había importado).
+        """
+        json_store = JSONCacheStore(Path(json_path).parent)
+        if self.was_imported(username) or not json_store.exists(username):
+            return 0
+
+        # Snapshot + journal pendiente del backend JSON
+        cache_data = json_store.load(username)
+
+        posts = cache_data.get("processed_posts", {})
+        mappings = cache_data.get("status_to_image_mapping", {})
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._upsert_rows(conn, username, posts, mappings)
+                self._write_meta(conn, username, cache_data.get("meta") or {})
+                conn.execute(
+                    "UPDATE users SET imported_from = ?, last_updated = COALESCE(?, last_updated) "
+                    "WHERE username = ?",
+                    (str(json_path), cache_data.get("last_updated"), username)
+                )
+        return len(posts)
+
+    def _upsert_rows(self, conn: sqlite3.Connection, username: str, posts: Dict, mappings: Dict):
+        """Escribe posts y mapeos dentro de la transacción en curso."""
+        conn.executemany(
+            "INSERT OR REPLACE INTO processed_posts "
+            "(username, status_id, media_type, processed_at, data) VALUES (?, ?, ?, ?, ?)",
+            [
+                (username, status_id, post.get("media_type"), post.get("processed_at"),
+                 json.dumps(post, ensure_ascii=False))
+                for status_id, post in posts.items()
+            ]
+        )
+        # Cada status se reescribe con todas las imágenes de su carrusel
+        conn.executemany(
+            "DELETE FROM status_image_mapping WHERE username = ? AND status_id = ?",
+            [(username, status_id) for status_id in mappings]
+        )
+        conn.executemany(
+            "INSERT INTO status_image_mapping (username, status_id, position, image_url, media_key) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (username, status_id, position, image_url, media_key_for(image_url))
+                for status_id, images in mappings.items()
+                for position, image_url in enumerate(image_list(images))
+            ]
+        )
+        self._touch_user(conn, username)
+
+    @staticmethod
+    def _read_meta(conn: sqlite3.Connection, username: str) -> Dict:
+        return {
+            key: json.loads(value)
+            for key, value in conn.execute("SELECT key, value FROM user_meta WHERE username = ?", (username,))
+        }
+
+    @staticmethod
+    def _write_meta(conn: sqlite3.Connection, username: str, values: Dict):
+        """Escribe metadatos del usuario dentro de la transacción en curso."""
+        conn.executemany(
+            "INSERT OR REPLACE INTO user_meta (username, key, value) VALUES (?, ?, ?)",
+            [(username, key, json.dumps(value)) for key, value in values.items()]
+        )
+
+    def _touch_user(self, conn: sqlite3.Connection, username: str):
+        """Registra al usuario y actualiza su marca de última modificación."""
+        conn.execute(
+            "INSERT INTO users (username, last_updated) VALUES (?, ?) "
+            "ON CONFLICT(username) DO UPDATE SET last_updated = excluded.last_updated",
+            (username, datetime.now().isoformat())
+        )
@@ -0,0 +1,180 @@
+"""
+Módulo con bloqueos de archivo entre procesos para el cache.
+
+FileLock serializa las escrituras de varios procesos (CLI, servidor MCP,
+video_selector.py) sobre los archivos de cache de un usuario. RunLease
+reserva un usuario para una única ejecución de descarga a la vez.
+Los bloqueos son consultivos: fcntl.flock en POSIX y msvcrt.locking en Windows.
+"""
+import json
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LockTimeout(TimeoutError):
+    """No se pudo obtener el bloqueo en el tiempo indicado."""
+
+
+def _try_lock(fd: int, shared: bool) -> bool:
+    """Intenta bloquear el descriptor sin esperar. Returns: True si se obtuvo."""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        else:
+            # msvcrt no distingue bloqueos compartidos: se usa siempre exclusivo
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Bloqueo consultivo sobre un archivo .lock, reentrante dentro del mismo objeto.
+
+    Uso:
+        with FileLock(path):            # exclusivo (escrituras)
+            ...
+        with FileLock(path, shared=True):  # compartido (lecturas)
+            ...
+    """
+
+    def __init__(self, path: Path, shared: bool = False, timeout: Optional[float] = 30.0,
+                 poll_interval: float = 0.01):
+        self.path = Path(path)
+        self.shared = shared
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._fd: Optional[int] = None
+        self._depth = 0
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """Obtiene el bloqueo; con blocking=False devuelve False si está ocupado."""
+        if self._depth:
+            self._depth += 1
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        while not _try_lock(fd, self.shared):
+            if not blocking:
+                os.close(fd)
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                raise LockTimeout(f"Tiempo de espera agotado bloqueando {self.path}")
+            time.sleep(self.poll_interval)
+
+        self._fd = fd
+        self._depth = 1
+        return True
+
+    def release(self):
+        """Libera el bloqueo (el último release de una adquisición anidada)."""
+        if not self._depth:
+            return
+        self._depth -= 1
+        if self._depth == 0:
+            try:
+                _unlock(self._fd)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+    @property
+    def locked(self) -> bool:
+        return self._depth > 0
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class RunLease:
+    """
+    Reserva de un usuario para una única ejecución a la vez (cache/{username}.lease).
+
+    El bloqueo se mantiene mientras dure la ejecución y el sistema operativo lo
+    libera si el proceso muere, así que nunca quedan reservas huérfanas. El
+    archivo guarda quién la tiene para poder informarlo a la segunda ejecución.
+
+    Uso:
+        with RunLease(cache_dir, username) as lease:
+            if not lease.acquire():
+                ...  # rechazar o continuar en solo lectura
+    """
+
+    def __init__(self, cache_dir: Path, username: str, owner: str = ""):
+        self.username = username
+        self.owner = owner or Path(sys.argv[0]).name
+        self.path = Path(cache_dir) / f"{username}.lease"
+        self._lock = FileLock(self.path, timeout=None)
+
+    def acquire(self) -> bool:
+        """Intenta reservar el usuario sin esperar. Returns: True si se obtuvo."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        info = {
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "owner": self.owner,
+            "started_at": datetime.now().isoformat()
+        }
+        os.ftruncate(self._lock._fd, 0)
+        os.lseek(self._lock._fd, 0, os.SEEK_SET)
+        os.write(self._lock._fd, json.dumps(info).encode("utf-8"))
+        return True
+
+    def release(self):
+        """Libera la reserva."""
+        if self._lock.locked:
+            os.ftruncate(self._lock._fd, 0)
+            self._lock.release()
+
+    @property
+    def held(self) -> bool:
+        return self._lock.locked
+
+    def holder(self) -> Dict:
+        """Información de la ejecución que tiene la reserva (vacío si no se conoce)."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.loads(f.read() or "{}")
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def describe_holder(self) -> str:
+        """Descripción legible de quién tiene la reserva."""
+        info = self.holder()
+        if not info:
+            return "otra ejecución"
+        return f"{info.get('owner') or 'proceso'} (PID {info.get('pid')}, desde {info.get('started_at')})"
+
+    def __enter__(self) -> "RunLease":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
@@ -35,8 +35,10 @@ class FileUtils:
             
             FileUtils.ensure_directory_exists(base_dir)
 
-            videos = [item for item in media_data if item.get('media_type') == 'video']
-            images = [item for item in media_data if item.get('media_type') == 'image']
+            # Los StatusRecord del almacén de status se guardan como diccionarios
+            items = [item.to_dict() if hasattr(item, 'to_dict') else item for item in media_data]
+            videos = [item for item in items if item.get('media_type') == 'video']
+            images = [item for item in items if item.get('media_type') == 'image']
             
             data_to_save = {
                 "extraction_date": datetime.now().isoformat(),
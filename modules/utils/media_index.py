@@ -0,0 +1,181 @@
+"""
+Módulo con el índice inverso media key -> status del cache de un usuario.
+Se mantiene junto a status_to_image_mapping para resolver en O(1) qué status
+contiene una imagen y detectar conflictos sin recorrer todos los mapeos.
+También define MediaURLSet, el conjunto ordenado de URLs del pipeline de imágenes.
+"""
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from .url_utils import URLUtils
+
+
+def image_list(value: Union[str, List[str], None]) -> List[str]:
+    """
+    Normaliza un valor de status_to_image_mapping a la lista ordenada de
+    imágenes del status. Los caches antiguos guardaban una sola URL (str).
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    return [url for url in value if url]
+
+
+def normalize_mappings(mappings: Dict) -> Dict[str, List[str]]:
+    """Migra en sitio los mapeos de una sola URL al formato de lista (descarta vacíos)."""
+    for status_id in list(mappings):
+        images = image_list(mappings[status_id])
+        if images:
+            mappings[status_id] = images
+        else:
+            del mappings[status_id]
+    return mappings
+
+
+def status_order(status_id: str) -> tuple:
+    """
+    Clave de orden de los status: por valor numérico del Snowflake (un ID de
+    18 dígitos es anterior a uno de 19). Los IDs no numéricos van primero,
+    igual que con CAST(status_id AS INTEGER) en SQLite.
+    """
+    return (int(status_id) if status_id.isdigit() else 0, status_id)
+
+
+def preferred_status(status_ids: List[str]) -> str:
+    """
+    Status que prevalece cuando una imagen está mapeada a varios (ordenados con
+    status_order): el más antiguo, el post original frente a citas y reposts.
+    Lo usan la descarga para nombrar archivos y la limpieza de mapeos
+    duplicados, para que ambas conserven el mismo.
+    """
+    return status_ids[0]
+
+
+def media_key_for(url: str) -> str:
+    """Clave del índice: la media key si la URL es de pbs.twimg.com, si no la URL."""
+    return URLUtils.extract_media_key(url) or url
+
+
+class MediaKeyIndex:
+    """
+    Índice media key -> [status_id, ...] ordenado por status ID (status_order),
+    el mismo criterio que usa el backend SQLite. Un status puede tener varias
+    imágenes (carrusel); un media key con más de un status es un conflicto de mapeo.
+    """
+
+    def __init__(self, mappings: Optional[Dict] = None):
+        self._by_key: Dict[str, List[str]] = {}
+        self._keys_of: Dict[str, List[str]] = {}
+        self._conflicts: set[str] = set()
+        for status_id, image_url in (mappings or {}).items():
+            self.set(status_id, image_url)
+
+    def set(self, status_id: str, images: Union[str, List[str], None]):
+        """Registra (o reemplaza) las imágenes asociadas a un status."""
+        self.remove(status_id)
+        keys = list(dict.fromkeys(media_key_for(url) for url in image_list(images)))
+        if not keys:
+            return
+        self._keys_of[status_id] = keys
+        for key in keys:
+            statuses = self._by_key.setdefault(key, [])
+            statuses.append(status_id)
+            if len(statuses) > 1:
+                statuses.sort(key=status_order)
+                self._conflicts.add(key)
+
+    def update(self, mappings: Dict):
+        """Registra en bloque varios mapeos status -> imagen(es)."""
+        for status_id, images in mappings.items():
+            self.set(status_id, images)
+
+    def remove(self, status_id: str):
+        """Elimina los mapeos de un status (si existían)."""
+        for key in self._keys_of.pop(status_id, ()):
+            statuses = self._by_key[key]
+            statuses.remove(status_id)
+            if not statuses:
+                del self._by_key[key]
+            if len(statuses) <= 1:
+                self._conflicts.discard(key)
+
+    def discard_many(self, status_ids: Iterable[str]):
+        for status_id in status_ids:
+            self.remove(status_id)
+
+    def statuses_for(self, image_url: str) -> List[str]:
+        """Status que contienen la imagen, del más antiguo al más reciente (por ID)."""
+        return list(self._by_key.get(media_key_for(image_url), ()))
+
+    def media_keys_of(self, status_id: str) -> List[str]:
+        """Media keys mapeadas a un status, en el orden del carrusel."""
+        return list(self._keys_of.get(status_id, ()))
+
+    def conflicts(self) -> Dict[str, List[str]]:
+        """Media keys mapeadas a más de un status, con sus status en orden."""
+        return {key: list(self._by_key[key]) for key in self._conflicts}
+
+    def __len__(self) -> int:
+        return len(self._keys_of)
+
+
+class MediaURLSet:
+    """
+    Conjunto de URLs de imágenes en orden de inserción (el orden de descarga),
+    con pertenencia en O(1) por media key: dos URLs de la misma imagen con
+    distinto formato o tamaño son la misma entrada y se conserva la primera.
+    Guarda además el status de cada imagen cuando se conoce.
+
+    Sustituye a las listas con comprobaciones `url not in image_urls`, que
+    recorrían toda la lista (O(n²) en el pipeline); admite append/extend.
+    """
+
+    __slots__ = ("_urls", "_statuses")
+
+    def __init__(self, urls: Iterable[str] = ()):
+        self._urls: Dict[str, str] = {}
+        self._statuses: Dict[str, str] = {}
+        self.extend(urls)
+
+    def add(self, url: str, status_id: Optional[str] = None) -> bool:
+        """Añade la URL si su imagen no estaba. Devuelve True si era nueva."""
+        key = media_key_for(url)
+        is_new = key not in self._urls
+        if is_new:
+            self._urls[key] = url
+        if status_id and key not in self._statuses:
+            self._statuses[key] = status_id
+        return is_new
+
+    append = add
+
+    def extend(self, urls: Iterable[str]):
+        for url in urls:
+            self.add(url)
+
+    def canonical(self, url: str) -> Optional[str]:
+        """URL guardada para la misma imagen que `url`, o None si no está."""
+        return self._urls.get(media_key_for(url))
+
+    def status_of(self, url: str) -> Optional[str]:
+        """Status asociado a la imagen de `url`, si se conoce."""
+        return self._statuses.get(media_key_for(url))
+
+    def status_mapping(self) -> Dict[str, str]:
+        """Mapeo {url guardada: status_id} de las imágenes con status conocido."""
+        return {self._urls[key]: status_id for key, status_id in self._statuses.items() if key in self._urls}
+
+    def urls(self) -> List[str]:
+        return list(self._urls.values())
+
+    def __contains__(self, url: str) -> bool:
+        return media_key_for(url) in self._urls
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._urls.values())
+
+    def __len__(self) -> int:
+        return len(self._urls)
+
+    def __repr__(self) -> str:
+        return f"MediaURLSet({len(self)} urls)"
@@ -0,0 +1,205 @@
+"""
+Módulo con el índice de pertenencia de status procesados.
+
+Un filtro de Bloom descarta en O(1) los status que no están (el caso habitual
+al hacer scroll) y un array int64 ordenado confirma los positivos con búsqueda
+binaria (acotada primero por una lista de separadores, uno por bloque de
+FENCE_STRIDE valores). Las altas recientes se acumulan en un conjunto pendiente que se
+fusiona con el array al superar un umbral. Coste aproximado: 8 bytes por
+status en el array más ~2 bytes del filtro.
+
+Los índices se comparten en todo el proceso a través de get_status_index().
+"""
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+BLOOM_BITS_PER_ITEM = 16  # ~1.4% de falsos positivos con 2 funciones hash
+MERGE_THRESHOLD = 4096  # Altas pendientes antes de fusionarlas en el array
+FENCE_STRIDE = 64  # Un valor de cada bloque del array se guarda en una lista para acotar la búsqueda
+
+_INT64_MAX = 2 ** 63 - 1
+
+
+class BloomFilter:
+    """
+    Filtro de Bloom particionado sobre enteros con dos posiciones por valor:
+    el resto del valor módulo dos tamaños impares consecutivos (coprimos).
+    Los Snowflake crecen casi de forma secuencial, así que el módulo reparte
+    bien los bits y evita aritmética de 128 bits en cada consulta.
+    """
+
+    def __init__(self, capacity: int, bits_per_item: int = BLOOM_BITS_PER_ITEM):
+        self.capacity = max(capacity, 1024)
+        self.m1 = (self.capacity * bits_per_item // 2) | 1
+        self.m2 = self.m1 + 2
+        self.bits = bytearray((self.m1 + self.m2 + 7) // 8)
+
+    def add(self, value: int):
+        p1 = value % self.m1
+        p2 = self.m1 + value % self.m2
+        self.bits[p1 >> 3] |= 1 << (p1 & 7)
+        self.bits[p2 >> 3] |= 1 << (p2 & 7)
+
+    def add_many(self, values: Iterable[int]):
+        bits, m1, m2 = self.bits, self.m1, self.m2
+        for value in values:
+            p1 = value % m1
+            p2 = m1 + value % m2
+            bits[p1 >> 3] |= 1 << (p1 & 7)
+            bits[p2 >> 3] |= 1 << (p2 & 7)
+
+    def __contains__(self, value: int) -> bool:
+        p1 = value % self.m1
+        if not self.bits[p1 >> 3] >> (p1 & 7) & 1:
+            return False
+        p2 = self.m1 + value % self.m2
+        return self.bits[p2 >> 3] >> (p2 & 7) & 1 == 1
+
+
+class StatusIndex:
+    """
+    Conjunto de status IDs con consulta rápida y poco consumo de memoria.
+    Acepta IDs como str o int; los IDs no numéricos se guardan aparte.
+    """
+
+    def __init__(self, status_ids: Iterable = (), merge_threshold: int = MERGE_THRESHOLD):
+        self.merge_threshold = merge_threshold
+        self._lock = threading.Lock()
+        self._pending: set[int] = set()
+        self._removed: set[int] = set()
+        self._other: set[str] = set()
+
+        values = set()
+        for status_id in status_ids:
+            value = self._to_int(status_id)
+            if value is None:
+                self._other.add(str(status_id))
+            else:
+                values.add(value)
+        self._set_sorted(array("q", sorted(values)))
+        self._rebuild_bloom()
+
+    @staticmethod
+    def _to_int(status_id) -> Optional[int]:
+        try:
+            value = int(status_id)
+        except (TypeError, ValueError):
+            return None
+        return value if 0 <= value <= _INT64_MAX else None
+
+    def _set_sorted(self, values: array):
+        """Publica un nuevo array ordenado junto con sus separadores."""
+        fences = values[::FENCE_STRIDE].tolist()
+        self._sorted, self._fences = values, fences
+
+    def _rebuild_bloom(self):
+        """Reconstruye el filtro con holgura (25%) para las altas futuras."""
+        bloom = BloomFilter(len(self._sorted) + len(self._sorted) // 4)
+        bloom.add_many(self._sorted)
+        self._bloom = bloom
+
+    def _in_sorted(self, value: int) -> bool:
+        values, fences = self._sorted, self._fences
+        block = bisect_left(fences, value)
+        if block < len(fences) and fences[block] == value:
+            return True
+        lo = (block - 1) * FENCE_STRIDE if block else 0
+        hi = min(block * FENCE_STRIDE, len(values))
+        pos = bisect_left(values, value, lo, hi)
+        return pos < hi and values[pos] == value
+
+    def __contains__(self, status_id) -> bool:
+        try:
+            value = int(status_id)
+        except (TypeError, ValueError):
+            return str(status_id) in self._other
+        if value < 0 or value > _INT64_MAX:
+            return str(status_id) in self._other
+        if value not in self._bloom:
+            return False
+        if value in self._pending:
+            return True
+        return value not in self._removed and self._in_sorted(value)
+
+    def __len__(self) -> int:
+        return len(self._sorted) - len(self._removed) + len(self._pending) + len(self._other)
+
+    def add(self, status_id):
+        """Registra un status como procesado."""
+        self.update((status_id,))
+
+    def update(self, status_ids: Iterable):
+        """Registra en bloque varios status como procesados."""
+        with self._lock:
+            for status_id in status_ids:
+                value = self._to_int(status_id)
+                if value is None:
+                    self._other.add(str(status_id))
+                    continue
+                self._removed.discard(value)
+                if value not in self._bloom or not self._in_sorted(value):
+                    self._pending.add(value)
+                    self._bloom.add(value)
+            if len(self._pending) + len(self._removed) >= self.merge_threshold:
+                self._merge()
+
+    def discard(self, status_id):
+        """Elimina un status del índice (si estaba)."""
+        value = self._to_int(status_id)
+        with self._lock:
+            if value is None:
+                self._other.discard(str(status_id))
+            elif value in self._pending:
+                self._pending.discard(value)
+            elif self._in_sorted(value):
+                self._removed.add(value)
+
+    def _merge(self):
+        """Fusiona las altas y bajas pendientes en el array ordenado."""
+        merged = (set(self._sorted) - self._removed) | self._pending
+        # Primero se publica el array nuevo y después se vacían los pendientes
+        self._set_sorted(array("q", sorted(merged)))
+        if len(self._sorted) > self._bloom.capacity:
+            self._rebuild_bloom()
+        self._pending = set()
+        self._removed = set()
+
+    def memory_bytes(self) -> int:
+        """Memoria aproximada del índice (array + filtro) en bytes."""
+        return self._sorted.itemsize * len(self._sorted) + len(self._bloom.bits) + \
+            sys.getsizeof(self._fences) + 32 * len(self._fences)
+
+
+_registry: Dict[Tuple[str, str], StatusIndex] = {}
+_registry_lock = threading.Lock()
+
+
+def get_status_index(scope: str, username: str,
+                     loader: Optional[Callable[[], Iterable]] = None) -> StatusIndex:
+    """
+    Devuelve el índice compartido del proceso para (scope, username).
+    Si no existe se construye una sola vez con los IDs que devuelva loader.
+    """
+    key = (scope, username)
+    index = _registry.get(key)
+    if index is None:
+        with _registry_lock:
+            index = _registry.get(key)
+            if index is None:
+                index = StatusIndex(loader() if loader else ())
+                _registry[key] = index
+    return index
+
+
+def peek_status_index(scope: str, username: str) -> Optional[StatusIndex]:
+    """Devuelve el índice si ya está construido, sin cargarlo."""
+    return _registry.get((scope, username))
+
+
+def drop_status_index(scope: str, username: str):
+    """Descarta el índice para que se reconstruya en el siguiente uso."""
+    with _registry_lock:
+        _registry.pop((scope, username), None)
@@ -0,0 +1,184 @@
+"""
+Módulo con el índice temporal de los status cacheados de un usuario.
+
+Como los status IDs son Snowflakes ordenados por fecha, cada tipo de medio se
+guarda como un array int64 ordenado y cualquier rango de fechas se resuelve
+con dos búsquedas binarias sobre las cotas de ID del rango (ver snowflake).
+Los buckets mensuales son solo las cotas de cada mes, así que contar por mes
+cuesta O(meses · log n) sin decodificar ningún ID.
+"""
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .snowflake import as_snowflake, datetime_to_snowflake, decode_timestamps_ms
+
+OTHER_MEDIA_TYPE = "other"  # Posts sin media_type (resultados negativos)
+
+
+def parse_date_bound(text: str, end: bool = False) -> datetime:
+    """
+    Convierte 'YYYY', 'YYYY-MM' o 'YYYY-MM-DD' en una cota UTC.
+    Con end=True devuelve el inicio del periodo siguiente (cota exclusiva),
+    de modo que --until 2025-06 incluye todo junio.
+    """
+    parts = [int(part) for part in text.strip().split("-")]
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Fecha no válida: {text} (usa YYYY, YYYY-MM o YYYY-MM-DD)")
+    year, month, day = (parts + [1, 1])[:3]
+    start = datetime(year, month, day, tzinfo=timezone.utc)
+    if not end:
+        return start
+    if len(parts) == 1:
+        return start.replace(year=year + 1)
+    if len(parts) == 2:
+        return _next_month(start)
+    return start + timedelta(days=1)
+
+
+def _as_utc(moment: Optional[datetime]) -> Optional[datetime]:
+    """Interpreta las fechas sin zona horaria como UTC."""
+    if moment is not None and moment.tzinfo is None:
+        return moment.replace(tzinfo=timezone.utc)
+    return moment
+
+
+def _next_month(moment: datetime) -> datetime:
+    if moment.month == 12:
+        return moment.replace(year=moment.year + 1, month=1, day=1)
+    return moment.replace(month=moment.month + 1, day=1)
+
+
+class TimeBucketIndex:
+    """
+    Índice por fecha de los posts procesados de un usuario.
+
+    Uso:
+        index = TimeBucketIndex(cache_data["processed_posts"])
+        index.count(since, until, "video")
+        index.monthly_counts()  # {"2025-06": {"image": 12, "video": 3, "total": 15}, ...}
+    """
+
+    def __init__(self, posts: Dict[str, Dict]):
+        by_type: Dict[str, List[int]] = {}
+        for status_id, post in posts.items():
+            value = as_snowflake(status_id)
+            if value is not None:
+                by_type.setdefault(post.get("media_type") or OTHER_MEDIA_TYPE, []).append(value)
+        self._ids: Dict[str, array] = {
+            media_type: array("q", sorted(values)) for media_type, values in by_type.items()
+        }
+
+    @property
+    def media_types(self) -> List[str]:
+        return sorted(self._ids)
+
+    def __len__(self) -> int:
+        return sum(len(values) for values in self._ids.values())
+
+    def _arrays(self, media_type: Optional[str]) -> Iterable[Tuple[str, array]]:
+        if media_type is None:
+            return self._ids.items()
+        return [(media_type, self._ids.get(media_type, array("q")))]
+
+    @staticmethod
+    def _bounds(values: array, since: Optional[datetime], until: Optional[datetime]) -> Tuple[int, int]:
+        """Posiciones [lo, hi) del rango [since, until) dentro de un array ordenado."""
+        lo = bisect_left(values, datetime_to_snowflake(since)) if since else 0
+        hi = bisect_left(values, datetime_to_snowflake(until)) if until else len(values)
+        return lo, max(lo, hi)
+
+    def count(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+              media_type: Optional[str] = None) -> int:
+        """Número de posts creados en [since, until)."""
+        total = 0
+        for _, values in self._arrays(media_type):
+            lo, hi = self._bounds(values, since, until)
+            total += hi - lo
+        return total
+
+    def status_ids(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                   media_type: Optional[str] = None) -> List[str]:
+        """Status IDs creados en [since, until), del más reciente al más antiguo."""
+        selected: List[int] = []
+        for _, values in self._arrays(media_type):
+            lo, hi = self._bounds(values, since, until)
+            selected.extend(values[lo:hi])
+        selected.sort(reverse=True)
+        return [str(value) for value in selected]
+
+    def entries(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                media_type: Optional[str] = None) -> List[Tuple[str, datetime]]:
+        """Como status_ids() pero con la fecha de creación (UTC) de cada status."""
+        status_ids = self.status_ids(since, until, media_type)
+        timestamps = decode_timestamps_ms(status_ids)
+        return [
+            (status_id, datetime.fromtimestamp(ms / 1000, tz=timezone.utc))
+            for status_id, ms in zip(status_ids, timestamps)
+        ]
+
+    def date_range(self) -> Optional[Tuple[datetime, datetime]]:
+        """Fechas (UTC) del post más antiguo y del más reciente."""
+        values = [v for _, arr in self._arrays(None) if arr for v in (arr[0], arr[-1])]
+        if not values:
+            return None
+        oldest, newest = decode_timestamps_ms([min(values), max(values)])
+        return (datetime.fromtimestamp(oldest / 1000, tz=timezone.utc),
+                datetime.fromtimestamp(newest / 1000, tz=timezone.utc))
+
+    def monthly_counts(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                       media_type: Optional[str] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Posts por mes (UTC) y tipo de medio: {"YYYY-MM": {tipo: n, ..., "total": n}}.
+        Solo incluye los meses con algún post.
+        """
+        span = self.date_range()
+        if span is None:
+            return {}
+        since, until = _as_utc(since), _as_utc(until)
+        start = max(since, span[0]) if since else span[0]
+        end = min(until, span[1]) if until else span[1]
+        month = start.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+        counts: Dict[str, Dict[str, int]] = {}
+        arrays = list(self._arrays(media_type))
+        while month <= end:
+            next_month = _next_month(month)
+            bucket_since = max(month, since) if since else month
+            bucket_until = min(next_month, until) if until else next_month
+            bucket = {}
+            for name, values in arrays:
+                lo, hi = self._bounds(values, bucket_since, bucket_until)
+                if hi > lo:
+                    bucket[name] = hi - lo
+            if bucket:
+                bucket["total"] = sum(bucket.values())
+                counts[month.strftime("%Y-%m")] = bucket
+            month = next_month
+        return counts
+
+
+def format_date_report(index: TimeBucketIndex, username: str, since: Optional[datetime] = None,
+                       until: Optional[datetime] = None, media_type: Optional[str] = None,
+                       monthly: bool = False) -> str:
+    """Texto con los posts del rango (conteo por tipo) y, opcionalmente, el desglose mensual."""
+    span = index.date_range()
+    if span is None:
+        return f"📭 No hay posts cacheados para @{username}"
+
+    lower = since.strftime("%Y-%m-%d") if since else span[0].strftime("%Y-%m-%d")
+    upper = (until - timedelta(seconds=1)).strftime("%Y-%m-%d") if until else span[1].strftime("%Y-%m-%d")
+    types = [media_type] if media_type else index.media_types
+    lines = [f"📅 Posts cacheados de @{username} entre {lower} y {upper} (UTC):"]
+    for name in types:
+        lines.append(f"   • {name}: {index.count(since, until, name)}")
+    lines.append(f"   Total: {index.count(since, until, media_type)}")
+
+    if monthly:
+        lines.append("")
+        lines.append("📊 Por mes:")
+        for month, bucket in index.monthly_counts(since, until, media_type).items():
+            detail = ", ".join(f"{name} {count}" for name, count in bucket.items() if name != "total")
+            lines.append(f"   {month}: {bucket['total']:5d}  ({detail})")
+    return "\n".join(lines)
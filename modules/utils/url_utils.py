@@ -26,6 +26,17 @@ class URLUtils:
         except Exception:
             return None
 
+    @staticmethod
+    def extract_media_key(url: str) -> str | None:
+        """
+        Extrae la media key de una URL de imagen de pbs.twimg.com
+        (p. ej. GrUYcfLXgAAuRsX), independiente del formato y tamaño pedidos.
+        """
+        if not url:
+            return None
+        match = re.search(r'pbs\.twimg\.com/media/([A-Za-z0-9_-]+)', url)
+        return match.group(1) if match else None
+
     @staticmethod
     def clean_image_url_robust(url: str) -> str | None:
         """
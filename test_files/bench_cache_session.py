@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark del coste por consulta de is_status_cached con 50k posts en cache:
+lectura directa del JSON en cada llamada vs. CacheSession en memoria.
+
+Uso:
+    python3 test_files/bench_cache_session.py [--posts 50000]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+
+
+def build_cache(cache_dir: Path, username: str, total_posts: int):
+    """Genera un cache JSON sintético con total_posts posts procesados."""
+    base_id = 1_800_000_000_000_000_000
+    now = datetime.now().isoformat()
+    posts = {}
+    mapping = {}
+    for i in range(total_posts):
+        status_id = str(base_id + i * 4096)
+        image_url = f"https://pbs.twimg.com/media/G{i:014d}?format=jpg&name=large"
+        posts[status_id] = {"processed_at": now, "media_type": "image", "image_url": image_url}
+        mapping[status_id] = image_url
+    data = {"last_updated": now, "processed_posts": posts, "status_to_image_mapping": mapping}
+    with open(cache_dir / f"{username}_processed_posts.json", 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return list(posts)
+
+
+def time_lookups(manager: CacheManager, username: str, status_ids: list) -> float:
+    """Devuelve el coste medio por consulta en microsegundos."""
+    start = time.perf_counter()
+    for status_id in status_ids:
+        manager.is_status_cached(username, status_id)
+    return (time.perf_counter() - start) / len(status_ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de CacheSession")
+    parser.add_argument("--posts", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = Path(tmp)
+        status_ids = build_cache(cache_dir, "bench_user", args.posts)
+        manager = CacheManager(cache_dir=cache_dir)
+
+        print(f"📊 Cache sintético: {args.posts} posts")
+
+        # Sin sesión cada consulta relee el JSON completo: pocas muestras bastan
+        direct_us = time_lookups(manager, "bench_user", status_ids[:20])
+        print(f"🐢 Sin sesión:   {direct_us:12.1f} µs/consulta")
+
+        with manager.session("bench_user"):
+            lookups = status_ids[:50_000] + [str(i) for i in range(50_000)]
+            session_us = time_lookups(manager, "bench_user", lookups)
+        print(f"⚡ Con sesión:   {session_us:12.3f} µs/consulta")
+        print(f"🚀 Aceleración: x{direct_us / session_us:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
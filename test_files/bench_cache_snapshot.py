@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Benchmark del tiempo de carga del snapshot de cache: JSON actual vs. formato
+binario compacto (cache_snapshot), con tamaño en disco y coste de consulta.
+
+Uso:
+    python3 test_files/bench_cache_snapshot.py [--entries 1000000]
+"""
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_snapshot import read_snapshot, write_snapshot
+
+
+def build_cache_data(total: int) -> dict:
+    """Genera un cache sintético con total posts de imagen mapeados."""
+    base_id = 1_800_000_000_000_000_000
+    now = datetime.now().replace(microsecond=0).isoformat()
+    posts = {}
+    mapping = {}
+    for i in range(total):
+        status_id = str(base_id + i * 4096)
+        image_url = f"https://pbs.twimg.com/media/G{i:014d}?format=jpg&name=large"
+        posts[status_id] = {"processed_at": now, "media_type": "image", "image_url": image_url}
+        mapping[status_id] = image_url
+    return {"last_updated": now, "processed_posts": posts, "status_to_image_mapping": mapping}
+
+
+def timed(func, *args):
+    """Ejecuta func y devuelve (resultado, milisegundos)."""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def load_json(path: Path) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del snapshot binario de cache")
+    parser.add_argument("--entries", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    data = build_cache_data(args.entries)
+    probe_ids = list(data["processed_posts"])[::max(1, args.entries // 10_000)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = Path(tmp) / "bench_processed_posts.json"
+        snap_path = Path(tmp) / "bench_processed_posts.snap"
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        write_snapshot(snap_path, data)
+
+        print(f"📊 Cache sintético: {args.entries:,} entradas")
+        print(f"💾 JSON:    {json_path.stat().st_size / 1e6:10.1f} MB")
+        print(f"💾 Binario: {snap_path.stat().st_size / 1e6:10.1f} MB")
+
+        _, json_ms = timed(load_json, json_path)
+        snapshot, snap_ms = timed(read_snapshot, snap_path)
+        _, full_ms = timed(snapshot.to_cache_data)
+        print(f"🐢 Carga JSON:                 {json_ms:10.1f} ms")
+        print(f"⚡ Carga binaria:              {snap_ms:10.1f} ms")
+        print(f"📦 Binaria + materializar dict:{full_ms + snap_ms:10.1f} ms")
+
+        start = time.perf_counter()
+        for status_id in probe_ids:
+            assert status_id in snapshot
+        lookup_us = (time.perf_counter() - start) / len(probe_ids) * 1e6
+        print(f"🔍 Consulta en snapshot:       {lookup_us:10.2f} µs")
+        print(f"🚀 Aceleración de carga: x{json_ms / snap_ms:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
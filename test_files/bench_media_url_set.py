@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark de MediaURLSet frente a la lista con comprobaciones de pertenencia
+que usaba el pipeline de imágenes (`url not in image_urls` y la comparación
+de la base de cada URL de _is_duplicate_image).
+
+Uso:
+    python3 test_files/bench_media_url_set.py [--sizes 10000 100000] [--list-limit 10000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.media_index import MediaURLSet
+
+
+def make_urls(count: int) -> list:
+    """URLs de pbs.twimg.com con un 10% de variantes de tamaño de imágenes ya vistas."""
+    urls = [f"https://pbs.twimg.com/media/G{i:014d}?format=jpg&name=large" for i in range(count)]
+    for i in range(0, count, 10):
+        urls[i] = f"https://pbs.twimg.com/media/G{i // 2:014d}?format=jpg&name=small"
+    return urls
+
+
+def build_list(urls: list) -> list:
+    """Versión anterior: lista con comparación de la base (sin parámetros) de cada URL."""
+    image_urls = []
+    for url in urls:
+        base = url.split('?')[0]
+        if not any(existing.split('?')[0] == base for existing in image_urls):
+            image_urls.append(url)
+    return image_urls
+
+
+def build_set(urls: list) -> MediaURLSet:
+    image_urls = MediaURLSet()
+    for url in urls:
+        image_urls.add(url)
+    return image_urls
+
+
+def timed(function, *args) -> tuple:
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de MediaURLSet")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--list-limit", type=int, default=10_000,
+                        help="Tamaño máximo medido con la lista (O(n²)); por encima se estima")
+    args = parser.parse_args()
+
+    print(f"{'imágenes':>10}{'lista (ms)':>14}{'MediaURLSet (ms)':>18}{'µs/add':>9}")
+    for size in args.sizes:
+        urls = make_urls(size)
+        url_set, set_ms = timed(build_set, urls)
+        if size <= args.list_limit:
+            url_list, list_ms = timed(build_list, urls)
+            assert url_list == url_set.urls()
+            list_label = f"{list_ms:,.0f}"
+        else:
+            # Coste cuadrático: se extrapola desde la medida con list-limit
+            _, sample_ms = timed(build_list, make_urls(args.list_limit))
+            list_label = f"~{sample_ms * (size / args.list_limit) ** 2:,.0f}"
+        print(f"{size:>10,}{list_label:>14}{set_ms:>18,.1f}{set_ms * 1000 / size:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
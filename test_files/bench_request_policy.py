@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la política de peticiones: bytes transferidos y tiempo de carga
+por status con y sin RequestPolicy, contra un sitio local que imita una página
+de status de X (imágenes a tamaño completo, fuente, segmentos de video y
+telemetría). Los bytes se cuentan en el servidor.
+
+Uso:
+    python3 test_files/bench_request_policy.py [--statuses 20] [--block-images]
+"""
+
+import argparse
+import asyncio
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.browser.request_policy import RequestPolicy
+
+IMAGE_BYTES = 900_000  # Imagen name=large típica
+FONT_BYTES = 120_000
+SEGMENT_BYTES = 600_000
+
+STATUS_PAGE = """<!DOCTYPE html>
+<html><head>
+<style>@font-face {{ font-family: Chirp; src: url(/fonts/chirp.woff2); }} body {{ font-family: Chirp; }}</style>
+<script>fetch('/i/api/1.1/jot/client_event.json', {{method: 'POST', body: 'x'}}).catch(() => {{}});</script>
+</head><body>
+<article data-testid="tweet">
+  <a href="/testuser">Test User</a>
+  <a href="/testuser/status/{sid}/photo/1"><img src="/pbs.twimg.com/media/A{sid}?format=jpg&name=large" width="400" height="300"></a>
+  <a href="/testuser/status/{sid}/photo/2"><img src="/pbs.twimg.com/media/B{sid}?format=jpg&name=large" width="400" height="300"></a>
+  <video src="/video.twimg.com/amplify_video/{sid}/seg-1.mp4" autoplay muted></video>
+</article>
+</body></html>
+"""
+
+
+class _CountingHandler(BaseHTTPRequestHandler):
+    bytes_sent = 0
+    lock = threading.Lock()
+
+    def _send(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+        with self.lock:
+            type(self).bytes_sent += len(body)
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if "/status/" in path:
+            self._send(STATUS_PAGE.format(sid=path.rstrip("/").split("/")[-1]).encode(), "text/html")
+        elif "/media/" in path:
+            self._send(b"\xff" * IMAGE_BYTES, "image/jpeg")
+        elif path.endswith(".woff2"):
+            self._send(b"\0" * FONT_BYTES, "font/woff2")
+        elif "video.twimg.com" in path:
+            self._send(b"\0" * SEGMENT_BYTES, "video/mp4")
+        else:
+            self._send(b"{}", "application/json")
+
+    do_POST = do_GET
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def run_statuses(base: str, statuses: int, policy) -> tuple:
+    """Carga `statuses` páginas de status y devuelve (bytes, ms por status, srcs leídos)."""
+    from playwright.async_api import async_playwright
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch()
+        context = await browser.new_context()
+        if policy:
+            await policy.install(context)
+        page = await context.new_page()
+        _CountingHandler.bytes_sent = 0
+        srcs = 0
+        start = time.perf_counter()
+        for i in range(statuses):
+            await page.goto(f"{base}/testuser/status/{1000 + i}", wait_until="load")
+            srcs += len(await page.eval_on_selector_all('img[src*="pbs.twimg.com/media"]', "els => els.map(e => e.src)"))
+        elapsed = (time.perf_counter() - start) * 1000 / statuses
+        await browser.close()
+        return _CountingHandler.bytes_sent, elapsed, srcs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de RequestPolicy")
+    parser.add_argument("--statuses", type=int, default=20)
+    parser.add_argument("--block-images", action="store_true", help="Bloquear también los cuerpos de imagen")
+    args = parser.parse_args()
+
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        print("❌ Este benchmark necesita Playwright (pip install playwright && playwright install chromium)")
+        return 1
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CountingHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    try:
+        print(f"📊 {args.statuses} status, imágenes de {IMAGE_BYTES // 1000} KB, segmentos de {SEGMENT_BYTES // 1000} KB")
+        baseline = asyncio.run(run_statuses(base, args.statuses, None))
+        policy = RequestPolicy.from_config({"image": args.block_images})
+        blocked = asyncio.run(run_statuses(base, args.statuses, policy))
+    finally:
+        server.shutdown()
+
+    print(f"{'':<18}{'bytes':>14}{'ms/status':>12}{'img src':>10}")
+    for name, (sent, elapsed, srcs) in (("sin política", baseline), ("con política", blocked)):
+        print(f"{name:<18}{sent:>14,}{elapsed:>12.1f}{srcs:>10}")
+    saved = 1 - blocked[0] / baseline[0] if baseline[0] else 0
+    print(f"💾 Ahorro de transferencia: {saved:.0%} (bloqueadas: {policy.summary()})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
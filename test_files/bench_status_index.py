@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark del índice de status procesados: coste por consulta (aciertos y
+fallos) y memoria por status frente a un set de str.
+
+Uso:
+    python3 test_files/bench_status_index.py [--statuses 1000000]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.status_index import StatusIndex
+
+
+def time_lookups(container, status_ids: list) -> float:
+    """Devuelve el coste medio por consulta en microsegundos."""
+    start = time.perf_counter()
+    for status_id in status_ids:
+        status_id in container
+    return (time.perf_counter() - start) / len(status_ids) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de StatusIndex")
+    parser.add_argument("--statuses", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    base_id = 1_800_000_000_000_000_000
+    status_ids = [str(base_id + i * 4096) for i in range(args.statuses)]
+    hits = status_ids[::max(1, args.statuses // 100_000)]
+    misses = [str(base_id + i * 4096 + 1) for i in range(len(hits))]
+
+    start = time.perf_counter()
+    index = StatusIndex(status_ids)
+    build_ms = (time.perf_counter() - start) * 1000
+    plain = set(status_ids)
+    plain_bytes = sys.getsizeof(plain) + sum(sys.getsizeof(s) for s in status_ids)
+
+    print(f"📊 Índice con {args.statuses:,} status (construido en {build_ms:.0f} ms)")
+    print(f"💾 StatusIndex: {index.memory_bytes() / args.statuses:6.1f} bytes/status")
+    print(f"💾 set[str]:    {plain_bytes / args.statuses:6.1f} bytes/status")
+    print(f"⚡ Fallo (Bloom):     {time_lookups(index, misses):6.2f} µs/consulta")
+    print(f"🔍 Acierto (bisect):  {time_lookups(index, hits):6.2f} µs/consulta")
+    print(f"🐍 set[str]:          {time_lookups(plain, hits):6.2f} µs/consulta")
+
+
+if __name__ == "__main__":
+    main()
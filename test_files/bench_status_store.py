@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark de memoria de StatusStore frente a la lista de diccionarios y los
+dos conjuntos (processed_status_ids y unique_urls) que usaba URLExtractor,
+en un backfill de un timeline largo.
+
+Uso:
+    python3 test_files/bench_status_store.py [--statuses 10000 50000] [--spill-threshold 5000]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.extraction.status_store import StatusStore
+
+BASE_ID = 1790000000000000000
+
+
+def make_records(count: int):
+    """Registros como los que devuelve el observer del timeline (texto de ~150 caracteres)."""
+    for i in range(count):
+        status_id = str(BASE_ID + i * 7)
+        yield {
+            "href": f"/testuser/status/{status_id}/photo/1",
+            "id": status_id,
+            "author": "testuser",
+            "text": f"Texto del status {i} " + "lorem ipsum " * 11,
+            "kind": "video" if i % 6 == 0 else "image",
+            "images": [f"https://pbs.twimg.com/media/G{i:014d}?format=jpg&name=small"],
+            "carousel": 1,
+            "media_kinds": ["photo"],
+            "media_exact": True,
+        }
+
+
+def build_dicts(count: int):
+    """Versión anterior: un diccionario por status y dos conjuntos de control."""
+    all_status_urls, processed_status_ids, unique_urls = [], set(), set()
+    for record in make_records(count):
+        status_id = record["id"]
+        processed_status_ids.add(status_id)
+        post_url = f"https://x.com/{record['author']}/status/{status_id}"
+        unique_urls.add(post_url)
+        all_status_urls.append({
+            "url": post_url, "status_id": status_id, "username": record["author"],
+            "original_link": f"https://x.com{record['href']}", "media_type": record["kind"],
+            "tweet_text": record["text"][:200], "found_at": datetime.now().isoformat(),
+            "position": len(all_status_urls) + 1, "image_srcs": record["images"],
+            "carousel_size": record["carousel"], "media_kinds": record["media_kinds"],
+            "media_count": len(record["media_kinds"]), "media_exact": record["media_exact"],
+        })
+    return all_status_urls, processed_status_ids, unique_urls
+
+
+def build_store(count: int, spill_threshold: int):
+    store = StatusStore(spill_threshold=spill_threshold)
+    for record in make_records(count):
+        store.add(record["id"], record["author"], record["kind"], f"https://x.com{record['href']}",
+                  record["text"][:200], image_srcs=record["images"], carousel_size=record["carousel"],
+                  media_kinds=record["media_kinds"], media_exact=record["media_exact"])
+    return store
+
+
+def measure(function, *args) -> tuple:
+    """(resultado, MB retenidos, MB de pico, ms)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function(*args)
+    elapsed = (time.perf_counter() - start) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current / 1e6, peak / 1e6, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de memoria de StatusStore")
+    parser.add_argument("--statuses", type=int, nargs="+", default=[10_000, 50_000])
+    parser.add_argument("--spill-threshold", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'status':>8}{'dicts (MB)':>12}{'store (MB)':>12}{'pico store':>12}{'dicts (ms)':>12}{'store (ms)':>12}{'en disco':>10}")
+    for count in args.statuses:
+        _, dict_mb, _, dict_ms = measure(build_dicts, count)
+        store, store_mb, store_peak, store_ms = measure(build_store, count, args.spill_threshold)
+        assert len(store) == count and sum(1 for _ in store) == count
+        print(f"{count:>8,}{dict_mb:>12.1f}{store_mb:>12.1f}{store_peak:>12.1f}{dict_ms:>12,.0f}{store_ms:>12,.0f}"
+              f"{store.spilled:>10,}")
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
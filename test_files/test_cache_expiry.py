@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests de la caducidad por entrada del cache y del caché negativo con reintentos
+"""
+
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+
+
+def test_entry_ttl_replaces_whole_cache_expiry(tmp_path):
+    """Un cache antiguo no se descarta: solo caducan las entradas con TTL"""
+    image_url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    old = "2020-01-01T00:00:00"
+    data = {
+        "last_updated": old,
+        "processed_posts": {
+            "111": {"processed_at": old, "media_type": "image", "image_url": image_url},
+            "222": {"processed_at": old, "media_type": "video", "image_url": None},
+            "333": {"processed_at": old, "kind": "negative"},
+        },
+        "status_to_image_mapping": {"111": image_url},
+    }
+    with open(tmp_path / "user_processed_posts.json", 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+    manager = CacheManager(cache_dir=tmp_path)
+    assert manager.is_status_cached("user", "111")
+    assert manager.is_status_cached("user", "222")
+    assert not manager.is_status_cached("user", "333")
+
+    # Con TTL para imágenes, la entrada se sirve igualmente y se encola para revalidar
+    manager.entry_ttl_days["image"] = 30
+    status_item = {"url": "https://x.com/user/status/111", "media_type": "image"}
+    cached, uncached = manager.get_cached_image_urls("user", [status_item])
+    assert cached == [image_url] and uncached == []
+    assert manager.pop_revalidation_candidates("user", 5) == [status_item]
+    assert manager.pop_revalidation_candidates("user", 5) == []
+
+    new_url = "https://pbs.twimg.com/media/NEWYcfLXgAAuRsX?format=jpg&name=large"
+    manager.refresh_entries("user", {"111": new_url})
+    assert manager.load_user_cache("user")["status_to_image_mapping"]["111"] == [new_url]
+    assert manager.get_cache_stats("user")["stale_entries"] == 1  # Solo la negativa
+
+
+def test_negative_results_back_off_exponentially(tmp_path):
+    """Los status sin imágenes se posponen con espera exponencial y un mapeo posterior los reemplaza"""
+    from datetime import datetime, timedelta
+    url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    items = [{"url": f"https://x.com/user/status/{sid}", "media_type": "image"} for sid in ("111", "222")]
+    manager = CacheManager(cache_dir=tmp_path)
+
+    manager.record_negative_results("user", {"111": "no_images"})
+    first = manager.load_user_cache("user")["processed_posts"]["111"]
+    assert first["attempts"] == 1 and first["reason"] == "no_images"
+    assert manager.is_status_cached("user", "111")
+    assert manager.get_cached_image_urls("user", items) == ([], [items[1]])
+
+    # Una entrada sin mapeo ni marca negativa (p. ej. de un cache anterior) se vuelve a procesar
+    manager.upsert_posts("user", {"222": {"processed_at": datetime.now().isoformat(), "media_type": "image",
+                                          "image_url": None}})
+    assert manager.get_cached_image_urls("user", items) == ([], [items[1]])
+
+    # Segundo intento fallido: la espera se duplica
+    manager.record_negative_results("user", {"111": "no_images"})
+    second = manager.load_user_cache("user")["processed_posts"]["111"]
+    delay = datetime.fromisoformat(second["next_retry"]) - datetime.fromisoformat(second["processed_at"])
+    assert second["attempts"] == 2 and delay == timedelta(hours=24)
+    assert manager.is_retry_due(second, now=datetime.fromisoformat(second["next_retry"]))
+
+    # Un resultado negativo nunca pisa un mapeo; un mapeo sí pisa un negativo
+    manager.update_cache_with_new_mappings("user", {"222": [url], "111": [url]})
+    manager.record_negative_results("user", {"222": "navigation_error"})
+    posts = manager.load_user_cache("user")["processed_posts"]
+    assert "kind" not in posts["111"] and "kind" not in posts["222"]
+    assert manager.get_cached_image_urls("user", items) == ([url], [])
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_entry_ttl_replaces_whole_cache_expiry(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_negative_results_back_off_exponentially(Path(tmp))
+    print("✅ Tests de caducidad del cache completados")
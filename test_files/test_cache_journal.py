@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Tests de la escritura incremental del cache: journal JSONL con compactación,
+sesión write-behind y snapshot binario
+"""
+
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+from modules.utils.cache_store import JSONCacheStore
+from test_cache_store import _write_json_cache
+
+
+def test_json_store_journal_and_compaction(tmp_path):
+    """Las escrituras van al journal y se compactan en el snapshot al superar el umbral"""
+    store = JSONCacheStore(tmp_path, journal_threshold=10)
+    store.upsert("user", posts={"1": {"media_type": "video"}}, mappings={"2": "url-2"})
+    store.delete("user", ["2"])
+
+    assert not store.get_cache_file_path("user").exists()
+    assert store.get_journal_path("user").exists()
+    data = store.load("user")
+    assert data["processed_posts"] == {"1": {"media_type": "video"}}
+    assert data["status_to_image_mapping"] == {}
+
+    # Una línea incompleta al final (escritura interrumpida) no rompe la lectura
+    with open(store.get_journal_path("user"), 'a', encoding='utf-8') as f:
+        f.write('{"op": "post", "id": "3"')
+    assert "3" not in store.load("user")["processed_posts"]
+
+    store.upsert("user", posts={str(i): {"media_type": "video"} for i in range(10, 20)})
+    assert not store.get_journal_path("user").exists()
+    with open(store.get_cache_file_path("user"), 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    assert len(snapshot["processed_posts"]) == 11
+    assert JSONCacheStore(tmp_path).load("user") == store.load("user")
+
+
+def test_cache_session_write_behind(tmp_path):
+    """La sesión sirve lecturas desde memoria y solo escribe al volcar"""
+    import asyncio
+
+    manager = CacheManager(cache_dir=tmp_path)
+    image_url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+
+    async def run():
+        async with manager.session("user") as session:
+            manager.update_cache_with_new_mappings("user", {"111": image_url})
+            assert manager.is_status_cached("user", "111")
+            assert session.has_pending_changes
+            # Nada se ha escrito todavía en disco
+            assert not manager.store.exists("user")
+            manager.checkpoint("user")
+            await session._flush_task
+            assert manager.store.has_post("user", "111")
+
+            manager.mark_all_status_as_processed(
+                "user", [{"url": "https://x.com/user/status/222", "media_type": "video"}]
+            )
+        # Al cerrar la sesión se vuelca lo pendiente
+        assert manager.store.has_post("user", "222")
+
+    asyncio.run(run())
+    assert "user" not in manager._sessions
+
+
+def test_binary_snapshot_roundtrip(tmp_path):
+    """El snapshot binario conserva posts, mapeos y campos extra"""
+    from modules.utils.cache_snapshot import read_snapshot, write_snapshot
+    url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    data = {
+        "last_updated": "2025-06-13T10:00:00",
+        "processed_posts": {
+            "1933500000000000001": {"processed_at": "2025-06-13T10:00:00", "media_type": "image",
+                                    "image_url": url, "downloaded": True},
+            "1933500000000000002": {"processed_at": "2025-06-13T10:00:00", "media_type": "video",
+                                    "video_processed": True, "video_filename": "a.mp4"},
+            "1933500000000000003": {"processed_at": "2025-06-13T10:00:00", "media_type": None,
+                                    "image_url": None},
+        },
+        "status_to_image_mapping": {
+            "1933500000000000001": [url],
+            "1933500000000000004": [url, "https://video.twimg.com/ext_tw_video/1/pu/vid/a.mp4"],
+        },
+        "meta": {"high_water_mark": "1933500000000000004"}
+    }
+    path = tmp_path / "user_processed_posts.snap"
+    write_snapshot(path, data)
+    snapshot = read_snapshot(path)
+
+    assert snapshot.to_cache_data() == data
+    assert "1933500000000000002" in snapshot
+    assert "1933500000000000005" not in snapshot
+    assert snapshot.get_mapping("1933500000000000001") == [url]
+    assert snapshot.key_count == 2  # La URL repetida se interna una sola vez
+    assert snapshot.key(0) == "GrUYcfLXgAAuRsX"
+
+    # JSONCacheStore en formato binario migra el snapshot JSON existente
+    _write_json_cache(tmp_path, "legacy", data["processed_posts"], data["status_to_image_mapping"])
+    store = JSONCacheStore(tmp_path, snapshot_format="binary")
+    store.upsert("legacy", posts={"1933500000000000009": {"processed_at": "2025-06-14T10:00:00"}})
+    store.compact("legacy")
+    assert (tmp_path / "legacy_processed_posts.snap").exists()
+    assert not (tmp_path / "legacy_processed_posts.json").exists()
+    assert len(store.load("legacy")["processed_posts"]) == 4
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_json_store_journal_and_compaction(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_session_write_behind(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_binary_snapshot_roundtrip(Path(tmp))
+    print("✅ Tests del journal y snapshot del cache completados")
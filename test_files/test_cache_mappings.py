@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Tests de los mapeos status -> imágenes del cache: índice inverso por media key,
+mapeos duplicados, carruseles y marca de agua del modo incremental
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+from modules.utils.cache_store import JSONCacheStore
+from test_cache_store import _write_json_cache
+
+
+def test_reverse_media_key_index(tmp_path):
+    """Búsqueda imagen -> status por media key y migración de la columna en SQLite"""
+    import sqlite3
+    url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    small = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=small"
+
+    # Base de datos creada antes de existir la columna media_key
+    conn = sqlite3.connect(tmp_path / "cache.db")
+    conn.executescript("""
+        CREATE TABLE status_image_mapping (
+            username TEXT NOT NULL, status_id TEXT NOT NULL, image_url TEXT NOT NULL,
+            PRIMARY KEY (username, status_id)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("INSERT INTO status_image_mapping VALUES ('user', '111', ?)", (url,))
+    conn.commit()
+    conn.close()
+
+    for backend in ("sqlite", "json"):
+        manager = CacheManager(cache_dir=tmp_path, backend=backend)
+        if backend == "json":
+            manager.update_cache_with_new_mappings("user", {"111": url})
+        else:
+            manager.store.upsert("user", posts={"111": {"processed_at": "2025-06-13T10:00:00"}})
+        assert manager.get_url_to_status_mapping("user", [small, "otra"]) == {small: "111"}
+
+        manager.update_cache_with_new_mappings("user", {"222": small})
+        assert manager.media_index("user").conflicts() == {"GrUYcfLXgAAuRsX": ["111", "222"]}
+        assert manager.clean_conflicting_mappings("user") == 1
+        assert manager.media_index("user").statuses_for(url) == ["111"]
+
+
+def test_duplicate_mappings_resolve_the_same_in_every_backend(tmp_path):
+    """Con una imagen en dos status gana el de menor ID numérico (18 frente a 19 dígitos), en la descarga y en la limpieza"""
+    url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    newer, older = "1000000000000000001", "999999999999999999"
+
+    for backend in ("json", "sqlite"):
+        cache_dir = tmp_path / backend
+        cache_dir.mkdir()
+        manager = CacheManager(cache_dir=cache_dir, backend=backend)
+        manager.store.upsert("user", mappings={newer: [url]})
+        manager.store.upsert("user", mappings={older: [url]})
+        reopened = CacheManager(cache_dir=cache_dir, backend=backend)
+        assert reopened.get_url_to_status_mapping("user", [url]) == {url: older}
+        assert reopened.media_index("user").statuses_for(url) == [older, newer]
+
+        # La limpieza conserva el mismo status con el que se nombran las descargas
+        assert reopened.clean_conflicting_mappings("user") == 1
+        assert reopened.get_url_to_status_mapping("user", [url]) == {url: older}
+        assert CacheManager(cache_dir=cache_dir, backend=backend).get_url_to_status_mapping("user", [url]) == {url: older}
+
+
+def test_carousel_mappings_are_cached_in_full(tmp_path):
+    """Los carruseles se guardan completos y los mapeos antiguos se migran a lista"""
+    urls = [f"https://pbs.twimg.com/media/CAR{i}YcfLXgAAuRs?format=jpg&name=large" for i in range(3)]
+
+    for backend in ("json", "sqlite"):
+        cache_dir = tmp_path / backend
+        cache_dir.mkdir()
+        _write_json_cache(cache_dir, "user", {}, {"111": urls[0]})  # Formato antiguo: una URL
+        manager = CacheManager(cache_dir=cache_dir, backend=backend)
+        assert manager.load_user_cache("user")["status_to_image_mapping"]["111"] == [urls[0]]
+
+        # El carrusel completo amplía el mapeo migrado sin contar como conflicto
+        manager.update_cache_with_new_mappings("user", {"111": urls})
+        status_item = {"url": "https://x.com/user/status/111", "media_type": "image"}
+        cached, uncached = CacheManager(cache_dir=cache_dir, backend=backend).get_cached_image_urls("user", [status_item])
+        assert cached == urls and uncached == []
+        assert manager.get_url_to_status_mapping("user", urls[1:]) == {urls[1]: "111", urls[2]: "111"}
+
+        # Un carrusel distinto sí es un conflicto y se conserva el existente
+        manager.update_cache_with_new_mappings("user", {"111": urls[1:]})
+        assert manager.load_user_cache("user")["status_to_image_mapping"]["111"] == urls
+
+        # El mismo carrusel, o su comienzo, no se reescribe ni reinicia processed_at
+        processed_at = manager.load_user_cache("user")["processed_posts"]["111"]["processed_at"]
+        journal = cache_dir / "user_processed_posts.journal.jsonl"
+        journal_size = journal.stat().st_size if journal.exists() else None
+        manager.update_cache_with_new_mappings("user", {"111": urls})
+        manager.update_cache_with_new_mappings("user", {"111": urls[:2]})
+        assert manager.load_user_cache("user")["status_to_image_mapping"]["111"] == urls
+        assert manager.load_user_cache("user")["processed_posts"]["111"]["processed_at"] == processed_at
+        assert (journal.stat().st_size if journal.exists() else None) == journal_size
+
+
+def test_high_water_mark_persists_and_stops_at_gaps(tmp_path):
+    """La marca de agua se guarda en todos los backends y no salta status pendientes"""
+    url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    seen = ["105", "104", "103", "102", "101"]
+
+    for backend, snapshot_format in (("json", "json"), ("json", "binary"), ("sqlite", None)):
+        cache_dir = tmp_path / f"{backend}_{snapshot_format}"
+        cache_dir.mkdir()
+        manager = CacheManager(cache_dir=cache_dir, backend=backend)
+        if snapshot_format:
+            manager.store = JSONCacheStore(cache_dir, snapshot_format=snapshot_format)
+        assert manager.get_high_water_mark("user") is None
+
+        # 104 queda pendiente (p. ej. fuera del límite): la marca se detiene en 103
+        manager.update_cache_with_new_mappings("user", {sid: [url] for sid in ("101", "102", "103", "105")})
+        manager.mark_all_status_as_processed("user", [
+            {"url": f"https://x.com/user/status/{sid}", "media_type": "image"} for sid in seen
+        ])
+        assert manager.advance_high_water_mark("user", seen) == 103
+
+        manager.update_cache_with_new_mappings("user", {"104": [url]})
+        manager.mark_all_status_as_processed("user", [{"url": "https://x.com/user/status/104", "media_type": "image"}])
+        assert manager.advance_high_water_mark("user", ["105", "104"]) == 105
+
+        # Sobrevive a la compactación / reescritura completa del cache
+        cache_data = manager.load_user_cache("user")
+        manager.save_user_cache("user", cache_data["processed_posts"], cache_data["status_to_image_mapping"])
+        reopened = CacheManager(cache_dir=cache_dir, backend=backend)
+        if snapshot_format:
+            reopened.store = JSONCacheStore(cache_dir, snapshot_format=snapshot_format)
+        assert reopened.get_high_water_mark("user") == 105
+        assert reopened.get_cache_stats("user")["high_water_mark"] == "105"
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_reverse_media_key_index(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_duplicate_mappings_resolve_the_same_in_every_backend(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_carousel_mappings_are_cached_in_full(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_high_water_mark_persists_and_stops_at_gaps(Path(tmp))
+    print("✅ Tests de mapeos del cache completados")
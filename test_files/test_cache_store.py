@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Tests del backend SQLite del cache y de su importador de caches JSON
+"""
+
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+from modules.utils.cache_store import SQLiteCacheStore
+
+
+def _write_json_cache(cache_dir: Path, username: str, posts: dict, mapping: dict):
+    from datetime import datetime
+    data = {
+        "last_updated": datetime.now().isoformat(),
+        "processed_posts": posts,
+        "status_to_image_mapping": mapping
+    }
+    with open(cache_dir / f"{username}_processed_posts.json", 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+
+
+def test_sqlite_store_bulk_upsert_and_delete(tmp_path):
+    """Upsert en bloque, consulta indexada y borrado en SQLite"""
+    store = SQLiteCacheStore(tmp_path / "cache.db")
+    posts = {str(i): {"processed_at": "2025-06-13T10:00:00", "media_type": "video"} for i in range(1000)}
+    mappings = {"1": "https://pbs.twimg.com/media/AAA?format=jpg&name=large"}
+    store.upsert("user", posts=posts, mappings=mappings)
+
+    assert store.exists("user")
+    assert store.has_post("user", "999")
+    assert not store.has_post("user", "1000")
+    assert not store.has_post("other", "1")
+
+    store.delete("user", ["1", "2"])
+    data = store.load("user")
+    assert len(data["processed_posts"]) == 998
+    assert data["status_to_image_mapping"] == {}
+
+    assert store.clear("user")
+    assert not store.exists("user")
+
+
+def test_cache_manager_imports_json_cache_once(tmp_path):
+    """El cache JSON existente se importa una sola vez y la API pública sigue funcionando"""
+    image_url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    _write_json_cache(
+        tmp_path, "user",
+        {"111": {"processed_at": "2025-06-13T10:00:00", "media_type": "image", "image_url": image_url}},
+        {"111": image_url}
+    )
+
+    manager = CacheManager(cache_dir=tmp_path, backend="sqlite")
+    assert manager.is_status_cached("user", "111")
+    assert not manager.is_status_cached("user", "222")
+
+    status_urls = [
+        {"url": "https://x.com/user/status/111", "media_type": "image"},
+        {"url": "https://x.com/user/status/222", "media_type": "image"},
+        {"url": "https://x.com/user/status/333", "media_type": "video"},
+    ]
+    cached, uncached = manager.get_cached_image_urls("user", status_urls)
+    assert cached == [image_url]
+    assert [item["url"] for item in uncached] == ["https://x.com/user/status/222"]
+
+    new_url = "https://pbs.twimg.com/media/HHHHcfLXgAAuRsX?format=jpg&name=large"
+    manager.update_cache_with_new_mappings("user", {"222": new_url})
+    manager.mark_all_status_as_processed("user", status_urls)
+    assert manager.is_status_cached("user", "333")
+
+    # Un segundo import no debe duplicar ni pisar lo escrito en SQLite
+    manager.clear_user_cache("user")
+    reopened = CacheManager(cache_dir=tmp_path, backend="sqlite")
+    assert not reopened.is_status_cached("user", "111")
+    assert reopened.get_url_to_status_mapping("user", [new_url]) == {}
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_sqlite_store_bulk_upsert_and_delete(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_manager_imports_json_cache_once(Path(tmp))
+    print("✅ Tests de CacheStore completados")
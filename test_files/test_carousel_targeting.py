@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests de la atribución de imágenes a status en el Método 1: recuento de media
+por status (solo los carruseles incompletos pasan al Método 2) y mapeo por el
+enlace o artículo de cada imagen
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.media_index import MediaURLSet
+
+
+def _item(status_id, srcs, kinds, exact=True):
+    return {
+        "url": f"https://x.com/testuser/status/{status_id}",
+        "media_type": "image",
+        "image_srcs": [f"https://pbs.twimg.com/media/{name}?format=jpg&name=small" for name in srcs],
+        "carousel_size": kinds.count("photo"),
+        "media_kinds": kinds,
+        "media_count": len(kinds),
+        "media_exact": exact,
+    }
+
+
+def test_only_incomplete_carousels_need_navigation():
+    """Carruseles completos (también de la cuadrícula) se mapean desde el timeline; incompletos o sin captura no"""
+    try:
+        from modules.extraction.image_processor import ImageProcessor
+    except ImportError:
+        print("⏭️  Playwright no está instalado: se omite el test del procesador de imágenes")
+        return
+
+    processor = ImageProcessor(page=None)
+    items = [
+        _item("1", ["A1", "A2", "A3"], ["photo", "photo", "photo"]),
+        _item("2", ["B1"], ["photo", "photo"]),  # Solo se llegó a cargar una foto
+        _item("3", ["C1"], ["photo"], exact=False),  # Celda de la cuadrícula de Multimedia con una foto
+        _item("4", [], ["photo"]),
+        _item("5", ["E1"], ["photo", "video"]),
+        _item("6", ["F1"], ["photo", "photo"], exact=False),  # Cuadrícula: dos enlaces /photo/N, una imagen
+        _item("7", ["G1", "G2"], ["photo", "photo"], exact=False),
+    ]
+    image_urls = MediaURLSet()
+    converted, mappings = processor._extract_from_timeline_records(items, image_urls)
+
+    assert sorted(mappings) == ["1", "3", "5", "7"]
+    assert [url.split("/media/")[1].split("?")[0] for url in mappings["1"]] == ["A1", "A2", "A3"]
+    assert converted == 7 and len(image_urls) == 7
+    assert not processor._is_media_complete(items[5], items[5]["image_srcs"])
+    assert not processor._is_media_complete(items[1], ["https://pbs.twimg.com/media/B1?format=jpg&name=large"])
+    assert processor._is_media_complete({"url": "https://x.com/testuser/status/9"}, "https://pbs.twimg.com/media/Z")
+
+
+def test_media_url_set_dedupes_by_media_key():
+    """Misma imagen con otro tamaño = misma entrada; se conserva el orden y el status"""
+    large = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    small = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=png&name=small"
+    other = "https://pbs.twimg.com/media/HxQ2abcDEfgHIjk?format=jpg&name=large"
+    urls = MediaURLSet([other])
+    assert urls.add(large, "111") and not urls.add(small, "222")
+    urls.append(other)
+    assert small in urls and "https://pbs.twimg.com/media/Nope?format=jpg" not in urls
+    assert urls.urls() == [other, large] and len(urls) == 2
+    assert urls.canonical(small) == large and urls.status_of(small) == "111"
+    assert urls.status_mapping() == {large: "111"}
+
+
+class _FakeDomPage:
+    def __init__(self, images):
+        self.images = images
+
+    async def evaluate(self, script, arg=None):
+        return self.images
+
+
+def _dom_image(name, status_id, index=0, author=True, size=600):
+    return {"src": f"https://pbs.twimg.com/media/{name}?format=jpg&name=small", "alt": "", "width": size,
+            "height": size, "statusId": status_id, "photoIndex": index, "belongsToTargetUser": author,
+            "hasContainer": True}
+
+
+def test_dom_images_map_to_their_own_status():
+    """Cada imagen se mapea al status de su enlace, en orden de carrusel, sin correlación por índice"""
+    try:
+        from modules.extraction.image_processor import ImageProcessor
+    except ImportError:
+        print("⏭️  Playwright no está instalado: se omite el test del procesador de imágenes")
+        return
+
+    page = _FakeDomPage([
+        _dom_image("B2", "20", index=2),
+        _dom_image("A1", "10", index=1),
+        _dom_image("B1", "20", index=1),
+        _dom_image("Q1", "99", index=1, author=False),  # Tweet citado de otro usuario
+        _dom_image("C1", "30", index=1),  # Status ya cacheado
+        _dom_image("L1", None),  # Imagen sin enlace de status
+    ])
+    processor = ImageProcessor(page)
+    status_urls = [{"url": f"https://x.com/testuser/status/{sid}"} for sid in ("20", "10", "40")]
+    image_urls = MediaURLSet()
+    converted, mappings = asyncio.run(processor._extract_from_dom(image_urls, 3, status_urls, "testuser"))
+
+    names = lambda urls: [url.split("/media/")[1].split("?")[0] for url in ([urls] if isinstance(urls, str) else urls)]
+    assert names(mappings["20"]) == ["B1", "B2"]
+    assert names(mappings["10"]) == ["A1"]
+    assert "40" not in mappings and "30" not in mappings
+    assert names(image_urls) == ["B1", "B2", "A1", "L1"] and converted == 4
+
+
+
+def test_fallback_only_adds_images_of_pending_statuses():
+    """El Método 3 no añade imágenes sin status ni de status fuera del límite"""
+    try:
+        from modules.extraction.image_processor import ImageProcessor
+    except ImportError:
+        print("⏭️  Playwright no está instalado: se omite el test del procesador de imágenes")
+        return
+
+    page = _FakeDomPage([
+        _dom_image("P1", "50", index=1),
+        _dom_image("X1", "60", index=1),  # Status fuera del límite
+        _dom_image("L1", None),  # Imagen del perfil sin enlace de status
+    ])
+    processor = ImageProcessor(page)
+    image_urls = MediaURLSet()
+    pending = [{"url": "https://x.com/testuser/status/50"}]
+    added, mappings = asyncio.run(processor._fallback_image_extraction(pending, image_urls, "testuser"))
+
+    assert added == 1 and list(mappings) == ["50"]
+    assert [url.split("/media/")[1].split("?")[0] for url in image_urls] == ["P1"]
+    assert image_urls.status_of(mappings["50"]) == "50"
+
+
+if __name__ == "__main__":
+    test_only_incomplete_carousels_need_navigation()
+    test_media_url_set_dedupes_by_media_key()
+    test_dom_images_map_to_their_own_status()
+    test_fallback_only_adds_images_of_pending_statuses()
+    print("✅ Tests de la atribución de imágenes a status completados")
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests del manifiesto de archivos descargados
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.download.download_manifest import DownloadManifest
+from modules.utils.cache_manager import CacheManager
+
+URL_A = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+URL_B = "https://pbs.twimg.com/media/GpEIoIaXoAAj_ZE?format=jpg&name=large"
+
+
+def test_manifest_finds_files_by_media_key(tmp_path):
+    """Una pasada de scandir indexa los nombres {status_id}-{media_key}.jpg"""
+    (tmp_path / "111-GrUYcfLXgAAuRsX.jpg").write_bytes(b"jpg")
+    (tmp_path / "GpEIoIaXoAAj_ZE.jpg").write_bytes(b"jpg")
+    (tmp_path / "222-Vacia.jpg").write_bytes(b"")  # Descarga interrumpida
+    (tmp_path / "notas.txt").write_text("no es imagen")
+
+    manifest = DownloadManifest(tmp_path)
+    assert len(manifest) == 3
+    assert manifest.has_file("111-GrUYcfLXgAAuRsX.jpg")
+    assert not manifest.has_file("222-Vacia.jpg")
+    assert manifest.find("GrUYcfLXgAAuRsX", "111").filename == "111-GrUYcfLXgAAuRsX.jpg"
+    assert manifest.find("GpEIoIaXoAAj_ZE", "333").filename == "GpEIoIaXoAAj_ZE.jpg"
+    assert manifest.find("Vacia") is None
+
+    # Actualización incremental sin volver a recorrer el directorio
+    (tmp_path / "333-Nueva.jpg").write_bytes(b"jpg")
+    assert manifest.find("Nueva") is None
+    manifest.add("333-Nueva.jpg")
+    assert manifest.find("Nueva", "333").size == 3
+    manifest.remove("333-Nueva.jpg")
+    assert manifest.find("Nueva") is None
+
+
+def test_mark_downloaded_images_uses_real_filenames(tmp_path):
+    """Los carruseles se marcan con los nombres reales que genera la descarga"""
+    download_dir = tmp_path / "downloads"
+    download_dir.mkdir()
+    (download_dir / "111-GrUYcfLXgAAuRsX.jpg").write_bytes(b"jpg")
+    (download_dir / "111-GpEIoIaXoAAj_ZE.jpg").write_bytes(b"jpg")
+
+    manager = CacheManager(cache_dir=tmp_path / "cache")
+    manager.update_cache_with_new_mappings("user", {"111": [URL_A, URL_B], "222": [URL_A.replace("GrUY", "XXXX")]})
+    manager.mark_downloaded_images("user", {}, str(download_dir))
+
+    posts = manager.load_user_cache("user")["processed_posts"]
+    assert posts["111"]["downloaded"] is True
+    assert posts["111"]["filenames"] == ["111-GrUYcfLXgAAuRsX.jpg", "111-GpEIoIaXoAAj_ZE.jpg"]
+    assert not posts["222"].get("downloaded")
+
+
+if __name__ == "__main__":
+    for test in (test_manifest_finds_files_by_media_key, test_mark_downloaded_images_uses_real_filenames):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+            print(f"✅ {test.__name__}")
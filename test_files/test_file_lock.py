@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests de acceso concurrente al caché desde varios procesos
+"""
+
+import multiprocessing
+import sys
+import tempfile
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_store import JSONCacheStore
+from modules.utils.file_lock import RunLease
+
+WORKERS = 4
+POSTS_PER_WORKER = 150
+
+
+def _write_posts(cache_dir: str, worker: int):
+    store = JSONCacheStore(Path(cache_dir), journal_threshold=40)
+    for i in range(POSTS_PER_WORKER):
+        status_id = str(1_900_000_000_000_000_000 + worker * 10_000 + i)
+        store.upsert("user", posts={status_id: {"processed_date": "2025-01-01T00:00:00"}})
+
+
+def _try_lease(cache_dir: str, result):
+    result.value = RunLease(Path(cache_dir), "user").acquire()
+
+
+def test_concurrent_writers_keep_every_entry(tmp_path):
+    """Varios procesos escribiendo a la vez (con compactaciones) no pierden entradas"""
+    workers = [multiprocessing.Process(target=_write_posts, args=(str(tmp_path), w))
+               for w in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=60)
+        assert worker.exitcode == 0
+
+    posts = JSONCacheStore(tmp_path).load("user")["processed_posts"]
+    assert len(posts) == WORKERS * POSTS_PER_WORKER
+
+
+def test_run_lease_is_exclusive_across_processes(tmp_path):
+    """Una segunda ejecución no obtiene el lease mientras la primera lo tenga"""
+    lease = RunLease(tmp_path, "user", owner="test")
+    assert lease.acquire()
+    assert lease.holder()["owner"] == "test"
+
+    result = multiprocessing.Value("b", 1)
+    other = multiprocessing.Process(target=_try_lease, args=(str(tmp_path), result))
+    other.start()
+    other.join(timeout=10)
+    assert result.value == 0
+
+    lease.release()
+    other = multiprocessing.Process(target=_try_lease, args=(str(tmp_path), result))
+    other.start()
+    other.join(timeout=10)
+    assert result.value == 1
+
+
+if __name__ == "__main__":
+    for test in (test_concurrent_writers_keep_every_entry, test_run_lease_is_exclusive_across_processes):
+        with tempfile.TemporaryDirectory() as tmp:
+            test(Path(tmp))
+            print(f"✅ {test.__name__}")
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests de la revalidación de entradas caducadas del cache (stale-while-revalidate):
+se sirven desde cache y se revalidan en una tarea aparte, fuera del límite de URLs nuevas
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+
+OLD_URL = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+NEW_URL = "https://pbs.twimg.com/media/NEWYcfLXgAAuRsX?format=jpg&name=large"
+
+
+class _FakeCollector:
+    video_variants = {}
+
+    async def wait_idle(self):
+        await asyncio.sleep(0)
+
+    def images_for(self, status_id, author=None):
+        return [NEW_URL] if status_id == "111" else []
+
+
+def test_stale_entries_revalidate_in_a_separate_task(tmp_path):
+    """La conversión devuelve lo cacheado sin esperar y la tarea aparte renueva la entrada"""
+    try:
+        from modules.extraction.image_processor import ImageProcessor
+    except ImportError:
+        print("⏭️  Playwright no está instalado: se omite el test de revalidación")
+        return
+
+    old = "2020-01-01T00:00:00"
+    with open(tmp_path / "user_processed_posts.json", 'w', encoding='utf-8') as f:
+        json.dump({"processed_posts": {"111": {"processed_at": old, "media_type": "image", "image_url": OLD_URL}},
+                   "status_to_image_mapping": {"111": OLD_URL}}, f)
+    manager = CacheManager(cache_dir=tmp_path)
+    manager.entry_ttl_days["image"] = 30
+
+    processor = ImageProcessor(page=None)
+    processor.set_cache_info(manager, "user")
+    processor.set_response_collector(_FakeCollector())
+    navigated = []
+
+    async def no_navigation(status_urls, *args, **kwargs):
+        navigated.extend(status_urls)
+        return 0, {}
+    processor._construct_direct_urls_improved = no_navigation
+
+    async def run():
+        items = [{"url": "https://x.com/user/status/111", "media_type": "image"}]
+        image_urls, mapping = await processor.convert_status_to_image_urls(items, "user", url_limit=0)
+        assert image_urls == [OLD_URL] and mapping == {OLD_URL: "111"}
+        assert processor._revalidation_task is not None
+        await processor.wait_revalidation()
+
+    asyncio.run(run())
+    assert navigated == []  # Resuelta por el Método 0
+    assert manager.load_user_cache("user")["status_to_image_mapping"]["111"] == [NEW_URL]
+    assert manager.pop_revalidation_candidates("user", 5) == []
+
+
+if __name__ == "__main__":
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        test_stale_entries_revalidate_in_a_separate_task(Path(tmp))
+    print("✅ Tests de revalidación completados")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests del pool de páginas para resolver status en paralelo
+"""
+
+import asyncio
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.browser.page_pool import HostBudget, PagePool
+
+STATUS_SITE = Path(__file__).parent / "fixtures" / "status_site"
+
+
+class _FakePage:
+    def __init__(self):
+        self.closed = False
+        self.visits = []
+
+    def is_closed(self):
+        return self.closed
+
+    async def goto(self, url, **kwargs):
+        self.visits.append(url)
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeContext:
+    def __init__(self):
+        self.pages = []
+
+    async def new_page(self):
+        page = _FakePage()
+        self.pages.append(page)
+        return page
+
+
+def test_pool_caps_concurrency_and_keeps_order():
+    """Nunca hay más workers activos que el tope y los resultados salen en orden"""
+    async def scenario():
+        context = _FakeContext()
+        active = peak = 0
+
+        async def worker(page, item):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01 * (5 - item % 5))  # Terminan desordenados
+            active -= 1
+            if item == 3:
+                raise ValueError("status roto")
+            return item * 10
+
+        async with PagePool(context, size=4, max_concurrency=2, requests_per_minute=None) as pool:
+            results = [(item, result) async for item, result in pool.imap(list(range(8)), worker)]
+        return context, peak, results
+
+    context, peak, results = asyncio.run(scenario())
+    assert peak == 2
+    assert len(context.pages) == 2  # Solo se crean las páginas que se usan a la vez
+    assert all(page.closed for page in context.pages)
+    assert [item for item, _ in results] == list(range(8))
+    assert isinstance(results[3][1], ValueError)
+    assert [result for item, result in results if item != 3] == [0, 10, 20, 40, 50, 60, 70]
+
+
+def test_pool_replaces_closed_pages_and_spaces_requests():
+    """Una página cerrada se sustituye y el presupuesto espacia las peticiones por host"""
+    async def scenario():
+        context = _FakeContext()
+
+        async def worker(page, item):
+            await pool.goto(page, f"https://x.com/user/status/{item}")
+            if item == 0:
+                page.closed = True  # Crash de la pestaña
+            return page
+
+        pool = PagePool(context, size=1, requests_per_minute=600, jitter=0)  # 0.1 s entre peticiones
+        started = time.monotonic()
+        async with pool:
+            pages = [result async for _, result in pool.imap([0, 1, 2], worker)]
+        return context, pages, time.monotonic() - started, pool.budget
+
+    context, pages, elapsed, budget = asyncio.run(scenario())
+    assert len(context.pages) == 2 and pages[0] is not pages[1] and pages[1] is pages[2]
+    assert budget.requests == {"x.com": 3}
+    assert elapsed >= 0.2
+
+
+def test_host_budget_is_per_host():
+    """Hosts distintos no se esperan entre sí"""
+    async def scenario():
+        budget = HostBudget(requests_per_minute=60)  # 1 s entre peticiones del mismo host
+        started = time.monotonic()
+        await asyncio.gather(budget.acquire("https://x.com/a"), budget.acquire("https://pbs.twimg.com/b"))
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 0.5
+
+
+class _StatusSiteHandler(SimpleHTTPRequestHandler):
+    """Sirve /<usuario>/status/<id> desde fixtures/status_site/<id>.html"""
+
+    def translate_path(self, path):
+        parts = path.split("?")[0].strip("/").split("/")
+        if len(parts) >= 3 and parts[1] == "status":
+            return str(STATUS_SITE / f"{parts[2]}.html")
+        return str(STATUS_SITE / "missing")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_image_processor_resolves_statuses_against_fixture_site(tmp_path):
+    """Método 2 con varias páginas: mismo filtrado por usuario, orden de carrusel y motivos de fallo"""
+    try:
+        from playwright.async_api import async_playwright
+    except ImportError:
+        print("⏭️  Playwright no está instalado: se omite el test con el sitio local")
+        return
+    from modules.extraction.image_processor import ImageProcessor
+    from modules.utils.cache_manager import CacheManager
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StatusSiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    async def scenario():
+        async with async_playwright() as playwright:
+            browser = await playwright.chromium.launch()
+            context = await browser.new_context()
+            processor = ImageProcessor(await context.new_page())
+            processor.requests_per_minute = None
+            cache_manager = CacheManager(cache_dir=tmp_path)
+            processor.set_cache_info(cache_manager, "testuser")
+            items = [{"url": f"{base}/testuser/status/{sid}", "media_type": "image"} for sid in ("111", "222", "333")]
+            image_urls = []
+            _, mappings = await processor._construct_direct_urls_improved(items, image_urls, 3, "testuser")
+            await browser.close()
+            return image_urls, mappings, cache_manager.load_user_cache("testuser")["processed_posts"]
+
+    try:
+        image_urls, mappings, posts = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+
+    assert [url.split("/media/")[1].split("?")[0] for url in mappings["111"]] == ["FirstImgAAA", "SecondImgBBB"]
+    assert image_urls == mappings["111"]  # La respuesta de otro usuario no se incluye
+    assert posts["222"]["reason"] == "no_images"
+    assert posts["333"]["reason"] == "unavailable"
+
+
+if __name__ == "__main__":
+    test_pool_caps_concurrency_and_keeps_order()
+    test_pool_replaces_closed_pages_and_spaces_requests()
+    test_host_budget_is_per_host()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_image_processor_resolves_statuses_against_fixture_site(Path(tmp))
+    print("✅ Tests del pool de páginas completados")
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests del pipeline scroll -> resolución -> descarga
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.core.pipeline import MediaPipeline
+
+
+def _status(status_id, media_type="image"):
+    return {"url": f"https://x.com/testuser/status/{status_id}", "status_id": str(status_id), "media_type": media_type}
+
+
+def _image(status_id, n=1):
+    return f"https://pbs.twimg.com/media/IMG{status_id}N{n}?format=jpg&name=large"
+
+
+class _FakeScrollManager:
+    """Entrega lotes de status como el ScrollManager, uno por scroll."""
+
+    def __init__(self, batches):
+        self.batches = batches
+
+    async def scroll_and_extract(self, max_scrolls, target_new_urls=None, incremental=False, on_new_statuses=None):
+        for batch in self.batches:
+            await on_new_statuses(batch)
+
+
+class _FakeImageProcessor:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+        self.calls = []
+
+    async def convert_status_to_image_urls(self, status_urls, username=None, url_limit=None):
+        self.calls.append(([item["status_id"] for item in status_urls], url_limit))
+        image_urls, mapping = [], {}
+        uncached = [item for item in status_urls if item["status_id"] not in self.cached]
+        allowed = {item["status_id"] for item in uncached[:url_limit]} if url_limit is not None else None
+        for item in status_urls:
+            status_id = item["status_id"]
+            if status_id in self.cached or allowed is None or status_id in allowed:
+                for n in (1, 2) if status_id.endswith("0") else (1,):
+                    image_urls.append(_image(status_id, n))
+                    mapping[_image(status_id, n)] = status_id
+        if any(item["status_id"] == "3" for item in status_urls):
+            image_urls.append("https://pbs.twimg.com/media/SUELTA?format=jpg&name=large")  # Fallback sin status
+        await asyncio.sleep(0.01)
+        return image_urls, mapping
+
+
+class _FakeCacheManager:
+    def __init__(self, cached=()):
+        self.cached = set(cached)
+
+    def is_status_cached(self, username, status_id):
+        return status_id in self.cached
+
+    def _extract_status_id(self, url):
+        return url.split("/status/")[-1]
+
+
+class _FakeDownloadManager:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.downloaded = []
+        self.stats = {'downloaded': 0, 'skipped': 0, 'errors': 0}
+
+    async def download_image(self, url, status_id=None, index=None, total=None):
+        await asyncio.sleep(self.delay)
+        self.downloaded.append((url, status_id))
+        self.stats['downloaded'] += 1
+        return 'downloaded'
+
+    async def organic_delay(self):
+        pass
+
+    def report(self, total_found):
+        pass
+
+
+def test_pipeline_resolves_and_downloads_every_batch():
+    """Cada imagen se descarga una vez con su status; las imágenes sin status, al final"""
+    batches = [[_status(1), _status(2, "video"), _status(3)], [_status(10), _status(1)], [_status(4)]]
+    processor = _FakeImageProcessor()
+    downloads = _FakeDownloadManager()
+    pipeline = MediaPipeline(_FakeCacheManager(), "testuser", _FakeScrollManager(batches), processor, downloads,
+                             resolve_batch=1, download_workers=2)
+    image_urls, status_mapping, stats = asyncio.run(pipeline.run(max_scrolls=10))
+
+    assert stats['downloaded'] == len(image_urls) == 6
+    assert image_urls[-1].split("/media/")[1].startswith("SUELTA")
+    assert sorted(downloads.downloaded) == sorted((url, status_mapping.get(url)) for url in image_urls)
+    assert status_mapping[_image(10, 2)] == "10"
+    assert all(status_ids != ["2"] for status_ids, _ in processor.calls)  # Los videos no se resuelven
+    assert pipeline.counters["scroll"].items == 6 and pipeline.counters["download"].items == 6
+
+
+def test_pipeline_applies_back_pressure_and_shares_the_limit():
+    """Con la descarga lenta el scroll espera a la cola; el límite se reparte entre lotes"""
+    batches = [[_status(i)] for i in range(1, 9)]
+    scroll = _FakeScrollManager(batches)
+    processor = _FakeImageProcessor(cached={"2"})
+    downloads = _FakeDownloadManager(delay=0.05)
+    pipeline = MediaPipeline(_FakeCacheManager(cached={"2"}), "testuser", scroll, processor, downloads,
+                             status_queue_size=1, download_queue_size=1, resolve_batch=1, download_workers=1)
+    image_urls, _, _ = asyncio.run(pipeline.run(max_scrolls=10, url_limit=3))
+
+    assert pipeline.counters["scroll"].blocked > 0.05  # El scroll esperó a que hubiera hueco
+    assert [limit for _, limit in processor.calls] == [3, 2, 2, 1, 0, 0, 0, 0]
+    assert len(image_urls) == 5  # 3 nuevas, 1 cacheada y la imagen sin status del status 3
+
+
+if __name__ == "__main__":
+    test_pipeline_resolves_and_downloads_every_batch()
+    test_pipeline_applies_back_pressure_and_shares_the_limit()
+    print("✅ Tests del pipeline completados")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests de la política de peticiones del navegador
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.browser.request_policy import RequestPolicy
+
+
+class _FakeRequest:
+    def __init__(self, url, resource_type):
+        self.url = url
+        self.resource_type = resource_type
+
+
+class _FakeRoute:
+    def __init__(self, url, resource_type):
+        self.request = _FakeRequest(url, resource_type)
+        self.outcome = None
+
+    async def abort(self, error_code=None):
+        self.outcome = "abort"
+
+    async def continue_(self):
+        self.outcome = "continue"
+
+
+def test_policy_blocks_only_unused_resources():
+    """Video, fuentes y telemetría se abortan; el HTML, la GraphQL y las imágenes continúan"""
+    policy = RequestPolicy.from_config()
+    requests = {
+        ("https://video.twimg.com/amplify_video/1/vid/avc1/0/3000/720x1280/seg.m4s", "fetch"): "abort",
+        ("https://video.twimg.com/ext_tw_video/1/pu/vid/720x1280/a.mp4?tag=12", "media"): "abort",
+        ("https://abs.twimg.com/responsive-web/client-web/chirp.woff2", "font"): "abort",
+        ("https://x.com/i/api/1.1/jot/client_event.json", "xhr"): "abort",
+        ("https://x.com/i/api/graphql/abc/UserMedia?variables=%7B%7D", "xhr"): "continue",
+        ("https://x.com/testuser/status/1", "document"): "continue",
+        ("https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large", "image"): "continue",
+    }
+
+    async def scenario():
+        routes = [_FakeRoute(url, resource_type) for url, resource_type in requests]
+        for route in routes:
+            await policy._handle_route(route)
+        return [route.outcome for route in routes]
+
+    assert asyncio.run(scenario()) == list(requests.values())
+    assert policy.blocked == {"video": 2, "font": 1, "tracking": 1, "image": 0}
+
+    with_images = RequestPolicy.from_config({"image": True})
+    assert with_images.should_block("https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg", "image")
+    assert not RequestPolicy(False, False, False, False).active
+
+
+if __name__ == "__main__":
+    test_policy_blocks_only_unused_resources()
+    print("✅ Tests de la política de peticiones completados")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests del índice de pertenencia de status procesados (Bloom + array ordenado)
+"""
+
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+from modules.utils.cache_store import JSONCacheStore, SQLiteCacheStore
+from modules.utils.status_index import StatusIndex
+
+
+def test_status_index_membership_and_merge():
+    """Altas, bajas y fusión del conjunto pendiente sin perder miembros"""
+    base = 1_933_500_000_000_000_000
+    index = StatusIndex((str(base + i) for i in range(0, 2000, 2)), merge_threshold=100)
+
+    assert str(base) in index
+    assert str(base + 1) not in index
+    assert "no-numerico" not in index
+
+    index.update(str(base + i) for i in range(1, 400, 2))  # Provoca varias fusiones
+    index.discard(str(base))
+    index.add("no-numerico")
+
+    assert str(base + 1) in index
+    assert str(base + 399) in index
+    assert str(base) not in index
+    assert "no-numerico" in index
+    assert len(index) == 1000 + 200 - 1 + 1
+    false_positives = sum(1 for i in range(10_000) if str(base + 10_000 + i) in index)
+    assert false_positives == 0  # El array confirma los positivos del filtro
+
+
+def test_cache_manager_keeps_index_in_sync(tmp_path):
+    """El índice compartido refleja las escrituras y borrados del CacheManager"""
+    manager = CacheManager(cache_dir=tmp_path)
+    url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    assert not manager.is_status_cached("user", "111")
+
+    manager.update_cache_with_new_mappings("user", {"111": url})
+    assert "111" in manager.status_index("user")
+    assert manager.is_status_cached("user", "111")
+
+    # Otro CacheManager sobre el mismo directorio comparte el índice
+    other = CacheManager(cache_dir=tmp_path)
+    assert other.status_index("user") is manager.status_index("user")
+
+    # Mapeo duplicado: clean_conflicting_mappings borra el segundo status
+    manager.update_cache_with_new_mappings("user", {"222": url})
+    assert manager.is_status_cached("user", "222")
+    assert manager.clean_conflicting_mappings("user") == 1
+    assert not manager.is_status_cached("user", "222")
+    assert manager.is_status_cached("user", "111")
+
+
+def test_status_index_sees_writes_from_other_processes(tmp_path):
+    """El índice del proceso se reconstruye si otro proceso escribe el cache (servidor MCP + CLI)"""
+    url = "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large"
+    post = {"processed_at": "2026-01-01T00:00:00", "media_type": "image", "image_url": url}
+
+    for backend in ("json", "sqlite"):
+        cache_dir = tmp_path / backend
+        cache_dir.mkdir()
+        server = CacheManager(cache_dir=cache_dir, backend=backend)
+        server.update_cache_with_new_mappings("user", {"101": [url]})
+        server.mark_all_status_as_processed("user", [{"url": "https://x.com/user/status/101", "media_type": "image"}])
+        assert server.is_status_cached("user", "101") and not server.is_status_cached("user", "202")
+
+        # Escritura directa de otro proceso: no pasa por el índice compartido de este
+        other = SQLiteCacheStore(cache_dir / "cache.db") if backend == "sqlite" else JSONCacheStore(cache_dir)
+        other.upsert("user", posts={"202": post}, mappings={"202": [url]})
+        assert server.is_status_cached("user", "202")
+        assert server.is_status_cached("user", "101")
+
+
+def test_video_index_follows_own_and_foreign_writes(tmp_path):
+    """El índice de videos procesados (video_selector) se actualiza al escribir y se reconstruye si escribe otro proceso"""
+    post = {"processed_at": "2026-01-01T00:00:00", "media_type": "video"}
+
+    for backend in ("json", "sqlite"):
+        cache_dir = tmp_path / backend
+        cache_dir.mkdir()
+        manager = CacheManager(cache_dir=cache_dir, backend=backend)
+        manager.upsert_posts("user", {"101": dict(post), "202": dict(post)})
+        assert "101" not in manager.video_index("user")
+
+        manager.upsert_posts("user", {"101": {**post, "video_processed": True}})
+        assert "101" in manager.video_index("user") and "202" not in manager.video_index("user")
+
+        other = SQLiteCacheStore(cache_dir / "cache.db") if backend == "sqlite" else JSONCacheStore(cache_dir)
+        other.upsert("user", posts={"202": {**post, "video_processed": True}})
+        assert "202" in manager.video_index("user") and "101" in manager.video_index("user")
+
+
+if __name__ == "__main__":
+    import tempfile
+    test_status_index_membership_and_merge()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_manager_keeps_index_in_sync(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_status_index_sees_writes_from_other_processes(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_video_index_follows_own_and_foreign_writes(Path(tmp))
+    print("✅ Tests de StatusIndex completados")
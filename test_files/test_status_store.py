@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Tests del almacén compacto de status del timeline (StatusStore)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.extraction.status_store import StatusStore
+
+
+def _fill(store, count, base=1790000000000000000):
+    for i in range(count):
+        status_id = str(base + i)
+        kind = "video" if i % 5 == 0 else "image"
+        link = f"https://x.com/testuser/status/{status_id}/{'video' if kind == 'video' else 'photo'}/1"
+        store.add(status_id, "testuser", kind, link, f"Texto {i} ñ" if i % 3 else "Sin texto",
+                  image_srcs=[f"https://pbs.twimg.com/media/M{i}?format=jpg&name=small"],
+                  carousel_size=1, media_kinds=["video" if kind == "video" else "photo"], media_exact=True)
+
+
+def test_store_spills_and_keeps_page_order():
+    """Por encima del umbral se vuelcan bloques a disco sin cambiar orden, slices ni pertenencia"""
+    store = StatusStore(spill_threshold=50, chunk_size=20)
+    _fill(store, 130)
+    base = 1790000000000000000
+
+    assert len(store) == 130 and store.spilled == 80 and len(store[80:]) == 50
+    assert [int(item["status_id"]) - base for item in store] == list(range(130))
+    assert [item["position"] for item in store[18:23]] == [19, 20, 21, 22, 23]
+    assert store[-1]["status_id"] == str(base + 129) and store[3]["tweet_text"] == "Sin texto"
+    assert store[7]["tweet_text"] == "Texto 7 ñ"
+    assert str(base + 5) in store and base + 5 in store and str(base + 500) not in store
+    assert store.add(str(base + 5), "testuser", "image", "https://x.com/testuser/status/x") is None
+    assert store.count("video") == 26 and len(list(store.of_type("video"))) == 26
+    assert list(store.status_ids())[:2] == [str(base), str(base + 1)]
+    store.close()
+
+
+def test_records_read_like_the_previous_dicts():
+    """Los registros responden como el diccionario de URLExtractor y conservan las claves añadidas"""
+    store = StatusStore(spill_threshold=2, chunk_size=1)
+    record = store.add("111", "testuser", "video", "https://x.com/testuser/status/111/video/1", "Hola",
+                       media_kinds=["gif"], media_exact=True)
+    store.add("222", "otro", "image", "https://x.com/i/web/status/222")
+    record["video_variants"] = [{"url": "https://video.twimg.com/v.mp4"}]
+    store.add("333", "testuser", "image", "https://x.com/testuser/status/333")  # Vuelca el 111 a disco
+
+    spilled = store[0]
+    assert spilled is not record and store.spilled == 1
+    assert spilled["url"] == "https://x.com/testuser/status/111"
+    assert spilled["original_link"] == "https://x.com/testuser/status/111/video/1"
+    assert store[1]["original_link"] == "https://x.com/i/web/status/222"
+    assert spilled.get("media_kinds") == ["gif"] and spilled["media_count"] == 1
+    assert "video_variants" in spilled and "media_kinds" in spilled and "otra" not in spilled
+    assert spilled.to_dict()["video_variants"][0]["url"].endswith("v.mp4")
+    assert set(spilled.to_dict()) >= {"status_id", "username", "tweet_text", "found_at", "image_srcs"}
+    try:
+        spilled["media_type"] = "image"
+        assert False, "Los campos fijos no se sobrescriben"
+    except KeyError:
+        pass
+    store.close()
+    assert record["tweet_text"] == "Sin texto" and record["status_id"] == "111"  # Cerrado: sin archivo de texto
+
+
+def test_image_conversion_streams_the_store_in_batches():
+    """La conversión lee el almacén por lotes, reparte el límite y no repite imágenes de otro lote"""
+    try:
+        from modules.extraction.image_processor import ImageProcessor
+    except ImportError:
+        print("⏭️  Playwright no está instalado: se omite el test de conversión por lotes")
+        return
+
+    store = StatusStore(spill_threshold=50, chunk_size=20)
+    _fill(store, 130)  # 104 status de imagen, 80 de ellos volcados a disco
+    processor = ImageProcessor(page=None)
+    calls = []
+
+    async def convert(batch, username=None, url_limit=None):
+        calls.append((len(batch), url_limit))
+        urls = ["https://pbs.twimg.com/media/SHARED?format=jpg&name=large"] + [item["image_srcs"][0] for item in batch]
+        return urls, {url: batch[-1]["status_id"] for url in urls}
+    processor.convert_status_to_image_urls = convert
+
+    async def run():
+        return [batch async for batch in processor.iter_image_batches(store, "testuser", url_limit=70, batch_size=40)]
+
+    batches = asyncio.run(run())
+    assert calls == [(40, 70), (40, 30), (24, 0)]
+    assert [len(urls) for urls, _ in batches] == [41, 40, 24]  # La imagen compartida solo en el primer lote
+    assert all(set(mapping) == set(urls) for urls, mapping in batches)
+    store.close()
+
+
+if __name__ == "__main__":
+    test_store_spills_and_keeps_page_order()
+    test_records_read_like_the_previous_dicts()
+    test_image_conversion_streams_the_store_in_batches()
+    print("✅ Tests del almacén de status completados")
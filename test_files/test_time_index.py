@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests de la decodificación Snowflake y del índice por fechas del cache
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.utils.cache_manager import CacheManager
+from modules.utils.snowflake import (datetime_to_snowflake, decode_timestamps_ms, snowflake_to_datetime,
+                                     snowflake_to_ms)
+from modules.utils.time_index import TimeBucketIndex, parse_date_bound
+
+
+def _status_at(year: int, month: int, day: int, offset: int = 0) -> str:
+    return str(datetime_to_snowflake(datetime(year, month, day, 12, tzinfo=timezone.utc)) + offset)
+
+
+def test_snowflake_decoding():
+    """La fecha del status sale del ID; la versión en bloque coincide con la escalar"""
+    assert snowflake_to_datetime(_status_at(2025, 6, 13)) == datetime(2025, 6, 13, 12, tzinfo=timezone.utc)
+    # Los bits bajos (worker + secuencia) no afectan a la fecha
+    assert snowflake_to_ms(_status_at(2025, 6, 13, 4_000_000)) == snowflake_to_ms(_status_at(2025, 6, 13))
+
+    ids = ["1933500000000000001", "1800000000000000000", _status_at(2020, 1, 1)]
+    assert list(decode_timestamps_ms(ids)) == [snowflake_to_ms(status_id) for status_id in ids]
+
+
+def test_time_bucket_index_ranges_and_months():
+    """Rangos con --until inclusivo y conteos mensuales por tipo"""
+    posts = {
+        _status_at(2025, 5, 31): {"media_type": "image"},
+        _status_at(2025, 6, 1): {"media_type": "image"},
+        _status_at(2025, 6, 30): {"media_type": "video"},
+        _status_at(2025, 7, 1): {"media_type": None},
+        "no-numerico": {"media_type": "image"},
+    }
+    index = TimeBucketIndex(posts)
+    june = (parse_date_bound("2025-06"), parse_date_bound("2025-06", end=True))
+
+    assert len(index) == 4
+    assert index.count(*june) == 2
+    assert index.count(*june, media_type="video") == 1
+    assert index.status_ids(*june) == [_status_at(2025, 6, 30), _status_at(2025, 6, 1)]
+    assert index.count(parse_date_bound("2025-06-30"), parse_date_bound("2025-06-30", end=True)) == 1
+    assert index.monthly_counts() == {
+        "2025-05": {"image": 1, "total": 1},
+        "2025-06": {"image": 1, "video": 1, "total": 2},
+        "2025-07": {"other": 1, "total": 1},
+    }
+    assert list(index.monthly_counts(*june)) == ["2025-06"]
+
+
+def test_cache_manager_time_index_follows_writes(tmp_path):
+    """El índice por fechas se reconstruye tras escribir en el cache"""
+    manager = CacheManager(cache_dir=tmp_path)
+    assert manager.time_index("user").count() == 0
+
+    manager.mark_all_status_as_processed("user", [
+        {"url": f"https://x.com/user/status/{_status_at(2025, 6, 1)}", "media_type": "video"}
+    ])
+    assert manager.time_index("user").monthly_counts() == {"2025-06": {"video": 1, "total": 1}}
+
+
+if __name__ == "__main__":
+    test_snowflake_decoding()
+    test_time_bucket_index_ranges_and_months()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_cache_manager_time_index_follows_writes(Path(tmp))
+    print("✅ Tests del índice por fechas completados")
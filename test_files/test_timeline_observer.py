@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Tests del observer del timeline: fotos cuyo src llega después de que se
+capturó su status (X inserta el enlace /photo/N antes que la imagen)
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.extraction.status_store import StatusStore
+from modules.extraction.timeline_scripts import DRAIN_SCRIPT, OBSERVER_SCRIPT
+
+ARTICLE = """
+<article>
+  <a href="/testuser/status/10/photo/1"></a>
+  <a href="/testuser/status/10/photo/2"><img id="second"></a>
+</article>
+"""
+SRC = "https://pbs.twimg.com/media/{}?format=jpg&name=small"
+
+
+async def _observe_late_images():
+    from playwright.async_api import async_playwright
+    async with async_playwright() as playwright:
+        browser = await playwright.chromium.launch()
+        page = await browser.new_page()
+        await page.set_content("<main></main>")
+        await page.evaluate(OBSERVER_SCRIPT)
+        await page.evaluate(DRAIN_SCRIPT, [])
+        await page.evaluate("html => document.querySelector('main').innerHTML = html", ARTICLE)
+        await page.evaluate("""src => {
+            const img = document.createElement('img');
+            img.src = src;
+            document.querySelector('a[href$="/photo/1"]').appendChild(img);
+        }""", SRC.format("A1"))
+        queued = await page.evaluate(DRAIN_SCRIPT, None)
+        await page.evaluate("src => { document.getElementById('second').src = src; }", SRC.format("A2"))
+        updates = await page.evaluate(DRAIN_SCRIPT, None)
+        await browser.close()
+        return queued, updates
+
+
+def test_images_inserted_after_the_anchor_are_merged():
+    """El img insertado tras el enlace se añade al registro en cola; el src posterior llega como actualización"""
+    try:
+        import playwright  # noqa: F401
+    except ImportError:
+        print("⏭️  Playwright no está instalado: se omite el test del observer en el navegador")
+        return
+
+    queued, updates = asyncio.run(_observe_late_images())
+    assert len(queued) == 1 and queued[0]["images"] == [SRC.format("A1")]
+    assert queued[0]["carousel"] == 2 and queued[0]["media_kinds"] == ["photo", "photo"]
+    assert updates == [{"id": "10", "update": True, "images": [SRC.format("A2")]}]
+
+
+def test_store_merges_images_of_update_records():
+    """Las actualizaciones completan image_srcs y amplían el recuento si hay más fotos que enlaces"""
+    store = StatusStore()
+    store.add("10", "testuser", "image", "https://x.com/testuser/status/10/photo/1",
+              image_srcs=[SRC.format("A1")], carousel_size=1, media_kinds=["photo", "video"], media_exact=True)
+
+    assert store.merge_images("10", [SRC.format("A1"), SRC.format("A2")])
+    assert not store.merge_images("10", [SRC.format("A2")]) and not store.merge_images("99", [SRC.format("Z")])
+    record = store[0]
+    assert record["image_srcs"] == [SRC.format("A1"), SRC.format("A2")]
+    assert record["carousel_size"] == 2 and record["media_kinds"] == ["photo", "photo", "video"]
+    store.close()
+
+
+if __name__ == "__main__":
+    test_images_inserted_after_the_anchor_are_merged()
+    test_store_merges_images_of_update_records()
+    print("✅ Tests del observer del timeline completados")
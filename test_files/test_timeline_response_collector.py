@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests del colector de respuestas GraphQL del timeline (reproduce respuestas guardadas)
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from modules.extraction.timeline_response_collector import TimelineResponseCollector, is_timeline_response
+
+FIXTURES = Path(__file__).parent / "fixtures"
+USER_MEDIA_URL = "https://x.com/i/api/graphql/abc123/UserMedia?variables=%7B%22userId%22%3A%2244196397%22%7D"
+
+
+def _load_fixture(name: str):
+    with open(FIXTURES / name, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class _FakeResponse:
+    def __init__(self, url: str, payload):
+        self.url = url
+        self._payload = payload
+
+    async def json(self):
+        await asyncio.sleep(0)
+        if isinstance(self._payload, Exception):
+            raise self._payload
+        return self._payload
+
+
+def test_user_media_fixture_maps_statuses():
+    """Carruseles en orden, variantes de video ordenadas y tweets anidados"""
+    collector = TimelineResponseCollector()
+    assert collector.ingest(_load_fixture("timeline_user_media.json")) == 5
+
+    assert collector.images_for("1933500000000000001") == [
+        "https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg&name=large",
+        "https://pbs.twimg.com/media/GpEIoIaXoAAj_ZE?format=jpg&name=large",
+    ]
+    assert collector.authors["1933500000000000001"] == "testuser"
+    # TweetWithVisibilityResults: solo video, MP4 de mayor bitrate primero y HLS al final
+    assert collector.images_for("1933400000000000002") == []
+    assert collector.best_video_url("1933400000000000002").endswith("/720x1280/high.mp4")
+    assert collector.video_variants["1933400000000000002"][-1]["content_type"] == "application/x-mpegURL"
+    # El retweet y su original se mapean por separado
+    assert collector.images_for("1933300000000000003") == collector.images_for("1900000000000000009")
+    assert collector.authors["1900000000000000009"] == "otheruser"
+    # Con el autor del perfil, la media de otras cuentas (también la que repite el retweet) no se mapea
+    assert collector.images_for("1933500000000000001", "TestUser") == collector.images_for("1933500000000000001")
+    assert collector.images_for("1933300000000000003", "testuser") == []
+    assert collector.images_for("1900000000000000009", "testuser") == []
+    assert collector.images_for("1900000000000000009", "otheruser")
+    assert "1933200000000000004" in collector.video_variants  # animated_gif
+    assert "1933100000000000005" not in collector.image_mappings  # Sin media
+
+    items = [{"status_id": "1933400000000000002", "media_type": "video"},
+             {"status_id": "1933500000000000001", "media_type": "image"}]
+    assert collector.annotate_videos(items) == 1
+    assert "video_variants" in items[0] and "video_variants" not in items[1]
+
+
+def test_responses_are_filtered_and_awaited():
+    """Solo se leen las respuestas de timeline; wait_idle espera a las pendientes"""
+    assert is_timeline_response(USER_MEDIA_URL)
+    assert not is_timeline_response("https://x.com/i/api/graphql/abc123/UserByScreenName?variables=%7B%7D")
+    assert not is_timeline_response("https://pbs.twimg.com/media/GrUYcfLXgAAuRsX?format=jpg")
+
+    async def scenario():
+        collector = TimelineResponseCollector()
+        collector._on_response(_FakeResponse(USER_MEDIA_URL, _load_fixture("timeline_user_media.json")))
+        collector._on_response(_FakeResponse(USER_MEDIA_URL, ValueError("cuerpo vacío")))
+        collector._on_response(_FakeResponse("https://x.com/i/api/2/badge_count", {}))
+        await collector.wait_idle()
+        return collector
+
+    collector = asyncio.run(scenario())
+    assert collector.responses_parsed == 1
+    assert len(collector.image_mappings) == 3
+
+
+if __name__ == "__main__":
+    test_user_media_fixture_maps_statuses()
+    test_responses_are_filtered_and_awaited()
+    print("✅ Tests del colector de respuestas del timeline completados")
@@ -19,6 +19,10 @@ from datetime import datetime
 from urllib.parse import urlparse
 import argparse
 
+from modules.utils.cache_manager import CacheManager
+from modules.utils.file_lock import RunLease
+from modules.utils.snowflake import datetime_to_snowflake, snowflake_to_datetime
+from modules.utils.time_index import TimeBucketIndex, format_date_report, parse_date_bound
 
 # ===== DELAY ORGÁNICO =====
 def get_organic_delay(base_delay=2, variance=0.5, min_delay=1, max_delay=5):
@@ -87,34 +91,79 @@ def load_user_config(name_param):
     return None, None
 
 
-def load_cached_posts(username):
-    """Carga el archivo de posts cacheados del usuario"""
-    cache_path = Path(f"cache/{username}_processed_posts.json")
+# Leases tomados por esta ejecución; main() los libera al terminar
+_held_leases = []
 
-    if not cache_path.exists():
-        print(f"❌ No se encontró archivo de caché: {cache_path}")
-        return None
 
-    with open(cache_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def load_cached_posts(username, acquire_lease=True):
+    """
+    Carga los posts cacheados del usuario (snapshot + journal de cambios).
+    Devuelve (datos, cache_ref) donde cache_ref identifica el caché para guardar.
+
+    Con acquire_lease=True reserva el usuario para esta ejecución; si otra
+    ejecución ya lo tiene, el caché se abre en modo solo lectura (sin lease):
+    se puede descargar, pero no se marcan los videos como procesados.
+    """
+    cache_manager = CacheManager()
+    store = cache_manager.store
+
+    if not store.exists(username):
+        print(f"❌ No se encontró archivo de caché: {store.location(username)}")
+        return None, None
+
+    lease = None
+    if acquire_lease:
+        lease = RunLease(cache_manager.cache_dir, username, owner="video_selector")
+        if not lease.acquire():
+            print(f"🔒 @{username} está en uso por {lease.describe_holder()}: modo solo lectura")
+            lease = None
+        else:
+            _held_leases.append(lease)
 
-    print(f"📄 Cargando caché desde: {cache_path}")
-    return data, cache_path
+    data = store.load(username)
 
+    print(f"📄 Cargando caché desde: {store.location(username)}")
+    return data, (cache_manager, username, lease)
 
-def save_cached_posts(data, cache_path):
-    """Guarda el archivo de posts cacheados actualizado"""
-    with open(cache_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
-    print(f"💾 Caché actualizado: {cache_path}")
 
+def save_cached_posts(data, cache_ref, post_id):
+    """Guarda en el caché solo el post modificado (se añade al journal)"""
+    cache_manager, username, lease = cache_ref
+    if lease is None:
+        print(f"🔒 Caché en solo lectura: {post_id} no se marca como procesado")
+        return False
+    cache_manager.upsert_posts(username, {post_id: data["processed_posts"][post_id]})
+    print(f"💾 Caché actualizado: {cache_manager.store.location(username)}")
+    return True
 
-def extract_media_from_posts(posts_data, username, limit=None):
-    """Extrae información de medios desde los posts cacheados"""
+
+def release_leases():
+    """Libera los leases tomados por esta ejecución."""
+    while _held_leases:
+        _held_leases.pop().release()
+
+
+def parse_date_args(args):
+    """Devuelve (since, until) en UTC a partir de --since/--until (until incluido)."""
+    since = parse_date_bound(args.since) if args.since else None
+    until = parse_date_bound(args.until, end=True) if args.until else None
+    return since, until
+
+
+def extract_media_from_posts(posts_data, username, limit=None, since=None, until=None, cache_ref=None):
+    """
+    Extrae información de medios desde los posts cacheados.
+    Con since/until solo incluye los posts creados en ese rango (fecha del status ID).
+    Con cache_ref se consulta además el índice compartido de videos procesados
+    (CacheManager.video_index), que ve las descargas de otras ejecuciones.
+    """
     media_items = []
+    lower = datetime_to_snowflake(since) if since else None
+    upper = datetime_to_snowflake(until) if until else None
 
     # El formato real del caché es: {"processed_posts": {"post_id": {"processed_date": "..."}}}
     processed_posts = posts_data.get("processed_posts", {})
+    video_index = cache_ref[0].video_index(cache_ref[1], processed_posts) if cache_ref else ()
 
     count = 0
     videos_found = 0
@@ -124,10 +173,16 @@ def extract_media_from_posts(posts_data, username, limit=None):
         if post_data.get("media_type") != "video":
             continue
 
+        if lower is not None or upper is not None:
+            if not post_id.isdigit():
+                continue
+            if (lower is not None and int(post_id) < lower) or (upper is not None and int(post_id) >= upper):
+                continue
+
         videos_found += 1
 
         # Verificar si ya fue procesado para video
-        if post_data.get("video_processed", False):
+        if post_data.get("video_processed", False) or post_id in video_index:
             continue
 
         # Generar URL del post
@@ -145,6 +200,7 @@ def extract_media_from_posts(posts_data, username, limit=None):
             "post_url": post_url,
             "media_type": "video",
             "processed_date": post_data.get("processed_at", "unknown"),
+            "created_at": snowflake_to_datetime(post_id).isoformat() if post_id.isdigit() else None,
         }
 
         media_items.append(video_item)
@@ -202,8 +258,12 @@ def mark_post_as_video_processed(posts_data, post_id):
         return False
 
 
-def download_video(item, posts_data, cache_path, user_config):
-    """Descarga un video específico y marca como procesado"""
+def download_video(item, posts_data, cache_ref, user_config):
+    """
+    Descarga un video específico y lo marca como procesado. En modo solo
+    lectura (otra ejecución tiene el lease) se descarga igualmente, pero no se
+    marca en el caché.
+    """
     print(f"⬇️  Descargando video: {item['url']}")
 
     # Usar el directorio de descarga del usuario
@@ -234,8 +294,8 @@ def download_video(item, posts_data, cache_path, user_config):
         if result.returncode == 0:
             print("✅ Descarga exitosa!")
             # Marcar como procesado usando el post_id
-            if mark_post_as_video_processed(posts_data, item["post_id"]):
-                save_cached_posts(posts_data, cache_path)
+            if mark_post_as_video_processed(posts_data, item["post_id"]) and \
+                    save_cached_posts(posts_data, cache_ref, item["post_id"]):
                 print("✅ Marcado como procesado en caché")
         else:
             print(f"❌ Error en descarga: {result.stderr}")
@@ -243,7 +303,7 @@ def download_video(item, posts_data, cache_path, user_config):
         print(f"❌ Error ejecutando yt-dlp: {e}")
 
 
-def download_image(item, posts_data, cache_path):
+def download_image(item, posts_data, cache_ref):
     """Funcionalidad de imágenes removida - usar edge_x_downloader_clean.py"""
     print("� Nota: Para descargar imágenes usa:")
     print("   python3 edge_x_downloader_clean.py")
@@ -300,23 +360,52 @@ def main():
         "--download-indices",
         help="Descargar videos específicos por índices separados por comas (para MCP)",
     )
+    parser.add_argument("--since", help="Solo videos publicados desde YYYY[-MM[-DD]] (UTC)")
+    parser.add_argument("--until", help="Solo videos publicados hasta YYYY[-MM[-DD]] incluida (UTC)")
+    parser.add_argument(
+        "--monthly",
+        action="store_true",
+        help="Mostrar videos cacheados por mes (sin descargar)",
+    )
 
     args = parser.parse_args()
 
-    if args.list_only:
-        run_list_only_mode(args)
+    try:
+        parse_date_args(args)
+    except ValueError as e:
+        print(f"❌ {e}")
         return
 
-    if args.download_all:
-        run_download_all_mode(args)
+    try:
+        if args.monthly:
+            run_monthly_mode(args)
+        elif args.list_only:
+            run_list_only_mode(args)
+        elif args.download_all:
+            run_download_all_mode(args)
+        elif args.download_indices:
+            run_download_indices_mode(args)
+        else:
+            # Modo interactivo normal
+            run_interactive_mode(args)
+    finally:
+        release_leases()
+
+
+def run_monthly_mode(args):
+    """Conteo de videos por mes desde el caché (fecha de los status IDs)"""
+    user_config, config_key = load_user_config(args.name)
+    if not user_config:
         return
 
-    if args.download_indices:
-        run_download_indices_mode(args)
+    username = user_config.get("username", config_key)
+    posts_data, _ = load_cached_posts(config_key, acquire_lease=False)
+    if not posts_data:
         return
 
-    # Modo interactivo normal
-    run_interactive_mode(args)
+    since, until = parse_date_args(args)
+    index = TimeBucketIndex(posts_data.get("processed_posts", {}))
+    print(format_date_report(index, username, since, until, media_type="video", monthly=True))
 
 
 def run_list_only_mode(args):
@@ -326,11 +415,11 @@ def run_list_only_mode(args):
         return
 
     username = user_config.get("username", config_key)
-    posts_data, cache_path = load_cached_posts(config_key)
+    posts_data, cache_ref = load_cached_posts(config_key, acquire_lease=False)
     if not posts_data:
         return
 
-    all_medias = extract_media_from_posts(posts_data, username, args.limit)
+    all_medias = extract_media_from_posts(posts_data, username, args.limit, *parse_date_args(args), cache_ref=cache_ref)
     if not all_medias:
         print("❌ No se encontraron videos pendientes para procesar")
         return
@@ -356,11 +445,11 @@ def run_download_all_mode(args):
         return
 
     username = user_config.get("username", config_key)
-    posts_data, cache_path = load_cached_posts(config_key)
+    posts_data, cache_ref = load_cached_posts(config_key)
     if not posts_data:
         return
 
-    all_medias = extract_media_from_posts(posts_data, username, args.limit)
+    all_medias = extract_media_from_posts(posts_data, username, args.limit, *parse_date_args(args), cache_ref=cache_ref)
     if not all_medias:
         print("❌ No se encontraron videos pendientes para procesar")
         return
@@ -369,7 +458,7 @@ def run_download_all_mode(args):
 
     for i, item in enumerate(all_medias, 1):
         print(f"\n🔄 Descargando {i}/{len(all_medias)}: {item['url']}")
-        download_video(item, posts_data, cache_path, user_config)
+        download_video(item, posts_data, cache_ref, user_config)
 
         # Aplicar delay orgánico solo si no es el último video
         if i < len(all_medias):
@@ -391,11 +480,11 @@ def run_download_indices_mode(args):
         return
 
     username = user_config.get("username", config_key)
-    posts_data, cache_path = load_cached_posts(config_key)
+    posts_data, cache_ref = load_cached_posts(config_key)
     if not posts_data:
         return
 
-    all_medias = extract_media_from_posts(posts_data, username, args.limit)
+    all_medias = extract_media_from_posts(posts_data, username, args.limit, *parse_date_args(args), cache_ref=cache_ref)
     if not all_medias:
         print("❌ No se encontraron videos pendientes para procesar")
         return
@@ -417,7 +506,7 @@ def run_download_indices_mode(args):
     for i, idx in enumerate(valid_indices, 1):
         item = all_medias[idx - 1]  # Convertir a índice base 0
         print(f"\n🔄 Descargando {i}/{len(valid_indices)}: {item['url']}")
-        download_video(item, posts_data, cache_path, user_config)
+        download_video(item, posts_data, cache_ref, user_config)
 
         # Aplicar delay orgánico solo si no es el último video
         if i < len(valid_indices):
@@ -445,12 +534,12 @@ def run_interactive_mode(args):
     print(f"📁 Directorio de descarga: {download_dir}")
 
     # Cargar caché del usuario (usar la clave de configuración)
-    posts_data, cache_path = load_cached_posts(config_key)
+    posts_data, cache_ref = load_cached_posts(config_key)
     if not posts_data:
         return
 
     # Extraer medios desde el caché (con el username real)
-    all_medias = extract_media_from_posts(posts_data, username, args.limit)
+    all_medias = extract_media_from_posts(posts_data, username, args.limit, *parse_date_args(args), cache_ref=cache_ref)
     if not all_medias:
         print("❌ No se encontraron videos pendientes para procesar")
         print("💡 Todos los videos en caché pueden estar ya procesados")
@@ -543,13 +632,13 @@ def run_interactive_mode(args):
             if confirm in ["s", "si", "sí", "y", "yes"]:
                 for i, item in enumerate(current_medias, 1):
                     print(f"\n🔄 Descargando {i}/{len(current_medias)}")
-                    download_video(item, posts_data, cache_path, user_config)
+                    download_video(item, posts_data, cache_ref, user_config)
                     _add_download_delay(
                         i - 1, len(current_medias)
                     )  # Añadir delay después de cada descarga
                     # Actualizar la lista para reflejar los cambios
                     current_medias = extract_media_from_posts(
-                        posts_data, username, args.limit
+                        posts_data, username, args.limit, *parse_date_args(args), cache_ref=cache_ref
                     )
                 print("✅ Descarga masiva completada")
                 break
@@ -557,10 +646,10 @@ def run_interactive_mode(args):
             item_num = int(choice)
             if 1 <= item_num <= len(current_medias):
                 item = current_medias[item_num - 1]
-                download_video(item, posts_data, cache_path, user_config)
+                download_video(item, posts_data, cache_ref, user_config)
                 # Actualizar la lista para reflejar los cambios
                 current_medias = extract_media_from_posts(
-                    posts_data, username, args.limit
+                    posts_data, username, args.limit, *parse_date_args(args), cache_ref=cache_ref
                 )
                 if not current_medias:
                     print("🎉 ¡Todos los videos han sido procesados!")
@@ -591,7 +680,7 @@ EJEMPLOS DE USO:
 
 FUNCIONAMIENTO:
 - Acepta tanto nombres de usuario completos como nombres amigables (friendlyname)
-- Lee directamente del archivo de caché del usuario (cache/{name}_processed_posts.json)
+- Lee el caché del usuario (cache/{name}_processed_posts.json + journal de cambios)
 - Genera URLs de video usando el formato: https://x.com/{username}/status/{post_id}/video/1
 - Solo procesa posts que tienen 'media_type': 'video' en el caché
 - Descarga videos al directorio configurado en 'directory_download' para cada usuario